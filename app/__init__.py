@@ -14,11 +14,19 @@ from app.routes.plateforme_routes import plateforme_config_bp
 from app.routes.utilisateur_plateforme_routes import utilisateur_plateforme_bp
 from app.routes.historique_routes import historique_bp  
 from app.routes.publication_routes import publication_bp
+from app.routes.usage_routes import usage_bp
+from app.routes.recherche_routes import recherche_bp
+from app.routes.export_routes import export_bp
 from dotenv import load_dotenv
 import os
 from datetime import timedelta
 from werkzeug.middleware.proxy_fix import ProxyFix
 from app.scheduler.scheduler import scheduler
+from app.services.generation_jobs import generation_queue
+from app.services.image_derivatives import image_derivatives
+from app.services.recherche import recherche_service
+from app.utils.compteur_sql import garde_requetes
+from app.cli import images_cli, publications_cli, requetes_cli, recherche_cli
 import atexit
 
 def create_app():
@@ -42,6 +50,7 @@ def create_app():
         'JWT_SECRET_KEY': os.getenv("JWT_SECRET_KEY", "your-jwt-secret-key"),
         'SQLALCHEMY_DATABASE_URI': os.getenv("DB_URL"),
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'USE_X_SENDFILE': os.getenv('USE_X_SENDFILE', 'false').lower() in ['1', 'true', 'yes'],
         'SQLALCHEMY_ENGINE_OPTIONS': {
             'pool_size': 10,
             'pool_recycle': 300,
@@ -164,6 +173,9 @@ def create_app():
         (utilisateur_plateforme_bp, "/api/plateformes"),
         (historique_bp, "/api/historiques"),
         (publication_bp, "/api/publications"),
+        (usage_bp, "/api/usage"),
+        (recherche_bp, "/api/recherche"),
+        (export_bp, "/api/export"),
         (oauth_bp, "/api/oauth"), 
         (auth_bp, "/api/auth"),
     ]
@@ -176,6 +188,11 @@ def create_app():
 
     app.logger.info(f"{len(blueprints)} blueprints enregistrés")
 
+    app.cli.add_command(images_cli)
+    app.cli.add_command(publications_cli)
+    app.cli.add_command(requetes_cli)
+    app.cli.add_command(recherche_cli)
+
     try:
         scheduler.init_app(app)
         app.logger.info("Scheduler initialisé")
@@ -187,6 +204,17 @@ def create_app():
     except Exception as e:
         app.logger.error(f"Erreur initialisation/démarrage scheduler: {str(e)}", exc_info=True)
 
+    try:
+        generation_queue.init_app(app)
+        generation_queue.planifier_balayage(scheduler)
+        generation_queue.reprendre_jobs()
+    except Exception as e:
+        app.logger.error(f"Erreur initialisation file de génération: {str(e)}", exc_info=True)
+
+    image_derivatives.init_app(app)
+    recherche_service.init_app(app)
+    garde_requetes.init_app(app)
+
     def shutdown_scheduler():
         """Arrêter proprement le scheduler"""
         try:
@@ -198,6 +226,8 @@ def create_app():
             app.logger.error(f"Erreur arrêt scheduler: {str(e)}")
 
     atexit.register(shutdown_scheduler)
+    atexit.register(generation_queue.shutdown)
+    atexit.register(image_derivatives.shutdown)
     
     @app.teardown_appcontext
     def teardown_scheduler(exception=None):
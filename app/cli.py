@@ -0,0 +1,496 @@
+import click
+from flask.cli import AppGroup
+from app.extensions import db
+
+
+images_cli = AppGroup("images", help="Stockage des images générées")
+
+
+@images_cli.command("migrer")
+@click.option("--lot", default=100, show_default=True, help="Contenus traités par transaction")
+def migrer_images(lot):
+    """Déplace les images base64 de contenu.image_url vers le stockage par empreinte"""
+    from app.models.contenu import Contenu
+    from app.services.blob_store import blob_store
+    from app.services.image_derivatives import image_derivatives
+
+    dernier_id = 0
+    migres = 0
+    octets_liberes = 0
+
+    while True:
+        contenus = Contenu.query.filter(
+            Contenu.id > dernier_id,
+            Contenu.image_hash.is_(None),
+            Contenu.image_url.like("data:%")
+        ).order_by(Contenu.id).limit(lot).all()
+        if not contenus:
+            break
+
+        for contenu in contenus:
+            dernier_id = contenu.id
+            try:
+                blob = blob_store.enregistrer_data_uri(contenu.image_url)
+            except ValueError as e:
+                click.echo(f"Contenu {contenu.id} ignoré: {str(e)}")
+                continue
+            image_derivatives.planifier(blob["image_hash"])
+            octets_liberes += len(contenu.image_url)
+            contenu.image_url = None
+            for colonne, valeur in blob.items():
+                setattr(contenu, colonne, valeur)
+            migres += 1
+
+        db.session.commit()
+        db.session.expunge_all()
+        click.echo(f"... {migres} image(s) migrée(s) (id <= {dernier_id})")
+
+    click.echo(f"{migres} image(s) migrée(s), {octets_liberes} octets retirés de la table contenu")
+
+
+@images_cli.command("derives")
+def generer_derives():
+    """Génère les miniatures et aperçus manquants pour toutes les images stockées"""
+    from app.models.contenu import Contenu
+    from app.services.image_derivatives import image_derivatives
+
+    if not image_derivatives.disponible:
+        click.echo("Pillow n'est pas installé : aucun dérivé généré")
+        return
+
+    empreintes = [sha for (sha,) in db.session.query(Contenu.image_hash).filter(Contenu.image_hash.isnot(None)).distinct()]
+    for sha in empreintes:
+        image_derivatives.planifier(sha)
+    image_derivatives.executor.shutdown(wait=True)
+    click.echo(f"{len(empreintes)} image(s) traitée(s), {image_derivatives.stats()['erreurs']} erreur(s)")
+
+
+publications_cli = AppGroup("publications", help="Maintenance des publications")
+
+
+@publications_cli.command("compacter")
+@click.option("--lot", default=200, show_default=True, help="Publications par transaction")
+@click.option("--pause", default=0.1, show_default=True, help="Pause entre deux lots (secondes)")
+@click.option("--depuis-id", default=0, show_default=True, help="Reprendre après cet id")
+@click.option("--reprises", default=3, show_default=True, help="Passes finales sur les publications verrouillées")
+@click.option("--dry-run", is_flag=True, help="Mesurer sans écrire")
+def compacter_publications(lot, pause, depuis_id, reprises, dry_run):
+    """Retire de parametres_publication les copies du texte et de l'image du contenu.
+
+    Parcours par id croissant en lots courts (une transaction par lot, lignes
+    verrouillées avec SKIP LOCKED sous PostgreSQL), reprenable via --depuis-id.
+    Les lignes sautées car verrouillées par une autre transaction sont
+    retentées en fin de parcours ; celles encore verrouillées sont listées et
+    la commande sort en erreur.
+    Les images base64 qui diffèrent du contenu sont déplacées dans le stockage
+    par empreinte et remplacées par une référence 'blob:<sha>'.
+    """
+    import hashlib
+    import json
+    import time
+    from sqlalchemy.orm import load_only, selectinload
+    from app.models.publication import Publication
+    from app.models.contenu import Contenu
+    from app.services.blob_store import blob_store
+    from app.utils.images import decoder_data_uri
+
+    dernier_id = depuis_id
+    traitees = 0
+    modifiees = 0
+    octets_liberes = 0
+    verrouillees = set()
+
+    def verrouiller(ids):
+        """Verrouille les publications `ids` libres ; renvoie (publications, ids sautés)"""
+        publications = Publication.query.options(
+            load_only(Publication.id, Publication.parametres_publication),
+            selectinload(Publication.contenu).load_only(
+                Contenu.id, Contenu.texte, Contenu.titre, Contenu.image_url, Contenu.image_hash
+            )
+        ).filter(Publication.id.in_(ids)).order_by(Publication.id) \
+            .with_for_update(of=Publication, skip_locked=True).all()
+        sautees = set(ids) - {publication.id for publication in publications}
+        if sautees:
+            # Supprimées entre-temps : rien à reprendre
+            sautees = {i for (i,) in db.session.query(Publication.id).filter(Publication.id.in_(sautees))}
+        return publications, sautees
+
+    def compacter(publications):
+        nonlocal traitees, modifiees, octets_liberes
+        for publication in publications:
+            traitees += 1
+            params = publication.parametres_publication or {}
+            contenu = publication.contenu
+            nouveaux = dict(params)
+
+            message = nouveaux.get("message")
+            if message is not None and (not message or (contenu and message in [contenu.texte, contenu.titre])):
+                nouveaux.pop("message")
+
+            image = nouveaux.get("image_url")
+            if image is not None:
+                if not image or (contenu and image == contenu.image_url):
+                    nouveaux.pop("image_url")
+                elif image.startswith("data:"):
+                    try:
+                        if dry_run:
+                            sha = hashlib.sha256(decoder_data_uri(image)[1]).hexdigest()
+                        else:
+                            sha = blob_store.enregistrer_data_uri(image)["image_hash"]
+                    except ValueError as e:
+                        click.echo(f"Publication {publication.id}: image ignorée ({str(e)})")
+                        sha = None
+                    if contenu and sha and sha == contenu.image_hash:
+                        nouveaux.pop("image_url")
+                    elif sha:
+                        nouveaux["image_url"] = blob_store.reference(sha)
+
+            if nouveaux != params:
+                octets_liberes += len(json.dumps(params)) - len(json.dumps(nouveaux))
+                modifiees += 1
+                if not dry_run:
+                    publication.parametres_publication = nouveaux
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        db.session.expunge_all()
+
+    while True:
+        ids = [i for (i,) in db.session.query(Publication.id).filter(Publication.id > dernier_id)
+               .order_by(Publication.id).limit(lot)]
+        if not ids:
+            break
+        dernier_id = ids[-1]
+
+        publications, sautees = verrouiller(ids)
+        verrouillees |= sautees
+        compacter(publications)
+
+        click.echo(
+            f"... {traitees} traitée(s), {modifiees} compactée(s), {octets_liberes} octets, "
+            f"{len(verrouillees)} verrouillée(s) à reprendre (reprise: --depuis-id {dernier_id})"
+        )
+        if pause:
+            time.sleep(pause)
+
+    for passe in range(reprises):
+        if not verrouillees:
+            break
+        time.sleep(max(pause, 1.0))
+        a_reprendre = sorted(verrouillees)
+        for debut in range(0, len(a_reprendre), lot):
+            morceau = a_reprendre[debut:debut + lot]
+            publications, sautees = verrouiller(morceau)
+            verrouillees = (verrouillees - set(morceau)) | sautees
+            compacter(publications)
+        click.echo(f"... reprise {passe + 1}/{reprises} : {len(verrouillees)} encore verrouillée(s)")
+
+    click.echo(
+        f"{'[dry-run] ' if dry_run else ''}{traitees} publication(s) parcourue(s), "
+        f"{modifiees} compactée(s), {octets_liberes} octets récupérés, "
+        f"{len(verrouillees)} non traitée(s) car verrouillée(s)"
+    )
+    if verrouillees:
+        click.echo(f"Publications verrouillées non traitées : {', '.join(str(i) for i in sorted(verrouillees))}")
+        raise SystemExit(1)
+
+
+requetes_cli = AppGroup("requetes", help="Plans d'exécution et nombre de requêtes des chemins critiques")
+
+
+def requetes_critiques(id_utilisateur, id_contenu, id_plateforme):
+    """(nom, table, requête) des chemins chauds, construites comme dans les contrôleurs"""
+    from datetime import datetime, timedelta
+    from app.models.contenu import Contenu
+    from app.models.publication import Publication, StatutPublicationEnum
+    from app.models.historique import Historique
+    from app.models.utilisateur import Token
+    from app.models.plateforme import UtilisateurPlateforme, OAuthState
+    from app.models.projet import Projet
+    from app.utils.pagination import ordre_tri, LIMITE_DEFAUT
+
+    maintenant = datetime.utcnow()
+    page = LIMITE_DEFAUT + 1
+    return [
+        ("contenus d'un utilisateur (page)", "contenu",
+         Contenu.query.filter_by(id_utilisateur=id_utilisateur)
+         .order_by(*ordre_tri(Contenu.date_creation, Contenu.id)).limit(page)),
+        ("contenus, vue admin (page)", "contenu",
+         Contenu.query.order_by(*ordre_tri(Contenu.date_creation, Contenu.id)).limit(page)),
+        ("publications d'un utilisateur (page)", "publications",
+         Publication.query.filter_by(id_utilisateur=id_utilisateur)
+         .order_by(*ordre_tri(Publication.date_creation, Publication.id)).limit(page)),
+        ("publications, vue admin (page)", "publications",
+         Publication.query.order_by(*ordre_tri(Publication.date_creation, Publication.id)).limit(page)),
+        ("publications programmées à échéance", "publications",
+         Publication.query.filter(Publication.statut == StatutPublicationEnum.programme,
+                                  Publication.date_programmee >= maintenant)),
+        ("publications d'un contenu", "publications",
+         Publication.query.filter_by(id_contenu=id_contenu)),
+        ("historique d'un utilisateur", "historiques",
+         Historique.query.filter_by(id_utilisateur=id_utilisateur)
+         .order_by(*ordre_tri(Historique.date_action, Historique.id)).limit(page)),
+        ("historique d'un contenu", "historiques",
+         Historique.query.filter_by(id_contenu=id_contenu).order_by(Historique.date_action.desc())),
+        ("token X d'un utilisateur", "tokens",
+         Token.query.filter_by(utilisateur_id=id_utilisateur, provider="x")),
+        ("connexion utilisateur / plateforme", "utilisateur_plateforme",
+         UtilisateurPlateforme.query.filter_by(utilisateur_id=id_utilisateur, plateforme_id=id_plateforme)),
+        ("states OAuth expirés", "oauth_state",
+         OAuthState.query.filter((OAuthState.used == True) | (OAuthState.created_at < maintenant - timedelta(hours=24)))),
+        ("projets d'un utilisateur", "projets",
+         Projet.query.filter(Projet.id_utilisateur == id_utilisateur)),
+    ]
+
+
+def validateurs_critiques(id_utilisateur):
+    """(nom, table, requête) des validateurs ETag : doivent être lus dans l'index seul"""
+    from app.controllers.contenu_controller import validateurs_contenus
+    from app.controllers.publication_controller import validateurs_publications
+    from app.controllers.utilisateur_plateforme_controller import validateurs_plateformes
+
+    publications, contenus = validateurs_publications(id_utilisateur)
+    publications_admin, contenus_admin = validateurs_publications(None)
+    return [
+        ("ETag contenus d'un utilisateur", "contenu", validateurs_contenus(id_utilisateur)[0]),
+        ("ETag contenus, vue admin", "contenu", validateurs_contenus(None)[0]),
+        ("ETag publications d'un utilisateur", "publications", publications),
+        ("ETag publications (contenus liés)", "contenu", contenus),
+        ("ETag publications, vue admin", "publications", publications_admin),
+        ("ETag connexions plateformes d'un utilisateur", "utilisateur_plateforme",
+         validateurs_plateformes(id_utilisateur)[0]),
+    ]
+
+
+def _inserer_fixtures(lignes, nb_utilisateurs):
+    """Jeu de données volumineux et réparti, inséré dans la transaction courante"""
+    import random
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from app.models.utilisateur import Utilisateur, Token
+    from app.models.modelIA import ModelIA
+    from app.models.contenu import Contenu
+    from app.models.publication import Publication, StatutPublicationEnum
+    from app.models.historique import Historique, TypeActionEnum
+    from app.models.plateforme import PlateformeConfig, UtilisateurPlateforme, OAuthState
+    from app.models.projet import Projet
+
+    utilisateurs = [Utilisateur(nom=f"explain-{i}", email=f"explain-{i}@fixtures.invalid") for i in range(nb_utilisateurs)]
+    model = ModelIA(nom_model="explain", fournisseur="explain", api_endpoint="-")
+    plateforme = PlateformeConfig(nom="explain-fixtures", config={})
+    db.session.add_all(utilisateurs + [model, plateforme])
+    db.session.flush()
+
+    ids = [u.id for u in utilisateurs]
+    debut = datetime.utcnow() - timedelta(days=365)
+    date = lambda: debut + timedelta(minutes=random.randint(0, 365 * 24 * 60))
+    statuts = list(StatutPublicationEnum)
+
+    contenus = db.session.execute(insert(Contenu).returning(Contenu.id), [
+        {"id_utilisateur": random.choice(ids), "id_model": model.id, "titre": "fixture", "date_creation": date()}
+        for _ in range(lignes)
+    ]).scalars().all()
+
+    db.session.execute(insert(Publication), [
+        {"id_utilisateur": random.choice(ids), "id_contenu": random.choice(contenus), "titre_publication": "fixture",
+         "statut": random.choice(statuts), "date_creation": date(),
+         "date_programmee": date() + timedelta(days=365) if random.random() < 0.02 else None}
+        for _ in range(lignes)
+    ])
+    db.session.execute(insert(Historique), [
+        {"id_utilisateur": random.choice(ids), "id_contenu": random.choice(contenus),
+         "type_action": random.choice(list(TypeActionEnum)), "description": "fixture", "date_action": date()}
+        for _ in range(lignes)
+    ])
+    db.session.execute(insert(Token), [
+        {"utilisateur_id": random.choice(ids), "provider": random.choice(["x", "linkedin", "google"]),
+         "expires_at": date()}
+        for _ in range(lignes)
+    ])
+    db.session.execute(insert(UtilisateurPlateforme), [
+        {"utilisateur_id": random.choice(ids), "plateforme_id": plateforme.id, "token_expires_at": date()}
+        for _ in range(lignes)
+    ])
+    db.session.execute(insert(OAuthState), [
+        {"state": f"explain-{i}", "utilisateur_id": random.choice(ids), "plateforme_id": plateforme.id,
+         "created_at": datetime.utcnow() - timedelta(minutes=random.randint(0, 600)), "used": random.random() < 0.01}
+        for i in range(lignes)
+    ])
+    db.session.execute(insert(Projet), [
+        {"id_utilisateur": random.choice(ids), "nom_projet": "fixture", "date_creation": date()} for _ in range(lignes)
+    ])
+    db.session.execute(db.text("ANALYZE"))
+    return ids[0], contenus[0], plateforme.id
+
+
+@requetes_cli.command("verifier")
+@click.option("--lignes", default=20000, show_default=True, help="Lignes de fixture par table")
+@click.option("--utilisateurs", default=200, show_default=True, help="Utilisateurs de fixture")
+@click.option("--details", is_flag=True, help="Afficher le plan complet de chaque requête")
+def verifier_requetes(lignes, utilisateurs, details):
+    """EXPLAIN de chaque requête critique sur un jeu de données volumineux.
+
+    Les fixtures sont insérées dans une transaction annulée à la fin : à lancer
+    sur une base de test migrée (flask db upgrade). Code de sortie 1 si une
+    requête retombe sur un parcours séquentiel de sa table, ou si un validateur
+    ETag lit la table au lieu de son index couvrant.
+    """
+    from app.utils.explain import plan, scans_sequentiels, lectures_table
+
+    echecs = []
+    try:
+        click.echo(f"Insertion des fixtures ({lignes} lignes/table, {utilisateurs} utilisateurs)...")
+        id_utilisateur, id_contenu, id_plateforme = _inserer_fixtures(lignes, utilisateurs)
+
+        for nom, table, requete in requetes_critiques(id_utilisateur, id_contenu, id_plateforme):
+            lignes_plan = plan(db.session, requete.statement)
+            scans = scans_sequentiels(lignes_plan, table)
+            click.echo(f"{'ECHEC' if scans else 'OK   '} {nom}")
+            if scans or details:
+                for ligne in lignes_plan:
+                    click.echo(f"        {ligne}")
+            if scans:
+                echecs.append(nom)
+
+        for nom, table, requete in validateurs_critiques(id_utilisateur):
+            lignes_plan = plan(db.session, requete)
+            lectures = lectures_table(lignes_plan, table)
+            click.echo(f"{'ECHEC' if lectures else 'OK   '} {nom}")
+            if lectures or details:
+                for ligne in lignes_plan:
+                    click.echo(f"        {ligne}")
+            if lectures:
+                echecs.append(nom)
+    finally:
+        db.session.rollback()
+
+    if echecs:
+        click.echo(f"{len(echecs)} requête(s) sans l'index attendu : {', '.join(echecs)}")
+        raise SystemExit(1)
+    click.echo("Toutes les requêtes critiques utilisent un index")
+
+
+# (nom, URL, contrôleur, arguments) des listes dont le nombre de requêtes ne
+# doit pas dépendre du nombre de lignes
+LISTES_NPLUS1 = [
+    ("publications", "/api/publications/", "publication_controller.get_all_publications", ()),
+    ("publications paginées", "/api/publications/?limit=100", "publication_controller.get_all_publications", ()),
+    ("connexions plateformes", "/api/plateformes/", "utilisateur_plateforme_controller.get_user_plateformes", ()),
+    ("contenus", "/api/contenu/", "contenu_controller.get_all_contenus", ()),
+    ("historiques", "/api/historiques/", "historique_controller.get_all_historiques", ()),
+    ("export publications", "/api/export/publications", "export_controller.exporter", ("publications",)),
+]
+
+
+def _inserer_lot_nplus1(id_utilisateur, id_model, nb):
+    """nb contenus, publications, historiques et connexions (chacune sur sa propre plateforme)"""
+    import uuid
+    from sqlalchemy import insert
+    from app.models.contenu import Contenu
+    from app.models.publication import Publication
+    from app.models.historique import Historique, TypeActionEnum
+    from app.models.plateforme import PlateformeConfig, UtilisateurPlateforme
+
+    contenus = db.session.execute(insert(Contenu).returning(Contenu.id), [
+        {"id_utilisateur": id_utilisateur, "id_model": id_model, "titre": "fixture", "texte": "fixture"} for _ in range(nb)
+    ]).scalars().all()
+    db.session.execute(insert(Publication), [
+        {"id_utilisateur": id_utilisateur, "id_contenu": id_contenu, "titre_publication": "fixture"} for id_contenu in contenus
+    ])
+    db.session.execute(insert(Historique), [
+        {"id_utilisateur": id_utilisateur, "id_contenu": id_contenu, "type_action": list(TypeActionEnum)[0],
+         "description": "fixture"} for id_contenu in contenus
+    ])
+    plateformes = db.session.execute(insert(PlateformeConfig).returning(PlateformeConfig.id), [
+        {"nom": f"nplus1-{uuid.uuid4().hex[:12]}", "config": {}} for _ in range(nb)
+    ]).scalars().all()
+    db.session.execute(insert(UtilisateurPlateforme), [
+        {"utilisateur_id": id_utilisateur, "plateforme_id": id_plateforme} for id_plateforme in plateformes
+    ])
+    # Identity map vidée : un chargement paresseux doit réellement interroger la base
+    db.session.expunge_all()
+
+
+def _requetes_liste(app, url, controleur, arguments, token):
+    """Appelle le contrôleur comme la route (JWT en cookie) dans la session courante.
+    Retourne (statut HTTP, requêtes SQL exécutées, réponse en flux comprise)"""
+    import importlib
+    from flask_jwt_extended import verify_jwt_in_request
+    from app.utils.compteur_sql import CompteurRequetes
+
+    module, fonction = controleur.split(".")
+    appeler = getattr(importlib.import_module(f"app.controllers.{module}"), fonction)
+    cookie = f"{app.config['JWT_ACCESS_COOKIE_NAME']}={token}"
+    with app.test_request_context(url, headers={"Cookie": cookie}):
+        verify_jwt_in_request()
+        with CompteurRequetes(db.engine) as compteur:
+            reponse = app.make_response(appeler(*arguments))
+            reponse.get_data()
+            reponse.close()
+    return reponse.status_code, compteur.requetes
+
+
+@requetes_cli.command("nplus1")
+@click.option("--lignes", default=5, show_default=True, help="Lignes du premier jeu de données")
+@click.option("--facteur", default=4, show_default=True, help="Multiplicateur du second jeu")
+@click.option("--details", is_flag=True, help="Afficher les requêtes du second passage")
+def verifier_nplus1(lignes, facteur, details):
+    """Nombre de requêtes SQL des endpoints de liste à deux volumes de données.
+
+    Les contrôleurs sont appelés avec le JWT d'un utilisateur de fixture, dans la
+    transaction des fixtures (annulée à la fin). Code de sortie 1 si le nombre
+    de requêtes d'une liste augmente avec le nombre de lignes (chargement N+1).
+    """
+    from flask import current_app
+    from flask_jwt_extended import create_access_token
+    from app.models.utilisateur import Utilisateur
+    from app.models.modelIA import ModelIA
+
+    app = current_app._get_current_object()
+    echecs = []
+    try:
+        utilisateur = Utilisateur(nom="nplus1", email="nplus1@fixtures.invalid")
+        model = ModelIA(nom_model="nplus1", fournisseur="nplus1", api_endpoint="-")
+        db.session.add_all([utilisateur, model])
+        db.session.flush()
+        id_utilisateur, id_model = utilisateur.id, model.id
+        token = create_access_token(identity=str(id_utilisateur))
+
+        _inserer_lot_nplus1(id_utilisateur, id_model, lignes)
+        avant = {nom: _requetes_liste(app, url, controleur, arguments, token)
+                 for nom, url, controleur, arguments in LISTES_NPLUS1}
+
+        _inserer_lot_nplus1(id_utilisateur, id_model, lignes * (facteur - 1))
+        for nom, url, controleur, arguments in LISTES_NPLUS1:
+            statut, requetes = _requetes_liste(app, url, controleur, arguments, token)
+            statut_avant, requetes_avant = avant[nom]
+            ok = statut == statut_avant == 200 and len(requetes) == len(requetes_avant)
+            click.echo(f"{'OK   ' if ok else 'ECHEC'} {nom} : {len(requetes_avant)} -> {len(requetes)} requêtes "
+                       f"({lignes} -> {lignes * facteur} lignes, HTTP {statut})")
+            if details or not ok:
+                for requete in requetes:
+                    click.echo(f"        {' '.join(requete.split())[:140]}")
+            if not ok:
+                echecs.append(nom)
+    finally:
+        db.session.rollback()
+
+    if echecs:
+        click.echo(f"{len(echecs)} liste(s) dont le nombre de requêtes dépend du volume : {', '.join(echecs)}")
+        raise SystemExit(1)
+    click.echo("Nombre de requêtes constant sur toutes les listes")
+
+
+recherche_cli = AppGroup("recherche", help="Index de recherche plein texte")
+
+
+@recherche_cli.command("reindexer")
+def reindexer_recherche():
+    """Reconstruit l'index plein texte (FTS5 sous SQLite, tsvector sous PostgreSQL)"""
+    from app.services.recherche import recherche_service
+
+    click.echo(f"Moteur: {recherche_service.moteur}")
+    recherche_service.reindexer()
+    click.echo("Index reconstruit")
@@ -1,197 +1,266 @@
-from flask import request, jsonify
+from flask import request, jsonify, Response, stream_with_context, send_file
 from app.extensions import db
 from app.models.contenu import Contenu, TypeContenuEnum
 from app.models.prompt import Prompt
 from app.models.modelIA import ModelIA
 from app.models.template import Template
 from app.models.utilisateur import Utilisateur, TypeCompteEnum
+from app.models.generation_job import GenerationJob, StatutJobEnum
+from app.models.generation_usage import GenerationUsage
+from app.services.generation_jobs import generation_queue
+from app.services.providers import provider_registry
+from app.services.generation_cache import generation_cache, cle_generation
+from app.services.usage import construire_usage
+from app.services.single_flight import single_flight
+from app.services.blob_store import blob_store
+from app.services.image_derivatives import image_derivatives
+from app.services.image_transcoder import image_transcoder
+from app.utils.images import decoder_data_uri, detecter_mime
 from app.utils.identity import  get_identity
+from app.utils.fields import champs_demandes, charger_seulement
+from app.utils.pagination import lister
+from app.utils.etag import requete_validateur, etag_requetes, calculer_etag, non_modifie, avec_etag, reponse_non_modifiee
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
-import requests
-import os
-import re
+from sqlalchemy import func, insert, select
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import json
 import time
-from typing import Optional
+import os
+import io
 
 
-def is_valid_base64_image(content: str) -> bool:
-    """Vérifie si le contenu est une image base64 valide"""
-    if content.startswith("data:image/"):
-        return True
-    return len(content) > 100
+IMAGE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", 31536000))
 
 
-def extract_image_from_markdown(content: str) -> Optional[str]:
-    """Extrait une image base64 depuis un format markdown"""
-    patterns = [
-        r'!\[.*?\]\((data:image/[^)]+)\)',
-        r'\[.*?\]\((data:image/[^)]+)\)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, content)
-        if match:
-            return match.group(1)
-    return None
-
-
-def get_api_key(fournisseur: str):
-    """Récupère la clé API selon le fournisseur"""
-    api_keys = {
-        "gpt": "COMET_API_KEY",
-        "gemini": "COMET_API_KEY",
-        "gemini_flash": "COMET_API_KEY",
-    }
-    return os.getenv(api_keys.get(fournisseur.lower()))
+def call_model_api(model, prompt_text: str, temperature: float, max_tokens: int, images: list = None, fallback=None):
+    print(f" Appel: {model.fournisseur.lower()} - {model.nom_model}")
+    return provider_registry.appeler(model, prompt_text, temperature, max_tokens, images, fallback=fallback)
 
 
-def prepare_multimodal_content(prompt_text: str, images: list = None):
-    """Prépare le payload multimodal pour l'API"""
-    content = [{"type": "text", "text": prompt_text}] if prompt_text else []
-    
-    if images:
-        for img in images:
-            if "url" in img:
-                content.append({
-                    "type": "image_url",
-                    "image_url": {"url": img["url"]}
-                })
-            elif "base64" in img:
-                mime_type = img.get("mime_type", "image/jpeg")
-                content.append({
-                    "type": "image_url",
-                    "image_url": {"url": f"data:{mime_type};base64,{img['base64']}"}
-                })
-    
-    return content
+def stream_model_api(model, prompt_text: str, temperature: float, max_tokens: int, images: list = None):
+    print(f" Appel streaming: {model.fournisseur.lower()} - {model.nom_model}")
+    yield from provider_registry.stream(model, prompt_text, temperature, max_tokens, images)
 
 
-def call_gpt_api(prompt_text, api_key, model_name="gpt-3.5-turbo", 
-                 temperature=0.7, max_tokens=512):
-    url = "https://api.cometapi.com/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": model_name,
-        "messages": [{"role": "user", "content": prompt_text}],
-        "temperature": temperature,
-        "max_tokens": max_tokens
-    }
-    
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        return {"type": "text", "content": data["choices"][0]["message"]["content"]}
-    except Exception as e:
-        return {"type": "error", "content": f"Erreur OpenAI: {str(e)}"}
+def resultat_depuis_texte(model, content: str) -> dict:
+    """Résultat final d'un flux, interprété par l'adaptateur du fournisseur (images Gemini)"""
+    return provider_registry.resultat_final(model, content)
 
 
-def call_gemini_api(prompt_text, api_key, model_name="gemini-2.0-flash-exp",
-                    temperature=0.7, max_tokens=512, images=None):
-    """Appel API Gemini via Comet avec retry + détection image"""
-    url = 'https://api.cometapi.com/v1/chat/completions'
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    
-    if images and len(images) > 0:
-        content = prepare_multimodal_content(prompt_text, images)
-        messages = [{"role": "user", "content": content}]
+def modele_de_repli(model):
+    """ModelIA de repli configuré dans parametres_default['fallback_model_id'], s'il est actif"""
+    fallback_id = (model.parametres_default or {}).get("fallback_model_id")
+    if not fallback_id or fallback_id == model.id:
+        return None
+    fallback = ModelIA.query.get(fallback_id)
+    return fallback if fallback and fallback.actif else None
+
+
+def resoudre_generation(data: dict, ressources: dict = None):
+    """Résout modèle, template, prompt et paramètres d'une demande de génération.
+
+    `ressources` permet de fournir modèle, template et prompt déjà chargés
+    (génération par lot). Retourne (contexte, None) si tout est valide,
+    sinon (None, (réponse, code)).
+    """
+    ressources = ressources or {}
+
+    if not data.get("id_prompt") and not data.get("custom_prompt"):
+        return None, (jsonify({"error": "Soit 'id_prompt' soit 'custom_prompt' doit être fourni"}), 400)
+
+    required = ["id_model"]
+    missing = [f for f in required if f not in data]
+    if missing:
+        return None, (jsonify({"error": f"Champs manquants: {', '.join(missing)}"}), 400)
+
+    if "model" in ressources:
+        model = ressources["model"]
     else:
-        messages = [{"role": "user", "content": prompt_text}]
-    
-    payload = {
-        "model": model_name,
-        "messages": messages,
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-        "stream": False
-    }
-    
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            print(f" Tentative {attempt + 1}/{max_retries} - {model_name}")
-            
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
-            
-            if not response.text or response.text.strip() == "":
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    print(f" Réponse vide, retry dans {wait_time}s...")
-                    time.sleep(wait_time)
-                    continue
-                return {'type': 'error', 'content': 'Réponse vide de l\'API Gemini'}
-            
-            response.raise_for_status()
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-            
-            # Détection d'image markdown
-            markdown_image = extract_image_from_markdown(content)
-            if markdown_image:
-                print(f"Image markdown détectée")
-                return {"type": "image", "content": markdown_image}
-            
-            # Détection data URI
-            if content.startswith("data:image/"):
-                print(f" Data URI détectée")
-                return {"type": "image", "content": content}
-            
-            # Détection base64 brute
-            if len(content) > 50000 and is_valid_base64_image(content):
-                print(f"Image base64 brute détectée")
-                return {"type": "image", "content": f"data:image/png;base64,{content}"}
-            
-            # Détection URL d'image
-            if content.startswith("http") and any(ext in content.lower() for ext in ['.jpg', '.png', '.jpeg', '.webp', '.gif']):
-                print(f" URL d'image détectée")
-                return {"type": "image", "content": content}
-            
-            return {"type": "text", "content": content}
-            
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code in [503, 429] and attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"⏳ HTTP {e.response.status_code}, retry dans {wait_time}s...")
-                time.sleep(wait_time)
-                continue
-            
-            error_text = e.response.text if hasattr(e.response, 'text') else str(e)
-            return {'type': 'error', 'content': f"Erreur Gemini HTTP {e.response.status_code}: {error_text}"}
-            
-        except ValueError as e:
-            print(f"❌ Erreur JSON: {str(e)}")
-            if attempt < max_retries - 1:
-                time.sleep(2 ** attempt)
-                continue
-            return {'type': 'error', 'content': f"Réponse invalide: {response.text[:200]}"}
-            
-        except Exception as e:
-            return {'type': 'error', 'content': f"Erreur Gemini: {str(e)}"}
-    
-    return {'type': 'error',    'content': "Service Gemini indisponible après 3 tentatives"}
+        model = ModelIA.query.get(data["id_model"])
 
+    if "template" in ressources:
+        template = ressources["template"]
+    else:
+        template = Template.query.get(data.get("id_template")) if data.get("id_template") else None
 
-def call_model_api(model, prompt_text: str, temperature: float, max_tokens: int, images: list = None):
-    fournisseur = model.fournisseur.lower()
-    print(f" Appel: {fournisseur} - {model.nom_model}")
+    if not model:
+        return None, (jsonify({"error": "Modèle introuvable"}), 404)
 
-    api_key = get_api_key(fournisseur)
-    if not api_key:
-        return {"type": "error", "content": f"Clé API manquante pour {fournisseur}"}
+    prompt_text = ""
+    id_prompt_used = None
+    prompt_custom_used = None
 
-    if fournisseur == "gpt":
-        return call_gpt_api(prompt_text, api_key, model.nom_model, temperature, max_tokens)
-    elif fournisseur in ["gemini", "gemini_flash"]:
-        return call_gemini_api(prompt_text, api_key, model.nom_model, temperature, max_tokens, images)
+    if data.get("id_prompt"):
+        prompt = ressources["prompt"] if "prompt" in ressources else Prompt.query.get(data["id_prompt"])
+        if not prompt:
+            return None, (jsonify({"error": "Prompt introuvable"}), 404)
+        
+        prompt_text = prompt.texte_prompt
+        id_prompt_used = data["id_prompt"]
+        
+        temperature = (prompt.parametres or {}).get("temperature") or model.parametres_default.get("temperature", 0.7)
+        max_tokens = (prompt.parametres or {}).get("max_tokens") or model.parametres_default.get("max_tokens", 512)
+        
     else:
-        return {"type": "error", "content": f"Fournisseur inconnu: {fournisseur}"}
+        prompt_text = data["custom_prompt"]
+        prompt_custom_used = data["custom_prompt"]
+        
+        temperature = model.parametres_default.get("temperature", 0.7)
+        max_tokens = model.parametres_default.get("max_tokens", 512)
+
+    if template:
+        prompt_text = template.structure.replace("{{prompt}}", prompt_text)
+
+    for variable, valeur in (data.get("variables") or {}).items():
+        prompt_text = prompt_text.replace("{{" + variable + "}}", str(valeur))
+
+    images = data.get("images", [])
+
+    return {
+        "model": model,
+        "template": template,
+        "prompt_text": prompt_text,
+        "id_prompt": id_prompt_used,
+        "custom_prompt": prompt_custom_used,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "images": images,
+        "cle": cle_generation(model.id, prompt_text, temperature, max_tokens, images),
+        "fallback": ressources["fallback"] if "fallback" in ressources else modele_de_repli(model),
+    }, None
+
+
+def generer_resultat(contexte: dict, bypass_cache: bool = False, soumis_a: float = None) -> dict:
+    """call_model_api précédé du cache de génération (opt-in via GENERATION_CACHE_ENABLED).
+
+    Le résultat porte latence_ms (durée totale) et, si `soumis_a` (perf_counter
+    au moment de la mise en file) est fourni, attente_ms.
+    """
+    debut = time.perf_counter()
+    resultat = _generer_resultat(contexte, bypass_cache)
+    resultat["latence_ms"] = int((time.perf_counter() - debut) * 1000)
+    if soumis_a is not None:
+        resultat["attente_ms"] = int((debut - soumis_a) * 1000)
+    return resultat
+
+
+def _generer_resultat(contexte: dict, bypass_cache: bool) -> dict:
+    def appel():
+        # Les demandes identiques simultanées partagent un seul appel au fournisseur
+        return single_flight.executer(contexte["cle"], lambda: call_model_api(
+            contexte["model"], contexte["prompt_text"], contexte["temperature"],
+            contexte["max_tokens"], contexte["images"], fallback=contexte.get("fallback")
+        ))
+
+    if not generation_cache.active:
+        return appel()
+
+    if bypass_cache:
+        generation_cache.compter_bypass()
+    else:
+        resultat = generation_cache.get(contexte["cle"])
+        if resultat:
+            print(f" Cache hit: {contexte['cle'][:12]}")
+            resultat["cache_hit"] = True
+            return resultat
+
+    resultat = appel()
+    if resultat["type"] != "error":
+        generation_cache.set(contexte["cle"], resultat)
+    return resultat
+
+
+def construire_contenu(current_user, data: dict, contexte: dict, resultat: dict):
+    """Construit la ligne Contenu (non ajoutée à la session) à partir du résultat du modèle"""
+    model = contexte["model"]
+    prompt_text = contexte["prompt_text"]
+    images = contexte["images"]
+    has_images = len(images) > 0
+
+    image_blob = {}
+    ingestion = None
+    if resultat["type"] == "image":
+        type_contenu = TypeContenuEnum.image
+        image_url = resultat["content"] 
+        text_content = None
+        if image_url.startswith("data:"):
+            try:
+                mime, octets = decoder_data_uri(image_url)
+                octets, mime, ingestion = image_transcoder.transcoder(octets, mime)
+                image_blob = blob_store.enregistrer(octets, mime)
+                image_derivatives.planifier(image_blob["image_hash"])
+                image_url = None
+                print(
+                    f" IMAGE stockée: {image_blob['image_hash'][:12]} "
+                    f"({ingestion['octets_origine']} -> {ingestion['octets']} octets, {ingestion['mime']})"
+                )
+            except ValueError as e:
+                print(f" Image non décodable, conservée en base64: {str(e)}")
+        
+    elif resultat["type"] == "text":
+        type_contenu = TypeContenuEnum.multimodal if has_images else TypeContenuEnum.text
+        text_content = resultat["content"]
+        image_url = None
+        print(f"{type_contenu.value.upper()}")
+    else:
+        type_contenu = TypeContenuEnum.text
+        text_content = resultat["content"]
+        image_url = None
+
+    contenu_structure = None
+    if type_contenu == TypeContenuEnum.multimodal:
+        contenu_structure = {
+            "blocs": [{"type": "text", "contenu": prompt_text, "role": "input"}]
+        }
+        for idx, img in enumerate(images):
+            contenu_structure["blocs"].append({
+                "type": "image",
+                "url": img.get("url"),
+                "description": f"Image {idx + 1}",
+                "role": "input"
+            })
+        contenu_structure["blocs"].append({
+            "type": "text",
+            "contenu": resultat["content"],
+            "role": "output"
+        })
+
+    return Contenu(
+        id_utilisateur=current_user.id,
+        id_prompt=contexte["id_prompt"],
+        custom_prompt=contexte["custom_prompt"],
+        id_model=model.id,
+        id_template=data.get("id_template"),
+        titre=data.get("titre", "Contenu généré"),
+        type_contenu=type_contenu,
+        texte=text_content if type_contenu in [TypeContenuEnum.text, TypeContenuEnum.multimodal] else None,
+        image_url=image_url,  
+        **image_blob,
+        contenu_structure=contenu_structure,
+        meta={
+            "source": model.nom_model,
+            "date": str(datetime.utcnow()),
+            "has_images": has_images,
+            "image_count": len(images),
+            "detected_type": resultat["type"],
+            "cache_hit": resultat.get("cache_hit", False),
+            **({"image_ingestion": ingestion} if ingestion else {})
+        }
+    )
+
+
+def contenu_genere_payload(contenu: Contenu) -> dict:
+    """Réponse renvoyée au client après une génération"""
+    return {
+        "message": "Contenu généré avec succès",
+        "contenu": contenu.texte,
+        "type": contenu.type_contenu.value,
+        "id": contenu.id,
+        "structure": contenu.contenu_structure,
+        "image_url": contenu.url_image()
+    }
 
 
 def generer_contenu():
@@ -202,126 +271,378 @@ def generer_contenu():
         return jsonify({"error": "Utilisateur non trouvé"}), 404
 
     data = request.get_json()
-    
-    if not data.get("id_prompt") and not data.get("custom_prompt"):
-        return jsonify({"error": "Soit 'id_prompt' soit 'custom_prompt' doit être fourni"}), 400
 
-    required = ["id_model"]
-    missing = [f for f in required if f not in data]
-    if missing:
-        return jsonify({"error": f"Champs manquants: {', '.join(missing)}"}), 400
+    try:
+        contexte, erreur = resoudre_generation(data)
+        if erreur:
+            return erreur
+
+        resultat = generer_resultat(contexte, bypass_cache=bool(data.get("bypass_cache")))
+        print(f" Résultat: type={resultat['type']}, taille={len(resultat.get('content', ''))}")
+
+        if resultat["type"] == "error":
+            db.session.add(construire_usage(current_user.id, contexte, resultat))
+            db.session.commit()
+            return jsonify({"error": resultat["content"]}), 500
+
+        contenu = construire_contenu(current_user, data, contexte, resultat)
+        
+        db.session.add(contenu)
+        db.session.flush()
+        db.session.add(construire_usage(current_user.id, contexte, resultat, id_contenu=contenu.id))
+        db.session.commit()
+
+        return jsonify(contenu_genere_payload(contenu)), 201
+
+    except Exception as e:
+        db.session.rollback()
+        print(f" Erreur génération: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def _ligne_contenu(contenu: Contenu) -> dict:
+    """Valeurs de colonnes d'un Contenu transitoire, pour un INSERT groupé"""
+    return {
+        colonne.key: getattr(contenu, colonne.key)
+        for colonne in Contenu.__table__.columns
+        if colonne.key != "id"
+    }
+
+
+def _ligne_usage(usage: GenerationUsage) -> dict:
+    ligne = {
+        colonne.key: getattr(usage, colonne.key)
+        for colonne in GenerationUsage.__table__.columns
+        if colonne.key != "id"
+    }
+    ligne["date_creation"] = datetime.utcnow()
+    return ligne
+
+
+def generer_contenus_batch():
+    """Génère plusieurs variantes en un appel : modèle, template et prompt sont
+    résolus une seule fois, les appels au modèle partent en parallèle (borné)
+    et tous les Contenu sont insérés en une seule requête."""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    data = request.get_json() or {}
+    items = data.get("items")
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Champ 'items' manquant ou vide"}), 400
+
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", 100))
+    if len(items) > max_items:
+        return jsonify({"error": f"Maximum {max_items} éléments par lot"}), 400
+
+    if "id_model" not in data:
+        return jsonify({"error": "Champs manquants: id_model"}), 400
 
     try:
         model = ModelIA.query.get(data["id_model"])
-        template = Template.query.get(data.get("id_template")) if data.get("id_template") else None
-
         if not model:
             return jsonify({"error": "Modèle introuvable"}), 404
 
-        prompt_text = ""
-        id_prompt_used = None
-        prompt_custom_used = None
-
+        ressources = {
+            "model": model,
+            "template": Template.query.get(data["id_template"]) if data.get("id_template") else None,
+            "fallback": modele_de_repli(model),
+        }
         if data.get("id_prompt"):
-            prompt = Prompt.query.get(data["id_prompt"])
-            if not prompt:
+            ressources["prompt"] = Prompt.query.get(data["id_prompt"])
+            if not ressources["prompt"]:
                 return jsonify({"error": "Prompt introuvable"}), 404
-            
-            prompt_text = prompt.texte_prompt
-            id_prompt_used = data["id_prompt"]
-            
-            temperature = (prompt.parametres or {}).get("temperature") or model.parametres_default.get("temperature", 0.7)
-            max_tokens = (prompt.parametres or {}).get("max_tokens") or model.parametres_default.get("max_tokens", 512)
-            
+
+        base = {k: v for k, v in data.items() if k not in ["items", "parallelisme"]}
+        resultats = [None] * len(items)
+        a_generer = []
+
+        for index, item in enumerate(items):
+            item_data = {**base, **item}
+            if item.get("custom_prompt"):
+                item_data.pop("id_prompt", None)
+            contexte, erreur = resoudre_generation(item_data, ressources)
+            if erreur:
+                resultats[index] = {"index": index, "statut": "erreur", "error": erreur[0].get_json().get("error")}
+            else:
+                a_generer.append((index, item_data, contexte))
+
+        parallelisme = max(1, min(
+            int(data.get("parallelisme", 4)),
+            int(os.getenv("BATCH_MAX_PARALLELISME", 8)),
+            len(a_generer) or 1
+        ))
+
+        generes = []
+        usages = []
+        with ThreadPoolExecutor(max_workers=parallelisme, thread_name_prefix="batch") as executor:
+            soumis_a = time.perf_counter()
+            futures = {
+                executor.submit(generer_resultat, contexte, bool(item_data.get("bypass_cache")), soumis_a): (index, item_data, contexte)
+                for index, item_data, contexte in a_generer
+            }
+            for future in as_completed(futures):
+                index, item_data, contexte = futures[future]
+                try:
+                    resultat = future.result()
+                except Exception as e:
+                    resultat = {"type": "error", "content": str(e)}
+
+                if resultat["type"] == "error":
+                    resultats[index] = {"index": index, "statut": "erreur", "error": resultat["content"]}
+                    usages.append((None, construire_usage(current_user.id, contexte, resultat, mode="lot")))
+                else:
+                    generes.append((index, construire_contenu(current_user, item_data, contexte, resultat)))
+                    usages.append((index, construire_usage(current_user.id, contexte, resultat, mode="lot")))
+
+        generes.sort(key=lambda g: g[0])
+        if generes:
+            maintenant = datetime.utcnow()
+            lignes = []
+            for _, contenu in generes:
+                ligne = _ligne_contenu(contenu)
+                ligne["date_creation"] = maintenant
+                lignes.append(ligne)
+
+            ids = db.session.scalars(
+                insert(Contenu).returning(Contenu.id, sort_by_parameter_order=True),
+                lignes
+            ).all()
+            ids_par_index = {index: contenu_id for (index, _), contenu_id in zip(generes, ids)}
         else:
-            prompt_text = data["custom_prompt"]
-            prompt_custom_used = data["custom_prompt"]
-            
-            temperature = model.parametres_default.get("temperature", 0.7)
-            max_tokens = model.parametres_default.get("max_tokens", 512)
+            ids_par_index = {}
+
+        if usages:
+            lignes_usage = []
+            for index, usage in usages:
+                usage.id_contenu = ids_par_index.get(index)
+                lignes_usage.append(_ligne_usage(usage))
+            db.session.execute(insert(GenerationUsage), lignes_usage)
+        db.session.commit()
 
-        if template:
-            prompt_text = template.structure.replace("{{prompt}}", prompt_text)
+        for index, contenu in generes:
+            contenu.id = ids_par_index[index]
+            resultats[index] = {
+                "index": index,
+                "statut": "ok",
+                "id": contenu.id,
+                "type": contenu.type_contenu.value,
+                "contenu": contenu.texte,
+                "image_url": contenu.url_image()
+            }
 
-        images = data.get("images", [])
-        has_images = len(images) > 0
+        succes = len(generes)
+        return jsonify({
+            "message": f"{succes}/{len(items)} contenus générés",
+            "total": len(items),
+            "succes": succes,
+            "echecs": len(items) - succes,
+            "resultats": resultats
+        }), 201 if succes else 502
 
-        resultat = call_model_api(model, prompt_text, temperature, max_tokens, images)
-        print(f" Résultat: type={resultat['type']}, taille={len(resultat.get('content', ''))}")
+    except Exception as e:
+        db.session.rollback()
+        print(f" Erreur génération par lot: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
-        if resultat["type"] == "error":
-            return jsonify({"error": resultat["content"]}), 500
 
-        if resultat["type"] == "image":
-            type_contenu = TypeContenuEnum.image
-            image_url = resultat["content"] 
-            text_content = None
-            print(f" IMAGE stockée en base64")
-            
-        elif resultat["type"] == "text":
-            type_contenu = TypeContenuEnum.multimodal if has_images else TypeContenuEnum.text
-            text_content = resultat["content"]
-            image_url = None
-            print(f"{type_contenu.value.upper()}")
-        else:
-            type_contenu = TypeContenuEnum.text
-            text_content = resultat["content"]
-            image_url = None
-
-        contenu_structure = None
-        if type_contenu == TypeContenuEnum.multimodal:
-            contenu_structure = {
-                "blocs": [{"type": "text", "contenu": prompt_text, "role": "input"}]
-            }
-            for idx, img in enumerate(images):
-                contenu_structure["blocs"].append({
-                    "type": "image",
-                    "url": img.get("url"),
-                    "description": f"Image {idx + 1}",
-                    "role": "input"
-                })
-            contenu_structure["blocs"].append({
-                "type": "text",
-                "contenu": resultat["content"],
-                "role": "output"
-            })
+def _evenement_sse(evenement: str, donnees: dict) -> str:
+    return f"event: {evenement}\ndata: {json.dumps(donnees, ensure_ascii=False)}\n\n"
 
-        contenu = Contenu(
-            id_utilisateur=current_user.id,
-            id_prompt=id_prompt_used,
-            custom_prompt=prompt_custom_used,
-            id_model=data["id_model"],
-            id_template=data.get("id_template"),
-            titre=data.get("titre", "Contenu généré"),
-            type_contenu=type_contenu,
-            texte=text_content if type_contenu in [TypeContenuEnum.text, TypeContenuEnum.multimodal] else None,
-            image_url=image_url,  
-            contenu_structure=contenu_structure,
-            meta={
-                "source": model.nom_model,
-                "date": str(datetime.utcnow()),
-                "has_images": has_images,
-                "image_count": len(images),
-                "detected_type": resultat["type"]
-            }
-        )
-        
-        db.session.add(contenu)
+
+def generer_contenu_stream():
+    """Variante streaming de generer_contenu : les fragments du modèle sont relayés
+    en Server-Sent Events et le Contenu n'est enregistré qu'une fois le flux terminé."""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    data = request.get_json()
+
+    contexte, erreur = resoudre_generation(data)
+    if erreur:
+        return erreur
+
+    def evenements():
+        fragments = []
+        usage = None
+        debut = time.perf_counter()
+        try:
+            for fragment in stream_model_api(
+                contexte["model"], contexte["prompt_text"], contexte["temperature"],
+                contexte["max_tokens"], contexte["images"]
+            ):
+                if fragment["type"] == "usage":
+                    usage = fragment["usage"]
+                    continue
+                if fragment["type"] == "error":
+                    fragment["latence_ms"] = int((time.perf_counter() - debut) * 1000)
+                    db.session.add(construire_usage(current_user.id, contexte, fragment, mode="stream"))
+                    db.session.commit()
+                    yield _evenement_sse("error", {"error": fragment["content"]})
+                    return
+                fragments.append(fragment["content"])
+                yield _evenement_sse("token", {"content": fragment["content"]})
+
+            resultat = resultat_depuis_texte(contexte["model"], "".join(fragments))
+            resultat["usage"] = usage
+            resultat["latence_ms"] = int((time.perf_counter() - debut) * 1000)
+            contenu = construire_contenu(current_user, data, contexte, resultat)
+            db.session.add(contenu)
+            db.session.flush()
+            db.session.add(construire_usage(current_user.id, contexte, resultat, mode="stream", id_contenu=contenu.id))
+            db.session.commit()
+
+            yield _evenement_sse("done", contenu_genere_payload(contenu))
+
+        except Exception as e:
+            db.session.rollback()
+            print(f" Erreur génération streaming: {str(e)}")
+            yield _evenement_sse("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(evenements()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def creer_job_generation():
+    """Enregistre une demande de génération et rend la main immédiatement (202)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    data = request.get_json()
+
+    try:
+        contexte, erreur = resoudre_generation(data)
+        if erreur:
+            return erreur
+
+        if generation_queue.est_pleine():
+            return jsonify({"error": "File de génération saturée, réessayez plus tard"}), 503, {"Retry-After": "5"}
+
+        job = GenerationJob(id_utilisateur=current_user.id, payload=data, bail_expire=generation_queue.nouveau_bail())
+        db.session.add(job)
         db.session.commit()
 
+        generation_queue.soumettre(job.id)
+
         return jsonify({
-            "message": "Contenu généré avec succès",
-            "contenu": text_content,
-            "type": type_contenu.value,
-            "id": contenu.id,
-            "structure": contenu_structure,
-            "image_url": image_url  
-        }), 201
+            "message": "Génération en file d'attente",
+            "job": job.to_dict()
+        }), 202, {"Location": f"/api/contenu/jobs/{job.id}", "Retry-After": "2"}
 
-    except Exception as e:
+    except SQLAlchemyError as e:
         db.session.rollback()
-        print(f" Erreur génération: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": f"Erreur de base de données: {str(e)}"}), 500
+
+
+def get_job_generation(job_id):
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    job = GenerationJob.query.get(job_id)
+    if not job:
+        return jsonify({"error": "Job introuvable"}), 404
+
+    if job.id_utilisateur != current_user_id and current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Non autorisé"}), 403
+
+    if job.statut in [StatutJobEnum.en_attente, StatutJobEnum.en_cours]:
+        return jsonify(job.to_dict()), 200, {"Retry-After": "2"}
+    return jsonify(job.to_dict()), 200
+
+
+def get_stats_jobs():
+    """Profondeur de file et temps moyens des jobs (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    par_statut = dict(
+        db.session.query(GenerationJob.statut, func.count(GenerationJob.id))
+        .group_by(GenerationJob.statut).all()
+    )
+
+    termines = GenerationJob.query.filter(
+        GenerationJob.statut == StatutJobEnum.termine
+    ).order_by(GenerationJob.date_fin.desc()).limit(100).all()
+    attentes = [j.duree_attente_ms() for j in termines]
+    executions = [j.duree_execution_ms() for j in termines]
+
+    return jsonify({
+        "par_statut": {statut.value: par_statut.get(statut, 0) for statut in StatutJobEnum},
+        "profondeur_file": par_statut.get(StatutJobEnum.en_attente, 0),
+        "file_locale": generation_queue.profondeur(),
+        "workers": generation_queue.max_workers,
+        "attente_moyenne_ms": int(sum(attentes) / len(attentes)) if attentes else None,
+        "execution_moyenne_ms": int(sum(executions) / len(executions)) if executions else None,
+    }), 200
+
+
+def get_stats_cache():
+    """Compteurs du cache de génération (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    return jsonify(generation_cache.stats()), 200
+
+
+def get_stats_coalescence():
+    """Compteurs des appels identiques fusionnés (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    return jsonify(single_flight.stats()), 200
+
+
+def get_stats_images():
+    """État du pipeline d'images : transcodage à l'ingestion et miniatures (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    return jsonify({**image_derivatives.stats(), "ingestion": image_transcoder.stats()}), 200
+
+
+def vider_cache():
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    generation_cache.vider()
+    return jsonify({"message": "Cache de génération vidé"}), 200
+
+
+def validateurs_contenus(id_utilisateur=None):
+    """Requêtes de validation ETag de la liste (id_utilisateur None : vue admin)"""
+    filtres = [Contenu.id_utilisateur == id_utilisateur] if id_utilisateur is not None else []
+    return [requete_validateur(Contenu, Contenu.date_modification, *filtres)]
 
 
 def get_all_contenus():
@@ -331,66 +652,134 @@ def get_all_contenus():
     if not current_user:
         return jsonify({"error": "Utilisateur non trouvé"}), 404
 
-    if current_user.type_compte == TypeCompteEnum.admin:
-        contenus = Contenu.query.all()
-    else:
-        contenus = Contenu.query.filter_by(id_utilisateur=current_user_id).all()
-
-    data = [{
-        "id": c.id,
-        "id_utilisateur": c.id_utilisateur,
-        "id_projet": c.id_projet,
-        "id_prompt": c.id_prompt,
-        "custom_prompt": c.custom_prompt,
-        "id_model": c.id_model,
-        "id_template": c.id_template,
-        "titre": c.titre,
-        "type_contenu": c.type_contenu.value,
-        "texte": c.texte,
-        "image_url": c.image_url,  # Le base64 sera retourné tel quel
-        "contenu_structure": c.contenu_structure,
-        "meta": c.meta,
-        "date_creation": c.date_creation.isoformat()
-    } for c in contenus]
-    
-    return jsonify(data), 200
+    try:
+        champs = champs_demandes(Contenu.CHAMPS_API)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # 304 sans charger ni sérialiser une seule ligne si rien n'a changé
+    perimetre = None if current_user.type_compte == TypeCompteEnum.admin else current_user_id
+    etag = etag_requetes(current_user_id, *validateurs_contenus(perimetre))
+    if non_modifie(etag):
+        return reponse_non_modifiee(etag)
+
+    query = Contenu.query
+    if champs:
+        query = query.options(charger_seulement(Contenu, champs | {"date_creation"}, Contenu.CHAMPS_API))
+
+    if current_user.type_compte != TypeCompteEnum.admin:
+        query = query.filter_by(id_utilisateur=current_user_id)
+
+    try:
+        return avec_etag(lister(query, Contenu.date_creation, Contenu.id, lambda c: c.to_dict(champs)), etag), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 def get_contenu_by_id(contenu_id):
-    print(f"contenuId: {contenu_id}")
     current_user_id = get_identity()
     current_user = Utilisateur.query.get(current_user_id)
-    print(f"current_user: {current_user}")
-    print(f'class:{type(current_user.type_compte)} : value {current_user.type_compte}")')
     if not current_user:
         return jsonify({"error": "Utilisateur non trouvé"}), 404
-        
-    contenu = Contenu.query.get(contenu_id)
+
+    try:
+        champs = champs_demandes(Contenu.CHAMPS_API)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Validateur : date de modification de la ligne, lue avec le propriétaire (accès vérifié avant le 304)
+    ligne = db.session.execute(
+        select(Contenu.id_utilisateur, Contenu.date_modification).where(Contenu.id == contenu_id)
+    ).first()
+    if not ligne:
+        return jsonify({"error": "Contenu introuvable"}), 404
+    if ligne.id_utilisateur != current_user_id and current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Non autorisé"}), 403
+
+    etag = calculer_etag(current_user_id, ligne.date_modification)
+    if non_modifie(etag):
+        return reponse_non_modifiee(etag)
+
+    query = Contenu.query
+    if champs:
+        query = query.options(charger_seulement(Contenu, champs, Contenu.CHAMPS_API))
+
+    contenu = query.get(contenu_id)
     if not contenu:
         return jsonify({"error": "Contenu introuvable"}), 404
-        
-    if contenu.id_utilisateur != current_user_id and current_user.type_compte != TypeCompteEnum.admin:
-        print(f"current_user.type_compte: {current_user.type_compte}")
-        print(f"contenu.id: {contenu.id_utilisateur}, current_user.id: {current_user.id}")
-        print(f"class: {type(contenu.id_utilisateur)} vs {type(current_user_id)}")
+
+    return avec_etag(jsonify(contenu.to_dict(champs)), etag), 200
+
+
+def get_contenu_image(contenu_id):
+    """Sert l'image binaire d'un contenu.
+
+    ETag fort = empreinte SHA-256 ; l'URL publiée porte la version (?v=) donc
+    la réponse est immuable côté navigateur. send_file gère 304 et Range, et
+    délègue l'envoi au serveur WSGI (sendfile) ou au proxy (USE_X_SENDFILE).
+    """
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    # Colonnes légères seulement : l'ancien base64 n'est chargé qu'en repli
+    ligne = db.session.query(
+        Contenu.id_utilisateur, Contenu.image_hash, Contenu.image_mime
+    ).filter(Contenu.id == contenu_id).first()
+    if not ligne:
+        return jsonify({"error": "Contenu introuvable"}), 404
+
+    if ligne.id_utilisateur != current_user_id and current_user.type_compte != TypeCompteEnum.admin:
         return jsonify({"error": "Non autorisé"}), 403
 
-    return jsonify({
-        "id": contenu.id,
-        "id_utilisateur": contenu.id_utilisateur,
-        "id_projet": contenu.id_projet,
-        "id_prompt": contenu.id_prompt,
-        "custom_prompt": contenu.custom_prompt,
-        "id_model": contenu.id_model,
-        "id_template": contenu.id_template,
-        "titre": contenu.titre,
-        "type_contenu": contenu.type_contenu.value,
-        "texte": contenu.texte,
-        "image_url": contenu.image_url,  
-        "contenu_structure": contenu.contenu_structure,
-        "meta": contenu.meta,
-        "date_creation": contenu.date_creation.isoformat()
-    }), 200
+    variante = request.args.get("variante")
+    if variante and variante not in image_derivatives.variantes:
+        return jsonify({"error": f"Variante inconnue: {variante}"}), 400
+
+    if ligne.image_hash:
+        if not blob_store.existe(ligne.image_hash):
+            return jsonify({"error": "Image introuvable"}), 404
+
+        if variante and image_derivatives.existe(ligne.image_hash, variante):
+            chemin, mimetype, etag = image_derivatives.chemin(ligne.image_hash, variante), "image/webp", f"{ligne.image_hash}-{variante}"
+        else:
+            chemin, mimetype, etag = blob_store.chemin(ligne.image_hash), ligne.image_mime, ligne.image_hash
+            if variante:
+                # Dérivé pas encore prêt : on sert l'original sans le figer en cache
+                image_derivatives.planifier(ligne.image_hash)
+
+        reponse = send_file(chemin, mimetype=mimetype, etag=etag, conditional=True, max_age=IMAGE_MAX_AGE)
+        reponse.cache_control.private = True
+        reponse.cache_control.public = False
+        if variante and etag == ligne.image_hash:
+            reponse.cache_control.max_age = 0
+            reponse.cache_control.no_cache = True
+        else:
+            reponse.cache_control.immutable = True
+        reponse.headers["Accept-Ranges"] = "bytes"
+        return reponse
+
+    # Contenus antérieurs au stockage par empreinte : data URI décodée en mémoire
+    image_url = db.session.query(Contenu.image_url).filter(Contenu.id == contenu_id).scalar()
+    if not image_url or not image_url.startswith("data:"):
+        return jsonify({"error": "Image introuvable"}), 404
+
+    try:
+        mime, octets = decoder_data_uri(image_url)
+    except ValueError as e:
+        return jsonify({"error": f"Image invalide: {str(e)}"}), 500
+
+    reponse = send_file(
+        io.BytesIO(octets),
+        mimetype=detecter_mime(octets) or mime,
+        etag=hashlib.sha256(octets).hexdigest(),
+        conditional=True,
+    )
+    reponse.cache_control.private = True
+    reponse.cache_control.no_cache = True
+    return reponse
 
 
 def update_contenu(contenu_id):
@@ -413,8 +802,23 @@ def update_contenu(contenu_id):
             contenu.titre = data["titre"]
         if "texte" in data:
             contenu.texte = data["texte"]
-        if "image_url" in data:
-            contenu.image_url = data["image_url"]
+        if "image_url" in data and data["image_url"] != contenu.url_image():
+            image_url = data["image_url"]
+            image_blob = dict.fromkeys(["image_hash", "image_mime", "image_largeur", "image_hauteur", "image_taille"])
+            if image_url and image_url.startswith("data:"):
+                try:
+                    image_blob = blob_store.enregistrer_data_uri(image_url)
+                    if image_blob["image_mime"].startswith("video/"):
+                        # Vidéo stockée comme une image, publiable sur X par upload par morceaux
+                        contenu.type_contenu = TypeContenuEnum.video
+                    else:
+                        image_derivatives.planifier(image_blob["image_hash"])
+                    image_url = None
+                except ValueError as e:
+                    return jsonify({"error": f"Image invalide: {str(e)}"}), 400
+            contenu.image_url = image_url
+            for colonne, valeur in image_blob.items():
+                setattr(contenu, colonne, valeur)
         if "contenu_structure" in data:
             contenu.contenu_structure = data["contenu_structure"]
         if "meta" in data:
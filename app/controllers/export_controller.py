@@ -0,0 +1,71 @@
+from flask import request, jsonify
+from app.models.utilisateur import Utilisateur, TypeCompteEnum
+from app.models.contenu import Contenu
+from app.models.publication import Publication
+from app.models.historique import Historique
+from app.utils.identity import  get_identity
+from app.utils.pagination import ordre_tri, date_parametre
+from app.utils.serialisation import reponse_ndjson, serialiseur, TAILLE_LOT
+from datetime import datetime
+
+
+# type -> (modèle, colonne de date filtrée et triée, champs exportés)
+# La relation "contenu" des publications est exclue : une requête par ligne sinon
+EXPORTS = {
+    "contenus": (Contenu, Contenu.date_creation, None),
+    "publications": (Publication, Publication.date_creation, serialiseur(Publication).noms - {"contenu"}),
+    "historiques": (Historique, Historique.date_action, None),
+}
+
+
+def _gzip_demande():
+    """?gzip=1|0 prioritaire, sinon négociation sur Accept-Encoding"""
+    gzip = request.args.get("gzip")
+    if gzip is not None:
+        return gzip.lower() in ["1", "true", "oui"]
+    return "gzip" in request.headers.get("Accept-Encoding", "").lower()
+
+
+def exporter(type_export):
+    """Export NDJSON d'une table : ?id_utilisateur=&date_debut=&date_fin=&gzip=
+
+    Lignes lues par lots (yield_per : curseur serveur sous PostgreSQL) et écrites
+    au fil de l'eau : la mémoire du worker reste constante quelle que soit la
+    taille de la table. Tri par (date, id) croissant, servi par les index.
+    Un utilisateur n'exporte que ses données ; un admin tout, ou un utilisateur.
+    """
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    if type_export not in EXPORTS:
+        return jsonify({"error": f"Type d'export invalide (valeurs: {', '.join(EXPORTS)})"}), 400
+    model, colonne_date, champs = EXPORTS[type_export]
+
+    id_utilisateur = request.args.get("id_utilisateur", type=int)
+    if current_user.type_compte != TypeCompteEnum.admin:
+        if id_utilisateur is not None and id_utilisateur != current_user.id:
+            return jsonify({"error": "non autorisé"}), 403
+        id_utilisateur = current_user.id
+
+    try:
+        debut = date_parametre("date_debut")
+        fin = date_parametre("date_fin")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = model.query
+    if id_utilisateur is not None:
+        query = query.filter(model.id_utilisateur == id_utilisateur)
+    if debut:
+        query = query.filter(colonne_date >= debut)
+    if fin:
+        query = query.filter(colonne_date < fin)
+    query = query.order_by(*ordre_tri(colonne_date, model.id, descendant=False)).yield_per(TAILLE_LOT)
+
+    serialiser = serialiseur(model)
+    gzip = _gzip_demande()
+    nom_fichier = f"{type_export}-{datetime.utcnow():%Y%m%d-%H%M%S}.ndjson"
+    return reponse_ndjson(query, lambda objet: serialiser(objet, champs), gzip=gzip, nom_fichier=nom_fichier)
@@ -5,7 +5,9 @@ from app.models.prompt import Prompt
 from app.models.modelIA import ModelIA
 from app.models.template import Template
 from app.models.utilisateur import Utilisateur, TypeCompteEnum
-from app.utils.identity import  get_identityfrom datetime import datetime
+from app.utils.identity import  get_identity
+from app.services.providers import provider_registry
+from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
 import requests
 import os
@@ -34,21 +36,6 @@ def get_gpt4all_instance():
     return _gpt4all_instance
 
 
-def get_api_key(fournisseur: str):
-    """Récupère la clé API selon le fournisseur"""
-    api_keys = {
-        "gpt": "API_KEY_OPENAI",
-        "gpt3": "API_KEY_OPENAI", 
-        "openai": "API_KEY_OPENAI",
-        "grok": "API_KEY_GROK",
-        "groq": "API_KEY_GROQ",
-        "gemini": "API_KEY_GEMINI",
-        "deepseek": "API_KEY_DEEPSEEK",
-        "openrouter": "API_KEY_OPEN_ROUTER"
-    }
-    return os.getenv(api_keys.get(fournisseur.lower()))
-
-
 def detect_content_type(model: ModelIA, prompt_text: str):
     """Détecte le type de contenu à générer"""
     if hasattr(model, "modalite"):
@@ -77,44 +64,6 @@ def call_gpt4all(prompt_text, temperature=0.7, max_tokens=512):
         return {"type": "error", "content": f"Erreur GPT4All: {str(e)}"}
 
 
-def call_openai_api(prompt_text, api_key, model_name="gpt-3.5-turbo", temperature=0.7, max_tokens=512):
-    """Appel vers l'API OpenAI"""
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    payload = {
-        "model": model_name,
-        "messages": [{"role": "user", "content": prompt_text}],
-        "temperature": temperature,
-        "max_tokens": max_tokens
-    }
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        return {"type": "text", "content": data["choices"][0]["message"]["content"]}
-    except Exception as e:
-        return {"type": "error", "content": f"Erreur OpenAI: {str(e)}"}
-
-
-def call_grok(prompt_text, api_key, temperature=0.7, max_tokens=512):
-    """Appel vers l'API Grok"""
-    url = "https://api.x.ai/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    payload = {
-        "model": "grok-beta",
-        "messages": [{"role": "user", "content": prompt_text}],
-        "temperature": temperature,
-        "max_tokens": max_tokens
-    }
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        return {"type": "text", "content": data["choices"][0]["message"]["content"]}
-    except Exception as e:
-        return {"type": "error", "content": f"Erreur Grok: {str(e)}"}
-
-
 def call_model_api(model: ModelIA, prompt_text: str, temperature: float, max_tokens: int):
     """Appel vers l'API du modèle selon le fournisseur"""
     fournisseur = model.fournisseur.lower()
@@ -122,17 +71,7 @@ def call_model_api(model: ModelIA, prompt_text: str, temperature: float, max_tok
     if fournisseur == "gpt4all":
         return call_gpt4all(prompt_text, temperature, max_tokens)
     
-    # Récupération de la clé API
-    api_key = get_api_key(fournisseur)
-    if not api_key:
-        return {"type": "error", "content": f"Clé API manquante pour {fournisseur}"}
-    
-    if fournisseur in ["gpt", "gpt3", "openai"]:
-        return call_openai_api(prompt_text, api_key, model.nom_model, temperature, max_tokens)
-    elif fournisseur == "grok":
-        return call_grok(prompt_text, api_key, temperature, max_tokens)
-    else:
-        return {"type": "error", "content": f"Fournisseur non supporté: {fournisseur}"}
+    return provider_registry.appeler(model, prompt_text, temperature, max_tokens)
 
 
 def generer_contenu():
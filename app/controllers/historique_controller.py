@@ -3,6 +3,7 @@ from app.extensions import db
 from app.models.historique import Historique, TypeActionEnum
 from app.models.utilisateur import Utilisateur, TypeCompteEnum
 from app.utils.identity import  get_identity
+from app.utils.pagination import lister
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import desc
 
@@ -15,12 +16,14 @@ def get_all_historiques():
         return jsonify({"error": "Utilisateur non trouvé"}), 404
 
     # Admin voit tout, utilisateur normal voit seulement ses actions
-    if current_user.type_compte == TypeCompteEnum.admin:
-        historiques = Historique.query.order_by(desc(Historique.date_action)).all()
-    else:
-        historiques = Historique.query.filter_by(id_utilisateur=current_user_id).order_by(desc(Historique.date_action)).all()
+    query = Historique.query.order_by(desc(Historique.date_action))
+    if current_user.type_compte != TypeCompteEnum.admin:
+        query = query.filter_by(id_utilisateur=current_user_id)
 
-    return jsonify([h.to_dict() for h in historiques]), 200
+    try:
+        return lister(query, Historique.date_action, Historique.id, lambda h: h.to_dict()), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 def get_historique_by_contenu(contenu_id):
     """Récupère l'historique d'un contenu spécifique"""
@@ -5,6 +5,10 @@ from app.extensions import db
 from sqlalchemy.exc import SQLAlchemyError
 import json
 from app.utils.identity import  get_identity
+from app.utils.pagination import lister
+from app.services.provider_client import provider_client
+from app.services.providers import provider_registry
+from app.services.resilience import circuit_breakers
 
 def get_all_modelIA():
     try: 
@@ -14,18 +18,10 @@ def get_all_modelIA():
         if not current_user_id:
             return jsonify({"error": "Authentification requise"}), 401
             
-        models = ModelIA.query.all()
-        models_data = [{
-            'id': modelIA.id,
-            'nom_model': modelIA.nom_model,
-            'type_model': modelIA.type_model.value,
-            'fournisseur': modelIA.fournisseur,
-            'api_endpoint': modelIA.api_endpoint,
-            'parametres_default': modelIA.parametres_default,
-            'cout_par_token': modelIA.cout_par_token,
-            'actif': modelIA.actif
-        } for modelIA in models]
-        return jsonify(models_data), 200
+        # Pas de date de création sur model_ia : pagination par id seul
+        return lister(ModelIA.query, None, ModelIA.id, lambda modelIA: modelIA.to_dict()), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
   
@@ -40,16 +36,7 @@ def get_modelIA_by_id(modelIA_id):
     modelIA = ModelIA.query.get(modelIA_id)
     if not modelIA:
         return jsonify({"error": "ModelIA not found"}), 404
-    return jsonify({
-        'id': modelIA.id,
-        'nom_model': modelIA.nom_model,
-        'type_model': modelIA.type_model.value,
-        'fournisseur': modelIA.fournisseur,
-        'api_endpoint': modelIA.api_endpoint,
-        'parametres_default': modelIA.parametres_default,
-        'cout_par_token': modelIA.cout_par_token,
-        'actif': modelIA.actif
-    }), 200
+    return jsonify(modelIA.to_dict()), 200
 
 
 def create_modelIA():
@@ -264,4 +251,53 @@ def get_models_stats():
         }), 200
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+def get_provider_pool_stats():
+    """Métriques du pool de connexions vers les fournisseurs (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    return jsonify(provider_client.stats()), 200
+
+
+def get_providers_stats():
+    """Adaptateurs enregistrés et latences glissantes p50/p95 par modèle (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    return jsonify(provider_registry.stats()), 200
+
+
+def get_circuits():
+    """État des disjoncteurs par fournisseur (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    return jsonify(circuit_breakers.stats()), 200
+
+
+def reset_circuit(nom):
+    """Referme manuellement le disjoncteur d'un fournisseur (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    disjoncteur = circuit_breakers.get(nom)
+    if not disjoncteur:
+        return jsonify({"error": "Circuit non trouvé"}), 404
+
+    disjoncteur.reinitialiser()
+    return jsonify(disjoncteur.to_dict()), 200
@@ -5,6 +5,7 @@ from app.extensions import db
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
 from app.utils.identity import  get_identity
+from app.utils.pagination import lister
 import json
 
 def get_all_projet():
@@ -14,25 +15,13 @@ def get_all_projet():
 
         if not current_user:
             return jsonify({"error": "Utilisateur not authaurized"}), 404
-        if current_user.type_compte == TypeCompteEnum.admin:
+        query = Projet.query
+        if current_user.type_compte != TypeCompteEnum.admin:
+            query = query.filter(Projet.id_utilisateur == current_user_id)
 
-            projets = Projet.query.all()
-        else:
-            projets = Projet.query.filter(
-                (Projet.id_utilisateur == current_user_id)
-            ).all()
-
-        projets_data = [{
-            'id': projet.id,
-            'id_utilisateur': projet.id_utilisateur,
-            'nom_projet': projet.nom_projet,
-            'description': projet.description,
-            'date_creation': projet.date_creation.isoformat(),
-            'date_modification':projet.date_modification.isoformat() if projet.date_modification else None,
-            'status': projet.status.value,
-            'configuration':projet.configuration
-        } for projet in projets]
-        return jsonify(projets_data), 200
+        return lister(query, Projet.date_creation, Projet.id, lambda projet: projet.to_dict()), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -48,16 +37,7 @@ def get_projet_by_id(projet_id):
     if (not projet.id_utilisateur != current_user_id) and (current_user.type_compte != TypeCompteEnum.admin):
         return jsonify({"error": "unauthorized"}), 403
     
-    return jsonify({
-        'id': projet.id,
-        'id_utilisateur': projet.id_utilisateur,
-        'nom_projet': projet.nom_projet,
-        'description': projet.description,
-        'date_creation': projet.date_creation.isoformat(),
-        'date_modification': projet.date_modification.isoformat() if projet.date_modification else None,
-        'status': projet.status.value,
-        'configuration': projet.configuration
-    }), 200
+    return jsonify(projet.to_dict()), 200
 
 def create_projet():
     current_user_id = get_identity()
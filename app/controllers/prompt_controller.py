@@ -5,6 +5,7 @@ from app.extensions import db
 from datetime import datetime
 import json
 from app.utils.identity import  get_identity
+from app.utils.pagination import lister
 from sqlalchemy.exc import SQLAlchemyError
 
 
@@ -21,25 +22,14 @@ def get_all_prompt():
     current_user, error_response, status_code = get_user()
     if error_response:
        return error_response, status_code
-    if current_user.type_compte == TypeCompteEnum.admin:
-       
-      prompts = Prompt.query.all()
-    else:
-      prompts = Prompt.query.filter(
+    query = Prompt.query
+    if current_user.type_compte != TypeCompteEnum.admin:
+      query = query.filter(
          (Prompt.public == True) | (Prompt.id_utilisateur == current_user.id)
-      ).all()
-    p_data = [{
-      'id':p.id,
-      'id_utilisateur': p.id_utilisateur,
-      'nom_prompt': p.nom_prompt,
-      'texte_prompt': p.texte_prompt,
-      'parametres': p.parametres,
-      'public': p.public,
-      'utilisation_count': p.utilisation_count,   
-      'date_creation': p.date_creation.isoformat() if p.date_creation else None,
-      'date_modification': p.date_modification.isoformat() if p.date_modification else None
-    } for p in prompts]
-    return jsonify(p_data), 200
+      )
+    return lister(query, Prompt.date_creation, Prompt.id, lambda p: p.to_dict()), 200
+  except ValueError as e:
+    return jsonify({"error": str(e)}), 400
   except Exception as e:
     return jsonify({"error": str(e)}), 500
   
@@ -53,17 +43,8 @@ def get_prompt_by_id(prompt_id):
       if not p.public and p.id_utilisateur != current_user.id and current_user.type_compte != TypeCompteEnum.admin:
          return jsonify({"error": "non authorise"}), 403
       
-      return jsonify({
-      'id': p.id,
-      'id_utilisateur': p.id_utilisateur,
-      'nom_prompt': p.nom_prompt,
-      'texte_prompt': p.texte_prompt,
-      'paramatres': p.parametres,
-      'public': p.public,
-      'utilisation_count': p.utilisation_count,
-      'date_creation': p.date_creation,
-      'date_modification': p.date_modification.isoformat() if p.date_modification else None
-    }), 200
+      # 'paramatres' : ancienne clé du détail, conservée pour les clients existants
+      return jsonify({**p.to_dict(), 'paramatres': p.parametres}), 200
 
 
 def create_prompt():
@@ -4,14 +4,58 @@ from app.models.publication import Publication, StatutPublicationEnum
 from app.models.utilisateur import Utilisateur, TypeCompteEnum, Token
 from app.models.contenu import Contenu
 from app.utils.identity import  get_identity
+from app.utils.fields import champs_demandes, charger_seulement
+from app.utils.pagination import lister, ordre_tri, date_parametre
+from app.utils.etag import requete_validateur, etag_requetes, calculer_etag, non_modifie, avec_etag, reponse_non_modifiee
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta, timezone
 import requests
 from app.services.x_service import publish_to_x_api, delete_publication_from_x
+from app.services.blob_store import blob_store
 from app.scheduler.scheduler import scheduler  
 
 
+def options_publication(champs=None):
+    """Options de chargement : colonnes demandées et, si besoin, le contenu lié
+    limité au texte et à la référence d'image"""
+    options = []
+    if champs:
+        options.append(charger_seulement(Publication, champs, Publication.CHAMPS_API))
+    if champs is None or "contenu" in champs:
+        options.append(selectinload(Publication.contenu).load_only(
+            Contenu.id, Contenu.texte, Contenu.image_url, Contenu.image_hash
+        ))
+    return options
+
+
+def message_surcharge_de(contenu, message):
+    """Message fourni par le client -> surcharge à stocker, None s'il recopie le contenu"""
+    if not message or (contenu and message in [contenu.texte, contenu.titre]):
+        return None
+    return message
+
+
+def image_surcharge(contenu, image_demandee):
+    """Image fournie par le client -> référence 'blob:<sha>', None pour l'image du contenu.
+
+    Data URI uniquement (stockée par empreinte), ou l'image du contenu lui-même.
+    Une référence 'blob:' ou un chemin arbitraire désignerait un fichier du
+    serveur ou le blob d'un autre utilisateur : ValueError.
+    """
+    if not image_demandee:
+        return None
+    images_du_contenu = [contenu.url_image(), contenu.image_url] if contenu else []
+    if contenu and contenu.image_hash:
+        images_du_contenu.append(blob_store.reference(contenu.image_hash))
+    if image_demandee in images_du_contenu:
+        return None
+    if not isinstance(image_demandee, str) or not image_demandee.startswith("data:"):
+        raise ValueError("data URI attendue")
+    return blob_store.reference(blob_store.enregistrer_data_uri(image_demandee)["image_hash"])
+
+
 def create_publication():
     
     current_user_id = get_identity()
@@ -44,8 +88,21 @@ def create_publication():
             return jsonify({"error": "Non autorisé à utiliser ce contenu"}), 403
         
         texte_contenu = data.get("message") or contenu.texte or contenu.titre or ""
-        
-        image_data = data.get("image_url") or contenu.image_url
+        # Seules les surcharges sont stockées dans parametres_publication ;
+        # le texte et l'image du contenu sont résolus au moment de l'envoi
+        message_surcharge = message_surcharge_de(contenu, data.get("message"))
+
+        try:
+            image_demandee = image_surcharge(contenu, data.get("image_url"))
+        except ValueError as e:
+            return jsonify({"error": f"Image invalide: {str(e)}"}), 400
+
+        if image_demandee:
+            image_data = image_demandee
+        elif contenu.image_hash:
+            image_data = blob_store.reference(contenu.image_hash)
+        else:
+            image_data = contenu.image_url
         
         if not texte_contenu:
             return jsonify({"error": "Aucun contenu texte disponible pour la publication"}), 400
@@ -119,6 +176,12 @@ def create_publication():
             contenu, "titre", f"Publication X - {now_utc.strftime('%d/%m/%Y')}"
         )
 
+        surcharges = {}
+        if message_surcharge:
+            surcharges["message"] = message_surcharge
+        if image_demandee:
+            surcharges["image_url"] = image_demandee
+
         publication = Publication(
             id_utilisateur=current_user_id,
             id_contenu=data["id_contenu"],
@@ -133,9 +196,8 @@ def create_publication():
                 "tweet_id": tweet_id,
                 "api_response": tweet_data,
                 "publication_immediate": publier_maintenant,
-                "message": texte_contenu,
-                "image_url": image_data,  
-                "task_id": task_id    
+                "task_id": task_id,
+                **surcharges
             }
         )
         
@@ -277,10 +339,30 @@ def update_publication(publication_id):
                 champs_modifies.append("date_programmee (supprimée)")
                 
         if "parametres_publication" in data:
-            if publication.parametres_publication:
-                publication.parametres_publication.update(data["parametres_publication"])
-            else:
-                publication.parametres_publication = data["parametres_publication"]
+            parametres = data["parametres_publication"]
+            if not isinstance(parametres, dict):
+                return jsonify({"error": "parametres_publication doit être un objet"}), 400
+            # Nouveau dict : la colonne JSON ne suit pas les modifications en place.
+            # Comme à la création, seules les surcharges sont stockées : texte et
+            # image du contenu sont résolus à l'envoi (message_a_publier/image_a_publier)
+            nouveaux = {**(publication.parametres_publication or {}), **parametres}
+            nouveaux.pop("image_data", None)
+            if "message" in parametres:
+                message = message_surcharge_de(publication.contenu, parametres["message"])
+                if message:
+                    nouveaux["message"] = message
+                else:
+                    nouveaux.pop("message")
+            if "image_url" in parametres:
+                try:
+                    image = image_surcharge(publication.contenu, parametres["image_url"])
+                except ValueError as e:
+                    return jsonify({"error": f"Image invalide: {str(e)}"}), 400
+                if image:
+                    nouveaux["image_url"] = image
+                else:
+                    nouveaux.pop("image_url")
+            publication.parametres_publication = nouveaux
             champs_modifies.append("parametres")
             
         if "url_publication" in data:
@@ -295,7 +377,7 @@ def update_publication(publication_id):
             publication.message_erreur = data["message_erreur"]
             champs_modifies.append("message_erreur")
 
-        publication.date_modification = datetime.now(timezone.utc)
+        publication.date_modification = datetime.now(timezone.utc).replace(tzinfo=None)
         
         db.session.commit()
         
@@ -321,6 +403,70 @@ def update_publication(publication_id):
         return jsonify({"error": "Erreur inattendue", "details": str(e)}), 500
 
 
+TRIS_PUBLICATION = {
+    "date_creation": Publication.date_creation,
+    "date_programmee": Publication.date_programmee,
+    "date_publication": Publication.date_publication,
+}
+
+
+def filtrer_publications(query):
+    """Applique les filtres de liste en SQL.
+
+    ?statut= (répétable ou séparé par des virgules), ?plateforme=, ?id_contenu=,
+    ?date_programmee_debut/_fin= et ?date_publication_debut/_fin= (ISO 8601,
+    borne de fin exclue). Lève ValueError sur une valeur invalide.
+    """
+    statuts = [s.strip() for valeur in request.args.getlist("statut") for s in valeur.split(",") if s.strip()]
+    if statuts:
+        try:
+            query = query.filter(Publication.statut.in_([StatutPublicationEnum(s) for s in statuts]))
+        except ValueError:
+            raise ValueError(f"Statut invalide (valeurs: {', '.join(s.value for s in StatutPublicationEnum)})")
+
+    if request.args.get("plateforme"):
+        query = query.filter(Publication.plateforme == request.args["plateforme"])
+
+    if request.args.get("id_contenu"):
+        id_contenu = request.args.get("id_contenu", type=int)
+        if id_contenu is None:
+            raise ValueError("Paramètre 'id_contenu' invalide")
+        query = query.filter(Publication.id_contenu == id_contenu)
+
+    for colonne in ["date_programmee", "date_publication"]:
+        debut = date_parametre(f"{colonne}_debut")
+        fin = date_parametre(f"{colonne}_fin")
+        if debut:
+            query = query.filter(TRIS_PUBLICATION[colonne] >= debut)
+        if fin:
+            query = query.filter(TRIS_PUBLICATION[colonne] < fin)
+
+    return query
+
+
+def tri_publications():
+    """(colonne, descendant) d'après ?tri=date_creation|date_programmee|date_publication
+    et ?ordre=asc|desc (défaut : date_creation desc). Lève ValueError"""
+    tri = request.args.get("tri", "date_creation")
+    ordre = request.args.get("ordre", "desc").lower()
+    if tri not in TRIS_PUBLICATION:
+        raise ValueError(f"Tri invalide (valeurs: {', '.join(TRIS_PUBLICATION)})")
+    if ordre not in ["asc", "desc"]:
+        raise ValueError("Ordre invalide (asc ou desc)")
+    return tri, ordre == "desc"
+
+
+def validateurs_publications(id_utilisateur=None):
+    """Requêtes de validation ETag de la liste (id_utilisateur None : vue admin).
+    Les contenus en font partie : chaque publication embarque texte et image du sien."""
+    filtres_publication = [Publication.id_utilisateur == id_utilisateur] if id_utilisateur is not None else []
+    filtres_contenu = [Contenu.id_utilisateur == id_utilisateur] if id_utilisateur is not None else []
+    return [
+        requete_validateur(Publication, Publication.date_modification, *filtres_publication),
+        requete_validateur(Contenu, Contenu.date_modification, *filtres_contenu),
+    ]
+
+
 def get_all_publications():
     current_user_id = get_identity()
     
@@ -334,12 +480,32 @@ def get_all_publications():
     if not current_user:
         return jsonify({"error": "Utilisateur non trouvé"}), 404
 
-    if current_user.type_compte == TypeCompteEnum.admin:
-        publications = Publication.query.all()
-    else:
-        publications = Publication.query.filter_by(id_utilisateur=current_user_id).all()
+    try:
+        champs = champs_demandes(Publication.CHAMPS_API)
+        tri, descendant = tri_publications()
+        query = filtrer_publications(Publication.query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # 304 sans charger ni sérialiser une seule ligne si rien n'a changé
+    perimetre = None if current_user.type_compte == TypeCompteEnum.admin else current_user_id
+    etag = etag_requetes(current_user_id, *validateurs_publications(perimetre))
+    if non_modifie(etag):
+        return reponse_non_modifiee(etag)
 
-    return jsonify([p.to_dict() for p in publications]), 200
+    # La colonne de tri est chargée même si ?fields= ne la demande pas (curseur)
+    query = query.options(*options_publication(champs | {tri} if champs else champs))
+
+    if current_user.type_compte != TypeCompteEnum.admin:
+        query = query.filter_by(id_utilisateur=current_user_id)
+
+    colonne = TRIS_PUBLICATION[tri]
+    query = query.order_by(*ordre_tri(colonne, Publication.id, descendant))
+
+    try:
+        return avec_etag(lister(query, colonne, Publication.id, lambda p: p.to_dict(champs), descendant), etag), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 
 def get_publication_by_id(publication_id):
@@ -355,14 +521,32 @@ def get_publication_by_id(publication_id):
     if not current_user:
         return jsonify({"error": "Utilisateur non trouvé"}), 404
 
-    publication = Publication.query.get(publication_id)
-    if not publication:
+    try:
+        champs = champs_demandes(Publication.CHAMPS_API)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Validateur : dates de modification de la publication et de son contenu,
+    # lues avec le propriétaire (accès vérifié avant le 304)
+    ligne = db.session.execute(
+        select(Publication.id_utilisateur, Publication.date_modification, Contenu.date_modification)
+        .outerjoin(Contenu, Contenu.id == Publication.id_contenu)
+        .where(Publication.id == publication_id)
+    ).first()
+    if not ligne:
         return jsonify({"error": "Publication introuvable"}), 404
-
-    if publication.id_utilisateur != current_user_id and current_user.type_compte != TypeCompteEnum.admin:
+    if ligne.id_utilisateur != current_user_id and current_user.type_compte != TypeCompteEnum.admin:
         return jsonify({"error": "Non autorisé"}), 403
 
-    return jsonify(publication.to_dict()), 200
+    etag = calculer_etag(current_user_id, *ligne[1:])
+    if non_modifie(etag):
+        return reponse_non_modifiee(etag)
+
+    publication = Publication.query.options(*options_publication(champs)).get(publication_id)
+    if not publication:
+        return jsonify({"error": "Publication introuvable"}), 404
+
+    return avec_etag(jsonify(publication.to_dict(champs)), etag), 200
 
 
 def delete_publication(publication_id):
@@ -539,7 +723,7 @@ def annuler_publication_programmee(publication_id):
 
         publication.statut = StatutPublicationEnum.supprime
         publication.date_programmee = None
-        publication.date_modification = datetime.now(timezone.utc)
+        publication.date_modification = datetime.now(timezone.utc).replace(tzinfo=None)
         publication.message_erreur = None
 
         db.session.commit()
@@ -0,0 +1,86 @@
+from flask import request, jsonify
+from app.models.utilisateur import Utilisateur, TypeCompteEnum
+from app.services.recherche import recherche_service, INDEX
+from app.utils.identity import  get_identity
+from app.utils.serialisation import date_iso
+import base64
+import binascii
+import json
+import time
+import os
+
+
+LIMITE_DEFAUT = 20
+LIMITE_MAX = int(os.getenv("RECHERCHE_MAX_LIMIT", 100))
+
+
+def _encoder_curseur(cle, id_ligne):
+    brut = json.dumps([cle, id_ligne], separators=(",", ":"))
+    return base64.urlsafe_b64encode(brut.encode()).decode().rstrip("=")
+
+
+def _decoder_curseur(curseur):
+    """Curseur opaque -> (clé de tri, id) du dernier résultat vu. Lève ValueError si invalide"""
+    try:
+        cle, id_ligne = json.loads(base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4)))
+        return recherche_service.borne(cle), int(id_ligne)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Curseur invalide")
+
+
+def rechercher():
+    """Recherche plein texte : ?q=...&type=contenu|prompt&limit=&cursor=
+
+    Résultats classés par pertinence, extraits avec les termes trouvés entre
+    <mark></mark> (le reste du texte est échappé)."""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    terme = (request.args.get("q") or "").strip()
+    if not terme:
+        return jsonify({"error": "Paramètre 'q' requis"}), 400
+    if len(terme) > 200:
+        return jsonify({"error": "Recherche trop longue (200 caractères max)"}), 400
+
+    type_index = request.args.get("type", "contenu")
+    if type_index not in INDEX:
+        return jsonify({"error": f"Type invalide (valeurs: {', '.join(INDEX)})"}), 400
+
+    limite = request.args.get("limit", LIMITE_DEFAUT, type=int)
+    if limite is None or limite < 1:
+        return jsonify({"error": "Paramètre 'limit' invalide"}), 400
+    limite = min(limite, LIMITE_MAX)
+
+    try:
+        apres = _decoder_curseur(request.args["cursor"]) if request.args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    debut = time.perf_counter()
+    lignes = recherche_service.rechercher(
+        type_index, terme, current_user.id, current_user.type_compte == TypeCompteEnum.admin, limite, apres
+    )
+
+    suivant = None
+    if len(lignes) > limite:
+        lignes = lignes[:limite]
+        suivant = _encoder_curseur(recherche_service.cle(lignes[-1]), lignes[-1]["id"])
+
+    items = []
+    for ligne in lignes:
+        items.append({
+            **ligne,
+            "type": type_index,
+            "rang": round(float(ligne["rang"] or 0), 6),
+            "date_creation": date_iso(ligne.get("date_creation")),
+        })
+
+    return jsonify({
+        "items": items,
+        "next_cursor": suivant,
+        "moteur": recherche_service.moteur,
+        "duree_ms": round((time.perf_counter() - debut) * 1000, 1),
+    }), 200
@@ -3,6 +3,7 @@ from app.models.template import Template
 from app.models.utilisateur import Utilisateur, TypeCompteEnum
 from app.extensions import db
 from app.utils.identity import  get_identity
+from app.utils.pagination import lister
 from sqlalchemy.exc import SQLAlchemyError
 
 def get_all_template():
@@ -13,15 +14,15 @@ def get_all_template():
         if not current_user:
             return jsonify({"error": "Utilisateur non trouvé"}), 404
         
-        if current_user.type_compte == TypeCompteEnum.admin:
-            templates = Template.query.all()
-        else:
-            templates = Template.query.filter(
+        query = Template.query
+        if current_user.type_compte != TypeCompteEnum.admin:
+            query = query.filter(
                 (Template.public == True) | (Template.id_utilisateur == current_user_id)
-            ).all()
+            )
 
-        templates_data = [t.to_dict() for t in templates]
-        return jsonify(templates_data), 200
+        return lister(query, Template.date_creation, Template.id, lambda t: t.to_dict()), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -0,0 +1,141 @@
+from flask import request, jsonify
+from app.extensions import db
+from app.models.generation_usage import GenerationUsage
+from app.models.modelIA import ModelIA
+from app.models.utilisateur import Utilisateur, TypeCompteEnum
+from app.utils.identity import  get_identity
+from sqlalchemy import func, desc, case
+from datetime import datetime
+
+
+def _requete_filtree(current_user, colonnes):
+    """Requête d'usage filtrée : admin voit tout (ou ?id_utilisateur), sinon ses propres appels.
+
+    Filtres optionnels : ?id_model, ?date_debut, ?date_fin (ISO 8601).
+    """
+    query = db.session.query(*colonnes)
+
+    if current_user.type_compte == TypeCompteEnum.admin:
+        if request.args.get("id_utilisateur"):
+            query = query.filter(GenerationUsage.id_utilisateur == request.args.get("id_utilisateur", type=int))
+    else:
+        query = query.filter(GenerationUsage.id_utilisateur == current_user.id)
+
+    if request.args.get("id_model"):
+        query = query.filter(GenerationUsage.id_model == request.args.get("id_model", type=int))
+    if request.args.get("date_debut"):
+        query = query.filter(GenerationUsage.date_creation >= datetime.fromisoformat(request.args["date_debut"]))
+    if request.args.get("date_fin"):
+        query = query.filter(GenerationUsage.date_creation < datetime.fromisoformat(request.args["date_fin"]))
+
+    return query
+
+
+def _agregats():
+    """Colonnes d'agrégation communes aux vues par utilisateur, modèle et jour"""
+    return [
+        func.count(GenerationUsage.id).label("appels"),
+        func.sum(case((GenerationUsage.statut == "echec", 1), else_=0)).label("echecs"),
+        func.sum(case((GenerationUsage.cache_hit.is_(True), 1), else_=0)).label("cache_hits"),
+        func.sum(GenerationUsage.tokens_entree).label("tokens_entree"),
+        func.sum(GenerationUsage.tokens_sortie).label("tokens_sortie"),
+        func.sum(GenerationUsage.cout).label("cout"),
+        func.avg(GenerationUsage.latence_ms).label("latence_moyenne_ms"),
+        func.max(GenerationUsage.latence_ms).label("latence_max_ms"),
+        func.avg(GenerationUsage.attente_ms).label("attente_moyenne_ms"),
+        func.avg(GenerationUsage.reseau_ms).label("reseau_moyen_ms"),
+        func.avg(GenerationUsage.parse_ms).label("parse_moyen_ms"),
+        func.sum(GenerationUsage.tentatives).label("tentatives"),
+    ]
+
+
+def _ligne_agregat(ligne, cles):
+    donnees = ligne._asdict()
+    resultat = {cle: donnees[cle] for cle in cles}
+    resultat.update({
+        "appels": donnees["appels"],
+        "echecs": int(donnees["echecs"] or 0),
+        "cache_hits": int(donnees["cache_hits"] or 0),
+        "tokens_entree": int(donnees["tokens_entree"] or 0),
+        "tokens_sortie": int(donnees["tokens_sortie"] or 0),
+        "cout": round(donnees["cout"] or 0.0, 6),
+        "latence_moyenne_ms": int(donnees["latence_moyenne_ms"]) if donnees["latence_moyenne_ms"] is not None else None,
+        "latence_max_ms": donnees["latence_max_ms"],
+        "attente_moyenne_ms": int(donnees["attente_moyenne_ms"]) if donnees["attente_moyenne_ms"] is not None else None,
+        "reseau_moyen_ms": int(donnees["reseau_moyen_ms"]) if donnees["reseau_moyen_ms"] is not None else None,
+        "parse_moyen_ms": int(donnees["parse_moyen_ms"]) if donnees["parse_moyen_ms"] is not None else None,
+        "tentatives": int(donnees["tentatives"] or 0),
+    })
+    return resultat
+
+
+def get_usage():
+    """Derniers appels de génération (limit par défaut 100)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    try:
+        limit = min(request.args.get("limit", 100, type=int), 1000)
+        usages = _requete_filtree(current_user, [GenerationUsage]) \
+            .order_by(desc(GenerationUsage.date_creation)).limit(limit).all()
+        return jsonify([u.to_dict() for u in usages]), 200
+    except ValueError as e:
+        return jsonify({"error": f"Paramètre invalide: {str(e)}"}), 400
+
+
+def get_usage_par_utilisateur():
+    """Consommation agrégée par utilisateur (admin seulement)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user or current_user.type_compte != TypeCompteEnum.admin:
+        return jsonify({"error": "Unauthorized - Admin rights required"}), 403
+
+    try:
+        lignes = _requete_filtree(current_user, [GenerationUsage.id_utilisateur, Utilisateur.email, *_agregats()]) \
+            .join(Utilisateur, Utilisateur.id == GenerationUsage.id_utilisateur) \
+            .group_by(GenerationUsage.id_utilisateur, Utilisateur.email) \
+            .order_by(desc("cout")).all()
+        return jsonify([_ligne_agregat(l, ["id_utilisateur", "email"]) for l in lignes]), 200
+    except ValueError as e:
+        return jsonify({"error": f"Paramètre invalide: {str(e)}"}), 400
+
+
+def get_usage_par_modele():
+    """Consommation et latences agrégées par modèle"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    try:
+        lignes = _requete_filtree(current_user, [GenerationUsage.id_model, ModelIA.nom_model, ModelIA.fournisseur, *_agregats()]) \
+            .outerjoin(ModelIA, ModelIA.id == GenerationUsage.id_model) \
+            .group_by(GenerationUsage.id_model, ModelIA.nom_model, ModelIA.fournisseur) \
+            .order_by(desc("cout")).all()
+        return jsonify([_ligne_agregat(l, ["id_model", "nom_model", "fournisseur"]) for l in lignes]), 200
+    except ValueError as e:
+        return jsonify({"error": f"Paramètre invalide: {str(e)}"}), 400
+
+
+def get_usage_par_jour():
+    """Consommation agrégée par jour (UTC)"""
+    current_user_id = get_identity()
+    current_user = Utilisateur.query.get(current_user_id)
+
+    if not current_user:
+        return jsonify({"error": "Utilisateur non trouvé"}), 404
+
+    try:
+        jour = func.date(GenerationUsage.date_creation).label("jour")
+        lignes = _requete_filtree(current_user, [jour, *_agregats()]) \
+            .group_by(jour).order_by(jour).all()
+        return jsonify([
+            {**_ligne_agregat(l, []), "jour": str(l.jour)} for l in lignes
+        ]), 200
+    except ValueError as e:
+        return jsonify({"error": f"Paramètre invalide: {str(e)}"}), 400
@@ -3,11 +3,36 @@ from app.extensions import db
 from app.models.plateforme import PlateformeConfig, UtilisateurPlateforme, OAuthState
 from app.models.utilisateur import Utilisateur
 from app.utils.identity import  get_identity
+from app.utils.etag import requete_validateur, etag_requetes, calculer_etag, non_modifie, avec_etag, reponse_non_modifiee
+from sqlalchemy import func, case, select
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import secrets
 import requests
 
 
+def options_plateformes():
+    """Plateforme liée chargée dans la même requête (to_dict lit plateforme.nom)"""
+    return [joinedload(UtilisateurPlateforme.plateforme).load_only(PlateformeConfig.id, PlateformeConfig.nom)]
+
+
+def validateurs_plateformes(id_utilisateur):
+    """Requêtes de validation ETag de la liste.
+
+    token_valide dépend de l'heure : le nombre de tokens non expirés fait
+    partie du validateur. plateforme_config (quelques lignes) couvre le
+    renommage d'une plateforme (plateforme_nom)."""
+    maintenant = datetime.utcnow()
+    return [
+        requete_validateur(
+            UtilisateurPlateforme, UtilisateurPlateforme.updated_at,
+            UtilisateurPlateforme.utilisateur_id == id_utilisateur,
+            extra=[func.count(case((UtilisateurPlateforme.token_expires_at > maintenant, 1)))]
+        ),
+        requete_validateur(PlateformeConfig, PlateformeConfig.updated_at),
+    ]
+
+
 def get_user_plateformes():
     """Récupère toutes les plateformes connectées de l'utilisateur actuel"""
     current_user_id = get_identity()
@@ -15,11 +40,15 @@ def get_user_plateformes():
         return jsonify({"error": "Authentification requise"}), 401
 
     try:
-        user_plateformes = UtilisateurPlateforme.query.filter_by(
+        etag = etag_requetes(current_user_id, *validateurs_plateformes(current_user_id))
+        if non_modifie(etag):
+            return reponse_non_modifiee(etag)
+
+        user_plateformes = UtilisateurPlateforme.query.options(*options_plateformes()).filter_by(
             utilisateur_id=current_user_id
         ).all()
         
-        return jsonify([up.to_dict() for up in user_plateformes]), 200
+        return avec_etag(jsonify([up.to_dict() for up in user_plateformes]), etag), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -31,7 +60,21 @@ def get_user_plateforme_by_id(user_plateforme_id):
         return jsonify({"error": "Authentification requise"}), 401
 
     try:
-        user_plateforme = UtilisateurPlateforme.query.filter_by(
+        # Validateur : dates de modification de la connexion et de la plateforme, validité du token
+        ligne = db.session.execute(
+            select(UtilisateurPlateforme.updated_at, UtilisateurPlateforme.token_expires_at, PlateformeConfig.updated_at)
+            .outerjoin(PlateformeConfig, PlateformeConfig.id == UtilisateurPlateforme.plateforme_id)
+            .where(UtilisateurPlateforme.id == user_plateforme_id, UtilisateurPlateforme.utilisateur_id == current_user_id)
+        ).first()
+        if not ligne:
+            return jsonify({"error": "Connexion plateforme introuvable"}), 404
+
+        expiration = ligne[1]
+        etag = calculer_etag(current_user_id, ligne[0], ligne[2], bool(expiration and expiration > datetime.utcnow()))
+        if non_modifie(etag):
+            return reponse_non_modifiee(etag)
+
+        user_plateforme = UtilisateurPlateforme.query.options(*options_plateformes()).filter_by(
             id=user_plateforme_id,
             utilisateur_id=current_user_id
         ).first()
@@ -39,7 +82,7 @@ def get_user_plateforme_by_id(user_plateforme_id):
         if not user_plateforme:
             return jsonify({"error": "Connexion plateforme introuvable"}), 404
 
-        return jsonify(user_plateforme.to_dict()), 200
+        return avec_etag(jsonify(user_plateforme.to_dict()), etag), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -7,3 +7,5 @@ from .contenu import Contenu
 from .plateforme import PlateformeConfig, UtilisateurPlateforme, OAuthState
 from .publication import Publication, StatutPublicationEnum
 from .historique import Historique
+from .generation_job import GenerationJob, StatutJobEnum
+from .generation_usage import GenerationUsage
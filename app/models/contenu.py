@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.utils.serialisation import enregistrer, serialiser
 from datetime import datetime
 import enum
 
@@ -10,6 +11,14 @@ class TypeContenuEnum(enum.Enum):
 
 class Contenu(db.Model):
     __tablename__ = "contenu"
+    __table_args__ = (
+        # Listes par utilisateur et liste admin, triées par (date_creation, id) : pagination keyset
+        db.Index("ix_contenu_utilisateur_date", "id_utilisateur", "date_creation", "id"),
+        db.Index("ix_contenu_date_creation", "date_creation", "id"),
+        # Validateurs ETag (count + max(date_modification)) lus dans l'index seul
+        db.Index("ix_contenu_utilisateur_maj", "id_utilisateur", "date_modification"),
+        db.Index("ix_contenu_date_modification", "date_modification"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id', ondelete="CASCADE"), nullable=False)
@@ -21,29 +30,78 @@ class Contenu(db.Model):
     type_contenu = db.Column(db.Enum(TypeContenuEnum), default=TypeContenuEnum.text, nullable=False)
     texte = db.Column(db.Text, nullable=True)
     image_url = db.Column(db.Text, nullable=True)
+    image_hash = db.Column(db.String(64), nullable=True, index=True)
+    image_mime = db.Column(db.String(50), nullable=True)
+    image_largeur = db.Column(db.Integer, nullable=True)
+    image_hauteur = db.Column(db.Integer, nullable=True)
+    image_taille = db.Column(db.Integer, nullable=True)
     contenu_structure = db.Column(db.JSON, nullable=True)
     meta = db.Column(db.JSON, nullable=True)
-    date_creation = db.Column(db.DateTime, default=datetime.utcnow)
+    date_creation = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    date_modification = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     id_projet = db.Column(db.Integer, db.ForeignKey('projets.id', ondelete="SET NULL"), nullable=True)
 
+    # Colonnes nécessaires à chaque champ de l'API (?fields= -> load_only)
+    CHAMPS_API = {
+        "id": ["id"],
+        "id_utilisateur": ["id_utilisateur"],
+        "id_projet": ["id_projet"],
+        "id_model": ["id_model"],
+        "id_template": ["id_template"],
+        "custom_prompt": ["custom_prompt"],
+        "id_prompt": ["id_prompt"],
+        "titre": ["titre"],
+        "type_contenu": ["type_contenu"],
+        "texte": ["texte"],
+        "image_url": ["image_hash", "image_url"],
+        "thumbnail_url": ["image_hash", "image_url"],
+        "image": ["image_hash", "image_mime", "image_largeur", "image_hauteur", "image_taille"],
+        "contenu_structure": ["contenu_structure"],
+        "meta": ["meta"],
+        "date_creation": ["date_creation"],
+    }
 
     def __repr__(self):
         return f"<Contenu {self.id}: {self.titre}>"
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "id_utilisateur": self.id_utilisateur,
-            "id_projet": self.id_projet,
-            "id_model": self.id_model,
-            "id_template": self.id_template,
-            "custom_prompt": self.custom_prompt,
-            "id_prompt": self.id_prompt,
-            "titre": self.titre,
-            "type_contenu": self.type_contenu.value if self.type_contenu else None,
-            "texte": self.texte,
-            "image_url": self.image_url,
-            "contenu_structure": self.contenu_structure,
-            "meta": self.meta,
-            "date_creation": self.date_creation.isoformat() if self.date_creation else None,
-        }
+    def url_image(self, variante=None):
+        """URL de l'image servie par l'API (versionnée par l'empreinte), sinon l'URL d'origine.
+
+        `variante` ('miniature', 'apercu') désigne un dérivé WebP ; l'endpoint
+        sert l'original tant que le dérivé n'est pas prêt.
+        """
+        if self.image_hash:
+            suffixe = f"&variante={variante}" if variante else ""
+            return f"/api/contenu/{self.id}/image?v={self.image_hash[:16]}{suffixe}"
+        if self.image_url and self.image_url.startswith("data:"):
+            return f"/api/contenu/{self.id}/image"
+        return self.image_url
+
+    def to_dict(self, champs=None):
+        """Sérialisation API ; `champs` restreint la sortie (voir CHAMPS_API)"""
+        return serialiser(self, champs)
+
+
+enregistrer(Contenu, {
+    "id": None,
+    "id_utilisateur": None,
+    "id_projet": None,
+    "id_model": None,
+    "id_template": None,
+    "custom_prompt": None,
+    "id_prompt": None,
+    "titre": None,
+    "type_contenu": None,
+    "texte": None,
+    "image_url": lambda c: c.url_image(),
+    "thumbnail_url": lambda c: c.url_image("miniature"),
+    "image": lambda c: {
+        "mime": c.image_mime,
+        "largeur": c.image_largeur,
+        "hauteur": c.image_hauteur,
+        "taille": c.image_taille,
+    } if c.image_hash else None,
+    "contenu_structure": None,
+    "meta": None,
+    "date_creation": None,
+})
@@ -0,0 +1,61 @@
+from app.extensions import db
+from datetime import datetime
+import enum
+import uuid
+
+
+class StatutJobEnum(enum.Enum):
+    en_attente = "en_attente"
+    en_cours = "en_cours"
+    termine = "termine"
+    echec = "echec"
+
+
+class GenerationJob(db.Model):
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        # Balayage périodique des baux expirés (voir GenerationJobQueue.balayer)
+        db.Index("ix_generation_jobs_statut_bail", "statut", "bail_expire"),
+    )
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id', ondelete="CASCADE"), nullable=False)
+    id_contenu = db.Column(db.Integer, db.ForeignKey('contenu.id', ondelete="SET NULL"), nullable=True)
+    statut = db.Column(db.Enum(StatutJobEnum), default=StatutJobEnum.en_attente, nullable=False, index=True)
+    payload = db.Column(db.JSON, nullable=False)
+    resultat = db.Column(db.JSON, nullable=True)
+    message_erreur = db.Column(db.Text, nullable=True)
+    date_creation = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    date_debut = db.Column(db.DateTime, nullable=True)
+    date_fin = db.Column(db.DateTime, nullable=True)
+    # Bail du processus qui détient le job (en file ou en cours), renouvelé
+    # tant qu'il tourne : expiré, le job est remis en file par le balayage
+    bail_expire = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<GenerationJob {self.id}: {self.statut.value}>"
+
+    def duree_attente_ms(self):
+        if not self.date_debut:
+            return None
+        return int((self.date_debut - self.date_creation).total_seconds() * 1000)
+
+    def duree_execution_ms(self):
+        if not self.date_debut or not self.date_fin:
+            return None
+        return int((self.date_fin - self.date_debut).total_seconds() * 1000)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "id_utilisateur": self.id_utilisateur,
+            "id_contenu": self.id_contenu,
+            "statut": self.statut.value if self.statut else None,
+            "resultat": self.resultat,
+            "message_erreur": self.message_erreur,
+            "date_creation": self.date_creation.isoformat() if self.date_creation else None,
+            "date_debut": self.date_debut.isoformat() if self.date_debut else None,
+            "date_fin": self.date_fin.isoformat() if self.date_fin else None,
+            "duree_attente_ms": self.duree_attente_ms(),
+            "duree_execution_ms": self.duree_execution_ms(),
+        }
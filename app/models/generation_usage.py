@@ -0,0 +1,51 @@
+from app.extensions import db
+from datetime import datetime
+
+
+class GenerationUsage(db.Model):
+    """Une ligne par appel de génération : tokens, coût, latences et tentatives"""
+    __tablename__ = "generation_usage"
+
+    id = db.Column(db.Integer, primary_key=True)
+    id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id', ondelete="CASCADE"), nullable=False, index=True)
+    id_model = db.Column(db.Integer, db.ForeignKey('model_ia.id', ondelete="SET NULL"), nullable=True, index=True)
+    id_contenu = db.Column(db.Integer, db.ForeignKey('contenu.id', ondelete="SET NULL"), nullable=True)
+    mode = db.Column(db.String(20), nullable=False, default="direct")
+    statut = db.Column(db.String(20), nullable=False, default="succes")
+    tokens_entree = db.Column(db.Integer, nullable=True)
+    tokens_sortie = db.Column(db.Integer, nullable=True)
+    cout = db.Column(db.Float, nullable=False, default=0.0)
+    latence_ms = db.Column(db.Integer, nullable=True)
+    attente_ms = db.Column(db.Integer, nullable=True)
+    reseau_ms = db.Column(db.Integer, nullable=True)
+    parse_ms = db.Column(db.Integer, nullable=True)
+    tentatives = db.Column(db.Integer, nullable=False, default=1)
+    cache_hit = db.Column(db.Boolean, nullable=False, default=False)
+    hedged = db.Column(db.Boolean, nullable=False, default=False)
+    message_erreur = db.Column(db.Text, nullable=True)
+    date_creation = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<GenerationUsage {self.id}: model={self.id_model} {self.statut}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "id_utilisateur": self.id_utilisateur,
+            "id_model": self.id_model,
+            "id_contenu": self.id_contenu,
+            "mode": self.mode,
+            "statut": self.statut,
+            "tokens_entree": self.tokens_entree,
+            "tokens_sortie": self.tokens_sortie,
+            "cout": self.cout,
+            "latence_ms": self.latence_ms,
+            "attente_ms": self.attente_ms,
+            "reseau_ms": self.reseau_ms,
+            "parse_ms": self.parse_ms,
+            "tentatives": self.tentatives,
+            "cache_hit": self.cache_hit,
+            "hedged": self.hedged,
+            "message_erreur": self.message_erreur,
+            "date_creation": self.date_creation.isoformat() if self.date_creation else None,
+        }
@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.utils.serialisation import enregistrer, serialiser
 from datetime import datetime
 from enum import Enum
 
@@ -12,6 +13,11 @@ class TypeActionEnum(Enum):
 
 class Historique(db.Model):
     __tablename__ = 'historiques'
+    __table_args__ = (
+        db.Index('ix_historiques_utilisateur_date', 'id_utilisateur', 'date_action', 'id'),
+        db.Index('ix_historiques_date_action', 'date_action', 'id'),
+        db.Index('ix_historiques_id_contenu', 'id_contenu'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), nullable=False)
@@ -24,19 +30,22 @@ class Historique(db.Model):
     donnees_apres = db.Column(db.JSON)
     ip_utilisateur = db.Column(db.String(45))
     user_agent = db.Column(db.String(500))
-    date_action = db.Column(db.DateTime, default=datetime.utcnow)
+    date_action = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'id_utilisateur': self.id_utilisateur,
-            'id_contenu': self.id_contenu,
-            'id_plateforme': self.id_plateforme,
-            'type_action': self.type_action.value,
-            'description': self.description,
-            'donnees_avant': self.donnees_avant,
-            'donnees_apres': self.donnees_apres,
-            'ip_utilisateur': self.ip_utilisateur,
-            'user_agent': self.user_agent,
-            'date_action': self.date_action.isoformat()
-        }
+        return serialiser(self)
+
+
+enregistrer(Historique, {
+    'id': None,
+    'id_utilisateur': None,
+    'id_contenu': None,
+    'id_plateforme': None,
+    'type_action': None,
+    'description': None,
+    'donnees_avant': None,
+    'donnees_apres': None,
+    'ip_utilisateur': None,
+    'user_agent': None,
+    'date_action': None,
+})
@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.utils.serialisation import enregistrer, serialiser
 import enum
 import json
 
@@ -25,13 +26,16 @@ class ModelIA(db.Model):
         return f"<ModelIA {self.id}: {self.nom_model} - {self.type_model.value} - {self.fournisseur}>"
 
     def to_dict(self):
-        return {
-            "id": self.id,
-            "nom_model": self.nom_model,
-            "type_model": self.type_model.value if self.type_model else None,
-            "fournisseur": self.fournisseur,
-            "api_endpoint": self.api_endpoint,
-            "parametres_default": self.parametres_default,
-            "cout_par_token": self.cout_par_token,
-            "actif": self.actif,
-        }
+        return serialiser(self)
+
+
+enregistrer(ModelIA, {
+    "id": None,
+    "nom_model": None,
+    "type_model": None,
+    "fournisseur": None,
+    "api_endpoint": None,
+    "parametres_default": None,
+    "cout_par_token": None,
+    "actif": None,
+})
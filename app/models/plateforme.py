@@ -49,6 +49,11 @@ class PlateformeConfig(db.Model):
 
 class UtilisateurPlateforme(db.Model):
     __tablename__ = 'utilisateur_plateforme'
+    __table_args__ = (
+        db.Index('ix_utilisateur_plateforme_utilisateur_plateforme', 'utilisateur_id', 'plateforme_id'),
+        # Validateur ETag : count, max(updated_at) et tokens encore valides, lus dans l'index seul
+        db.Index('ix_utilisateur_plateforme_utilisateur_maj', 'utilisateur_id', 'updated_at', 'token_expires_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     utilisateur_id = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), nullable=False)
@@ -58,7 +63,7 @@ class UtilisateurPlateforme(db.Model):
     token_expires_at = db.Column(db.DateTime, nullable=True)
     meta = db.Column(JSON, default={})
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     utilisateur = db.relationship('Utilisateur', backref=db.backref('plateformes', lazy=True))
     plateforme = db.relationship('PlateformeConfig', backref=db.backref('utilisateurs', lazy=True, cascade="all, delete-orphan"))
@@ -103,7 +108,7 @@ class OAuthState(db.Model):
     state = db.Column(db.String(255), unique=True, nullable=False)
     utilisateur_id = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), nullable=False)
     plateforme_id = db.Column(db.Integer, db.ForeignKey('plateforme_config.id', ondelete='CASCADE'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     used = db.Column(db.Boolean, default=False)
 
     utilisateur = db.relationship('Utilisateur', backref=db.backref('oauth_states', lazy=True))
@@ -127,3 +132,12 @@ class OAuthState(db.Model):
     
     def mark_as_used(self):
         self.used = True
+
+
+# Index partiel : seuls les states déjà utilisés (peu nombreux) sont indexés,
+# pour que le nettoyage "utilisés OU expirés" combine deux recherches indexées
+db.Index(
+    'ix_oauth_state_used', OAuthState.used,
+    postgresql_where=OAuthState.used == True,
+    sqlite_where=OAuthState.used == True,
+)
@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.utils.serialisation import enregistrer, serialiser
 from datetime import datetime
 from sqlalchemy import Enum
 import enum
@@ -13,7 +14,7 @@ class Projet(db.Model):
     __tablename__ = "projets"
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'))
+    id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), index=True)
     nom_projet = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(300), nullable=True)
     date_creation = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -25,13 +26,16 @@ class Projet(db.Model):
         return f"<Projet {self.id}: {self.nom_projet} - {self.status}>"
 
     def to_dict(self):
-        return {
-            "id": self.id,
-            "id_utilisateur": self.id_utilisateur,
-            "nom_projet": self.nom_projet,
-            "description": self.description,
-            "date_creation": self.date_creation.isoformat() if self.date_creation else None,
-            "date_modification": self.date_modification.isoformat() if self.date_modification else None,
-            "status": self.status.value if self.status else None,
-            "configuration": self.configuration,
-        }
+        return serialiser(self)
+
+
+enregistrer(Projet, {
+    "id": None,
+    "id_utilisateur": None,
+    "nom_projet": None,
+    "description": None,
+    "date_creation": None,
+    "date_modification": None,
+    "status": None,
+    "configuration": None,
+})
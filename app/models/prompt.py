@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.utils.serialisation import enregistrer, serialiser
 from datetime import datetime
 import json
 
@@ -6,7 +7,7 @@ class Prompt(db.Model):
   __tablename__ = "prompt"
 
   id = db.Column(db.Integer, primary_key=True)
-  id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), nullable = True)
+  id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), nullable = True, index=True)
   nom_prompt = db.Column(db.String(100), nullable=False)
   texte_prompt = db.Column(db.Text, nullable=False)
   parametres = db.Column(db.JSON, nullable=True)
@@ -19,14 +20,17 @@ class Prompt(db.Model):
     return f"<Prompt {self.id}: {self.nom_prompt}>"
   # migration a refaire
   def to_dict(self):
-    return {
-        'id': self.id,
-        'id_utilisateur': self.id_utilisateur,
-        'nom_prompt': self.nom_prompt,
-        'texte_prompt': self.texte_prompt,
-        'parametres': self.parametres,
-        'public': self.public,
-        'utilisation_count': self.utilisation_count,
-        'date_creation': self.date_creation.isoformat() if self.date_creation else None,
-        'date_modification': self.date_modification.isoformat() if self.date_modification else None,
-    }
+    return serialiser(self)
+
+
+enregistrer(Prompt, {
+    'id': None,
+    'id_utilisateur': None,
+    'nom_prompt': None,
+    'texte_prompt': None,
+    'parametres': None,
+    'public': None,
+    'utilisation_count': None,
+    'date_creation': None,
+    'date_modification': None,
+})
@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.utils.serialisation import enregistrer, serialiser
 from datetime import datetime, timezone
 from enum import Enum
 
@@ -11,6 +12,16 @@ class StatutPublicationEnum(Enum):
 
 class Publication(db.Model):
     __tablename__ = 'publications'
+    __table_args__ = (
+        db.Index('ix_publications_utilisateur_date', 'id_utilisateur', 'date_creation', 'id'),
+        db.Index('ix_publications_date_creation', 'date_creation', 'id'),
+        # Publications programmées à échéance (scheduler, statistiques, filtres)
+        db.Index('ix_publications_statut_date_programmee', 'statut', 'date_programmee'),
+        db.Index('ix_publications_id_contenu', 'id_contenu'),
+        # Validateurs ETag (count + max(date_modification)) lus dans l'index seul
+        db.Index('ix_publications_utilisateur_maj', 'id_utilisateur', 'date_modification'),
+        db.Index('ix_publications_date_modification', 'date_modification'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id', ondelete='CASCADE'), nullable=False)
@@ -29,45 +40,85 @@ class Publication(db.Model):
     nombre_partages = db.Column(db.Integer, default=0)
     
     # ✅ FIX : Stocker en UTC sans timezone info (naive datetime en UTC)
-    date_creation = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
-    date_modification = db.Column(db.DateTime, onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    date_creation = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
+    date_modification = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+                                  onupdate=lambda: datetime.now(timezone.utc).replace(tzinfo=None), nullable=False)
     
     contenu = db.relationship("Contenu", backref=db.backref("publications", lazy=True))
     
-    def to_dict(self):
+    def message_a_publier(self):
+        """Texte envoyé à la plateforme : surcharge éventuelle, sinon celui du contenu"""
+        params = self.parametres_publication or {}
+        if params.get('message'):
+            return params['message']
+        if self.contenu:
+            return self.contenu.texte or self.contenu.titre or ""
+        return ""
+
+    def image_a_publier(self):
+        """Image envoyée à la plateforme, résolue au moment de l'envoi.
+
+        'blob:<sha>' pour une image du stockage par empreinte ; le base64 n'est
+        plus recopié dans parametres_publication.
         """
-        Convertit les dates stockées en naive UTC vers aware UTC pour l'API
+        params = self.parametres_publication or {}
+        if params.get('image_url'):
+            return params['image_url']
+        if self.contenu and self.contenu.image_hash:
+            return f"blob:{self.contenu.image_hash}"
+        return self.contenu.image_url if self.contenu else None
+
+    # Colonnes nécessaires à chaque champ de l'API (?fields= -> load_only) ;
+    # "contenu" passe par la relation et n'est chargé que s'il est demandé
+    CHAMPS_API = {
+        'id': ['id'],
+        'id_utilisateur': ['id_utilisateur'],
+        'id_contenu': ['id_contenu'],
+        'plateforme': ['plateforme'],
+        'titre_publication': ['titre_publication'],
+        'statut': ['statut'],
+        'date_programmee': ['date_programmee'],
+        'date_publication': ['date_publication'],
+        'url_publication': ['url_publication'],
+        'id_externe': ['id_externe'],
+        'parametres_publication': ['parametres_publication'],
+        'message_erreur': ['message_erreur'],
+        'nombre_vues': ['nombre_vues'],
+        'nombre_likes': ['nombre_likes'],
+        'nombre_partages': ['nombre_partages'],
+        'date_creation': ['date_creation'],
+        'date_modification': ['date_modification'],
+        'contenu': ['id_contenu'],
+    }
+
+    def to_dict(self, champs=None):
         """
-        def format_date(date_naive):
-            if date_naive:
-                # Si la date est naive, on considère qu'elle est en UTC
-                if date_naive.tzinfo is None:
-                    date_aware = date_naive.replace(tzinfo=timezone.utc)
-                else:
-                    date_aware = date_naive
-                return date_aware.isoformat()
-            return None
-        
-        return {
-            'id': self.id,
-            'id_utilisateur': self.id_utilisateur,
-            'id_contenu': self.id_contenu,
-            'plateforme': self.plateforme,
-            'titre_publication': self.titre_publication,
-            'statut': self.statut.value,
-            'date_programmee': format_date(self.date_programmee),
-            'date_publication': format_date(self.date_publication),
-            'url_publication': self.url_publication,
-            'id_externe': self.id_externe,
-            'parametres_publication': self.parametres_publication,
-            'message_erreur': self.message_erreur,
-            'nombre_vues': self.nombre_vues,
-            'nombre_likes': self.nombre_likes,
-            'nombre_partages': self.nombre_partages,
-            'date_creation': format_date(self.date_creation),
-            'date_modification': format_date(self.date_modification),
-            "contenu": {
-                "texte": self.contenu.texte if self.contenu else None,
-                "image_url": self.contenu.image_url if self.contenu else None
-            }
-        }
\ No newline at end of file
+        Dates stockées en naive UTC, renvoyées en aware UTC (+00:00) pour l'API.
+        `champs` restreint la sortie (voir CHAMPS_API).
+        """
+        return serialiser(self, champs)
+
+
+enregistrer(Publication, {
+    'id': None,
+    'id_utilisateur': None,
+    'id_contenu': None,
+    'plateforme': None,
+    'titre_publication': None,
+    'statut': None,
+    'date_programmee': None,
+    'date_publication': None,
+    'url_publication': None,
+    'id_externe': None,
+    'parametres_publication': None,
+    'message_erreur': None,
+    'nombre_vues': None,
+    'nombre_likes': None,
+    'nombre_partages': None,
+    'date_creation': None,
+    'date_modification': None,
+    'contenu': lambda p: {
+        "texte": p.contenu.texte if p.contenu else None,
+        "image_url": p.contenu.url_image() if p.contenu else None
+    },
+}, dates_utc=True)
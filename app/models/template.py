@@ -1,4 +1,5 @@
 from app.extensions import db
+from app.utils.serialisation import enregistrer, serialiser
 from datetime import datetime
 import json
 
@@ -6,7 +7,7 @@ class Template(db.Model):
     __tablename__ = "templates"
 
     id = db.Column(db.Integer, primary_key=True)
-    id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'))
+    id_utilisateur = db.Column(db.Integer, db.ForeignKey('utilisateurs.id'), index=True)
     nom_template = db.Column(db.String(100), nullable=False)
     structure = db.Column(db.String(300), nullable=False)
     variables = db.Column(db.JSON, nullable=True)
@@ -18,13 +19,16 @@ class Template(db.Model):
         return f"<Template {self.id}: {self.nom_template}>"
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'nom_template': self.nom_template,
-            'structure': self.structure,
-            'variables': self.variables,
-            'type_sortie': self.type_sortie, 
-            'public': self.public,
-            'id_utilisateur': self.id_utilisateur,  
-            'date_creation': self.date_creation.isoformat() if self.date_creation else None,
-        }
\ No newline at end of file
+        return serialiser(self)
+
+
+enregistrer(Template, {
+    'id': None,
+    'nom_template': None,
+    'structure': None,
+    'variables': None,
+    'type_sortie': None,
+    'public': None,
+    'id_utilisateur': None,
+    'date_creation': None,
+})
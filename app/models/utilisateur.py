@@ -38,6 +38,9 @@ def to_dict(self):
 
 class Token(db.Model):
     __tablename__ = "tokens"
+    __table_args__ = (
+        db.Index("ix_tokens_utilisateur_provider", "utilisateur_id", "provider"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     utilisateur_id = db.Column(db.Integer, db.ForeignKey("utilisateurs.id", ondelete="CASCADE"), nullable=False)
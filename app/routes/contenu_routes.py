@@ -29,3 +29,53 @@ def update_contenu(contenu_id):
 @jwt_required()
 def delete_contenu(contenu_id):
     return contenu_controller.delete_contenu(contenu_id)
+
+@contenu_bp.route("/stream", methods=["POST"])
+@jwt_required()
+def create_contenu_stream():
+    return contenu_controller.generer_contenu_stream()
+
+@contenu_bp.route("/jobs", methods=["POST"])
+@jwt_required()
+def create_job_generation():
+    return contenu_controller.creer_job_generation()
+
+@contenu_bp.route("/jobs/stats", methods=["GET"])
+@jwt_required()
+def get_stats_jobs():
+    return contenu_controller.get_stats_jobs()
+
+@contenu_bp.route("/jobs/<string:job_id>", methods=["GET"])
+@jwt_required()
+def get_job_generation(job_id):
+    return contenu_controller.get_job_generation(job_id)
+
+@contenu_bp.route("/cache/stats", methods=["GET"])
+@jwt_required()
+def get_stats_cache():
+    return contenu_controller.get_stats_cache()
+
+@contenu_bp.route("/cache", methods=["DELETE"])
+@jwt_required()
+def vider_cache():
+    return contenu_controller.vider_cache()
+
+@contenu_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def create_contenus_batch():
+    return contenu_controller.generer_contenus_batch()
+
+@contenu_bp.route("/coalescence/stats", methods=["GET"])
+@jwt_required()
+def get_stats_coalescence():
+    return contenu_controller.get_stats_coalescence()
+
+@contenu_bp.route("/<int:contenu_id>/image", methods=["GET"])
+@jwt_required()
+def get_contenu_image(contenu_id):
+    return contenu_controller.get_contenu_image(contenu_id)
+
+@contenu_bp.route("/images/stats", methods=["GET"])
+@jwt_required()
+def get_stats_images():
+    return contenu_controller.get_stats_images()
@@ -0,0 +1,10 @@
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+from app.controllers import export_controller
+
+export_bp = Blueprint("export_bp", __name__, url_prefix="/export")
+
+@export_bp.route("/<string:type_export>", methods=["GET"])
+@jwt_required()
+def exporter_route(type_export):
+    return export_controller.exporter(type_export)
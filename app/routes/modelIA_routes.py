@@ -44,4 +44,24 @@ def get_active_models_route():
 @modelIA_bp.route("/stats", methods=["GET"])
 @jwt_required()
 def get_models_stats_route():
-    return modelIA_controller.get_models_stats()
\ No newline at end of file
+    return modelIA_controller.get_models_stats()
+
+@modelIA_bp.route("/pool/stats", methods=["GET"])
+@jwt_required()
+def get_provider_pool_stats_route():
+    return modelIA_controller.get_provider_pool_stats()
+
+@modelIA_bp.route("/providers/stats", methods=["GET"])
+@jwt_required()
+def get_providers_stats_route():
+    return modelIA_controller.get_providers_stats()
+
+@modelIA_bp.route("/circuits", methods=["GET"])
+@jwt_required()
+def get_circuits_route():
+    return modelIA_controller.get_circuits()
+
+@modelIA_bp.route("/circuits/<string:nom>/reset", methods=["POST"])
+@jwt_required()
+def reset_circuit_route(nom):
+    return modelIA_controller.reset_circuit(nom=nom)
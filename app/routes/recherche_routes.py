@@ -0,0 +1,10 @@
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+from app.controllers import recherche_controller
+
+recherche_bp = Blueprint("recherche_bp", __name__, url_prefix="/recherche")
+
+@recherche_bp.route("/", methods=["GET"], strict_slashes=False)
+@jwt_required()
+def rechercher_route():
+    return recherche_controller.rechercher()
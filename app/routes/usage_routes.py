@@ -0,0 +1,25 @@
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+from app.controllers import usage_controller
+
+usage_bp = Blueprint("usage_bp", __name__, url_prefix="/usage")
+
+@usage_bp.route("/", methods=["GET"], strict_slashes=False)
+@jwt_required()
+def get_usage_route():
+    return usage_controller.get_usage()
+
+@usage_bp.route("/utilisateurs", methods=["GET"])
+@jwt_required()
+def get_usage_par_utilisateur_route():
+    return usage_controller.get_usage_par_utilisateur()
+
+@usage_bp.route("/modeles", methods=["GET"])
+@jwt_required()
+def get_usage_par_modele_route():
+    return usage_controller.get_usage_par_modele()
+
+@usage_bp.route("/jours", methods=["GET"])
+@jwt_required()
+def get_usage_par_jour_route():
+    return usage_controller.get_usage_par_jour()
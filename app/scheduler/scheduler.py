@@ -1,5 +1,6 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.jobstores.memory import MemoryJobStore
 from flask import current_app
 from datetime import datetime, timezone
 import logging
@@ -14,7 +15,9 @@ class PublicationScheduler:
     def init_app(self, app):
         """Initialiser le scheduler avec l'application Flask"""
         jobstores = {
-            'default': SQLAlchemyJobStore(url=app.config.get('SQLALCHEMY_DATABASE_URI'))
+            'default': SQLAlchemyJobStore(url=app.config.get('SQLALCHEMY_DATABASE_URI')),
+            # Tâches internes propres à chaque processus (non persistées)
+            'memoire': MemoryJobStore()
         }
         
         self.scheduler = BackgroundScheduler(
@@ -77,9 +80,9 @@ class PublicationScheduler:
                     return
                 
                 # Publier
-                params = publication.parametres_publication or {}
-                message = params.get('message', '')
-                image_url = params.get('image_url')
+                # Texte et image résolus à l'envoi depuis le contenu (ou les surcharges)
+                message = publication.message_a_publier()
+                image_url = publication.image_a_publier()
                 
                 url_publication, tweet_id, result = publish_to_x_api(
                     message,
@@ -0,0 +1,107 @@
+from app.utils.images import detecter_mime, dimensions_image, decoder_data_uri, taille_base64, morceaux_base64
+import hashlib
+import os
+import re
+import tempfile
+
+
+RACINE_PAR_DEFAUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads", "images")
+
+# Empreinte SHA-256 hexadécimale : seule forme acceptée pour construire un chemin
+SHA_VALIDE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """Stockage des images adressé par contenu : le fichier est nommé par son
+    SHA-256, une image identique n'est donc écrite qu'une fois. La base ne
+    garde que l'empreinte et les métadonnées (mime, dimensions, taille)."""
+
+    def __init__(self, racine=None):
+        self.racine = racine or os.getenv("IMAGE_STORE_DIR", RACINE_PAR_DEFAUT)
+
+    def chemin(self, sha: str) -> str:
+        """Chemin du fichier d'une empreinte. Lève ValueError si `sha` n'est pas un
+        SHA-256 hexadécimal (pas de ../ ni de chemin absolu hors de la racine)"""
+        if not isinstance(sha, str) or not SHA_VALIDE.match(sha):
+            raise ValueError("Empreinte d'image invalide")
+        return os.path.join(self.racine, sha[:2], sha)
+
+    def existe(self, sha: str) -> bool:
+        return os.path.isfile(self.chemin(sha))
+
+    def lire(self, sha: str) -> bytes:
+        with open(self.chemin(sha), "rb") as f:
+            return f.read()
+
+    def enregistrer(self, octets: bytes, mime: str = None) -> dict:
+        """Écrit les octets (si absents) et renvoie les métadonnées à stocker sur la ligne"""
+        sha = hashlib.sha256(octets).hexdigest()
+        chemin = self.chemin(sha)
+
+        if not os.path.isfile(chemin):
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            # Écriture atomique : fichier temporaire puis renommage
+            fd, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(octets)
+                os.replace(temporaire, chemin)
+            except Exception:
+                if os.path.exists(temporaire):
+                    os.remove(temporaire)
+                raise
+
+        largeur, hauteur = dimensions_image(octets)
+        return {
+            "image_hash": sha,
+            "image_mime": detecter_mime(octets) or mime or "application/octet-stream",
+            "image_largeur": largeur,
+            "image_hauteur": hauteur,
+            "image_taille": len(octets),
+        }
+
+    def enregistrer_data_uri(self, data_uri: str) -> dict:
+        mime, octets = decoder_data_uri(data_uri)
+        return self.enregistrer(octets, mime)
+
+    def reference(self, sha: str) -> str:
+        """Référence légère stockée à la place du base64 (ex. parametres_publication)"""
+        return f"blob:{sha}"
+
+    def resoudre(self, image: str):
+        """'blob:<sha>' ou data URI -> (mime, octets)"""
+        if image.startswith("blob:"):
+            octets = self.lire(image[len("blob:"):])
+            return detecter_mime(octets) or "application/octet-stream", octets
+        return decoder_data_uri(image)
+
+    def flux(self, image: str, taille_morceau: int):
+        """'blob:<sha>' ou data URI -> (mime, taille totale, itérateur de morceaux).
+
+        Ni le fichier ni le base64 ne sont décodés d'un bloc : chaque morceau
+        est lu (ou décodé) au moment où il est consommé.
+        """
+        if image.startswith("blob:"):
+            chemin = self.chemin(image[len("blob:"):])
+            with open(chemin, "rb") as f:
+                mime = detecter_mime(f.read(32)) or "application/octet-stream"
+
+            def morceaux():
+                with open(chemin, "rb") as f:
+                    while True:
+                        morceau = f.read(taille_morceau)
+                        if not morceau:
+                            break
+                        yield morceau
+
+            return mime, os.path.getsize(chemin), morceaux()
+
+        if not image.startswith("data:") or "," not in image:
+            raise ValueError("Data URI invalide")
+        virgule = image.index(",")
+        mime = image[len("data:"):virgule].split(";")[0] or "application/octet-stream"
+        return mime, taille_base64(image, virgule + 1), morceaux_base64(image, taille_morceau, virgule + 1)
+
+
+# Instance globale
+blob_store = BlobStore()
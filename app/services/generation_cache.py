@@ -0,0 +1,111 @@
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+import os
+
+
+def _activee(valeur):
+    return str(valeur).lower() in ["1", "true", "yes", "oui"]
+
+
+def empreinte_images(images: list = None) -> list:
+    """Empreintes SHA-256 des images d'entrée (base64 ou URL)"""
+    empreintes = []
+    for img in images or []:
+        source = img.get("base64") or img.get("url") or ""
+        empreintes.append(hashlib.sha256(source.encode("utf-8")).hexdigest())
+    return empreintes
+
+
+def cle_generation(model_id, prompt_text: str, temperature, max_tokens, images: list = None) -> str:
+    """Clé déterministe d'une génération : prompt résolu, modèle, paramètres et images"""
+    donnees = {
+        "model": model_id,
+        "prompt": prompt_text,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "images": empreinte_images(images),
+    }
+    return hashlib.sha256(json.dumps(donnees, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Cache LRU en mémoire des résultats de génération, borné en entrées et en octets, avec TTL"""
+
+    def __init__(self):
+        self.active = _activee(os.getenv("GENERATION_CACHE_ENABLED", "false"))
+        self.ttl = int(os.getenv("GENERATION_CACHE_TTL", 3600))
+        self.max_entrees = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", 500))
+        self.max_octets = int(os.getenv("GENERATION_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+        self._lock = threading.Lock()
+        self._entrees = OrderedDict()
+        self._octets = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypass = 0
+
+    def get(self, cle):
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.misses += 1
+                return None
+            expire_a, taille, resultat = entree
+            if expire_a < time.monotonic():
+                self._retirer(cle)
+                self.misses += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return dict(resultat)
+
+    def set(self, cle, resultat: dict):
+        taille = len(resultat.get("content") or "")
+        if taille > self.max_octets:
+            return
+        with self._lock:
+            if cle in self._entrees:
+                self._retirer(cle)
+            self._entrees[cle] = (time.monotonic() + self.ttl, taille, dict(resultat))
+            self._octets += taille
+            while self._entrees and (len(self._entrees) > self.max_entrees or self._octets > self.max_octets):
+                ancienne = next(iter(self._entrees))
+                self._retirer(ancienne)
+                self.evictions += 1
+
+    def _retirer(self, cle):
+        _, taille, _ = self._entrees.pop(cle)
+        self._octets -= taille
+
+    def compter_bypass(self):
+        with self._lock:
+            self.bypass += 1
+
+    def vider(self):
+        with self._lock:
+            self._entrees.clear()
+            self._octets = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "active": self.active,
+                "entrees": len(self._entrees),
+                "octets": self._octets,
+                "max_entrees": self.max_entrees,
+                "max_octets": self.max_octets,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bypass": self.bypass,
+                "taux_hit": round(self.hits / total, 3) if total else None,
+            }
+
+
+# Instance globale
+generation_cache = GenerationCache()
@@ -0,0 +1,225 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import threading
+import os
+
+
+class GenerationJobQueue:
+    """File de génération en arrière-plan.
+
+    Les jobs sont persistés dans la table generation_jobs : le thread web
+    enregistre le job et rend la main, un pool borné de workers exécute
+    la génération puis écrit le Contenu.
+
+    Chaque job en file ou en cours porte un bail (bail_expire) que le
+    processus qui le détient renouvelle toutes les GENERATION_JOB_LEASE/3
+    secondes. Un balayage périodique (scheduler, toutes les
+    GENERATION_JOB_SWEEP secondes, et au démarrage) remet en file les jobs
+    dont le bail a expiré : processus arrêté brutalement, quel que soit le
+    délai avant son redémarrage.
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        self.executor = None
+        self.max_workers = int(os.getenv("GENERATION_WORKERS", 4))
+        self.max_en_file = int(os.getenv("GENERATION_QUEUE_MAX", 100))
+        self.timeout_en_cours = timedelta(seconds=int(os.getenv("GENERATION_JOB_TIMEOUT", 600)))
+        self.duree_bail = timedelta(seconds=int(os.getenv("GENERATION_JOB_LEASE", 60)))
+        self.periode_balayage = int(os.getenv("GENERATION_JOB_SWEEP", 15))
+        self._lock = threading.Lock()
+        self._en_file = 0
+        self._detenus = set()
+        self._arret = threading.Event()
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Initialiser le pool de workers avec l'application Flask"""
+        self.app = app
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="generation"
+        )
+        threading.Thread(target=self._renouveler_baux, name="generation-bail", daemon=True).start()
+        app.logger.info(f"File de génération initialisée ({self.max_workers} workers)")
+
+    def planifier_balayage(self, scheduler):
+        """Balayage périodique des baux expirés (magasin mémoire : propre à chaque processus)"""
+        if not scheduler or not scheduler.scheduler:
+            self.app.logger.warning("Scheduler indisponible : jobs de génération repris au démarrage seulement")
+            return
+        scheduler.scheduler.add_job(
+            func=self.balayer,
+            trigger='interval',
+            seconds=self.periode_balayage,
+            id='generation_jobs_balayage',
+            jobstore='memoire',
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1
+        )
+
+    def nouveau_bail(self):
+        return datetime.utcnow() + self.duree_bail
+
+    def profondeur(self):
+        """Nombre de jobs soumis à ce processus et pas encore terminés"""
+        with self._lock:
+            return self._en_file
+
+    def est_pleine(self):
+        return self.profondeur() >= self.max_en_file
+
+    def soumettre(self, job_id):
+        """Met un job déjà persisté dans la file d'exécution"""
+        if not self.executor:
+            raise RuntimeError("File de génération non initialisée")
+        with self._lock:
+            self._en_file += 1
+            self._detenus.add(job_id)
+        self.executor.submit(self._executer, job_id)
+
+    def reprendre_jobs(self):
+        """Au démarrage : remet en file les jobs abandonnés par un précédent processus"""
+        self.balayer()
+
+    def _renouveler_baux(self):
+        """Battement de cœur : repousse le bail des jobs détenus par ce processus"""
+        from app.models.generation_job import GenerationJob, StatutJobEnum
+        from app.extensions import db
+
+        while not self._arret.wait(self.duree_bail.total_seconds() / 3):
+            with self._lock:
+                job_ids = list(self._detenus)
+            if not job_ids:
+                continue
+            try:
+                with self.app.app_context():
+                    GenerationJob.query.filter(
+                        GenerationJob.id.in_(job_ids),
+                        GenerationJob.statut.in_([StatutJobEnum.en_attente, StatutJobEnum.en_cours])
+                    ).update({"bail_expire": self.nouveau_bail()}, synchronize_session=False)
+                    db.session.commit()
+            except Exception as e:
+                self.app.logger.error(f"Renouvellement des baux de génération: {str(e)}")
+
+    def balayer(self):
+        """Remet en file les jobs dont le bail a expiré (processus disparu).
+
+        Sans bail (jobs antérieurs à la colonne), l'ancien critère d'âge
+        s'applique. La réservation de _executer_job reste atomique : si deux
+        processus reprennent le même job, un seul l'exécute.
+        """
+        from app.models.generation_job import GenerationJob, StatutJobEnum
+        from app.extensions import db
+        from sqlalchemy import or_, and_
+
+        places = self.max_en_file - self.profondeur()
+        if places <= 0:
+            return
+
+        with self.app.app_context():
+            maintenant = datetime.utcnow()
+            abandonne = and_(
+                GenerationJob.statut.in_([StatutJobEnum.en_attente, StatutJobEnum.en_cours]),
+                or_(
+                    GenerationJob.bail_expire < maintenant,
+                    and_(GenerationJob.bail_expire.is_(None),
+                         GenerationJob.date_creation < maintenant - self.timeout_en_cours)
+                )
+            )
+            with self._lock:
+                detenus = list(self._detenus)
+            requete = db.session.query(GenerationJob.id).filter(abandonne)
+            if detenus:
+                requete = requete.filter(GenerationJob.id.notin_(detenus))
+            job_ids = [job_id for (job_id,) in requete.order_by(GenerationJob.date_creation).limit(places)]
+            if not job_ids:
+                return
+
+            GenerationJob.query.filter(GenerationJob.id.in_(job_ids), abandonne).update(
+                {"statut": StatutJobEnum.en_attente, "date_debut": None, "bail_expire": self.nouveau_bail()},
+                synchronize_session=False
+            )
+            db.session.commit()
+
+        for job_id in job_ids:
+            self.soumettre(job_id)
+        self.app.logger.info(f"{len(job_ids)} job(s) de génération repris (bail expiré)")
+
+    def shutdown(self):
+        self._arret.set()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _executer(self, job_id):
+        try:
+            with self.app.app_context():
+                self._executer_job(job_id)
+        except Exception as e:
+            self.app.logger.error(f"Erreur job de génération {job_id}: {str(e)}", exc_info=True)
+        finally:
+            with self._lock:
+                self._en_file -= 1
+                self._detenus.discard(job_id)
+
+    def _executer_job(self, job_id):
+        from app.models.generation_job import GenerationJob, StatutJobEnum
+        from app.models.utilisateur import Utilisateur
+        from app.extensions import db
+        from app.controllers.contenu_controller import (
+            resoudre_generation, generer_resultat, construire_contenu, contenu_genere_payload
+        )
+        from app.services.usage import construire_usage
+
+        # Réservation atomique : un seul worker (ou processus) exécute le job
+        reserve = GenerationJob.query.filter_by(
+            id=job_id, statut=StatutJobEnum.en_attente
+        ).update({"statut": StatutJobEnum.en_cours, "date_debut": datetime.utcnow(),
+                  "bail_expire": self.nouveau_bail()}, synchronize_session=False)
+        db.session.commit()
+        if not reserve:
+            return
+
+        job = GenerationJob.query.get(job_id)
+
+        def echec(message):
+            job.statut = StatutJobEnum.echec
+            job.message_erreur = message
+            job.date_fin = datetime.utcnow()
+            db.session.commit()
+
+        try:
+            utilisateur = Utilisateur.query.get(job.id_utilisateur)
+            if not utilisateur:
+                return echec("Utilisateur non trouvé")
+
+            contexte, erreur = resoudre_generation(job.payload)
+            if erreur:
+                return echec(erreur[0].get_json().get("error"))
+
+            resultat = generer_resultat(contexte, bypass_cache=bool(job.payload.get("bypass_cache")))
+            resultat["attente_ms"] = job.duree_attente_ms()
+            if resultat["type"] == "error":
+                db.session.add(construire_usage(utilisateur.id, contexte, resultat, mode="job"))
+                return echec(resultat["content"])
+
+            contenu = construire_contenu(utilisateur, job.payload, contexte, resultat)
+            db.session.add(contenu)
+            db.session.flush()
+            db.session.add(construire_usage(utilisateur.id, contexte, resultat, mode="job", id_contenu=contenu.id))
+
+            job.id_contenu = contenu.id
+            job.resultat = contenu_genere_payload(contenu)
+            job.statut = StatutJobEnum.termine
+            job.date_fin = datetime.utcnow()
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            echec(str(e))
+
+
+# Instance globale
+generation_queue = GenerationJobQueue()
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.services.blob_store import blob_store
+import threading
+import os
+import io
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow optionnel : sans lui, les vues renvoient l'original
+    Image = None
+    ImageOps = None
+
+
+def _taille(variable, defaut):
+    return int(os.getenv(variable, defaut))
+
+
+class ImageDerivatives:
+    """Miniatures et aperçus WebP générés en arrière-plan après stockage d'une image.
+
+    Les dérivés sont écrits à côté de l'original (<sha>.<variante>.webp) ; tant
+    qu'ils n'existent pas, l'endpoint image sert l'original.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.executor = None
+        self.max_workers = int(os.getenv("IMAGE_WORKERS", 2))
+        self.variantes = {
+            "miniature": (_taille("IMAGE_THUMB_SIZE", 256), int(os.getenv("IMAGE_THUMB_QUALITY", 75))),
+            "apercu": (_taille("IMAGE_PREVIEW_SIZE", 1024), int(os.getenv("IMAGE_PREVIEW_QUALITY", 82))),
+        }
+        self._lock = threading.Lock()
+        self._en_cours = set()
+        self.generes = 0
+        self.erreurs = 0
+
+    @property
+    def disponible(self):
+        return Image is not None
+
+    def init_app(self, app):
+        self.app = app
+        if not self.disponible:
+            app.logger.warning("Pillow absent : miniatures et aperçus désactivés")
+            return
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="images")
+
+    def chemin(self, sha: str, variante: str) -> str:
+        return f"{blob_store.chemin(sha)}.{variante}.webp"
+
+    def existe(self, sha: str, variante: str) -> bool:
+        return os.path.isfile(self.chemin(sha, variante))
+
+    def planifier(self, sha: str):
+        """Met en file la génération des dérivés manquants (sans effet si déjà en cours)"""
+        if not self.executor or not sha:
+            return
+        if all(self.existe(sha, v) for v in self.variantes):
+            return
+        with self._lock:
+            if sha in self._en_cours:
+                return
+            self._en_cours.add(sha)
+        self.executor.submit(self._generer, sha)
+
+    def _generer(self, sha: str):
+        try:
+            with Image.open(blob_store.chemin(sha)) as original:
+                try:
+                    original = ImageOps.exif_transpose(original)
+                except Exception:
+                    pass
+                if original.mode not in ("RGB", "RGBA"):
+                    original = original.convert("RGBA")
+                for variante, (taille, qualite) in self.variantes.items():
+                    if self.existe(sha, variante):
+                        continue
+                    image = original.copy()
+                    image.thumbnail((taille, taille))
+                    tampon = io.BytesIO()
+                    image.save(tampon, format="WEBP", quality=qualite, method=4)
+                    chemin = self.chemin(sha, variante)
+                    temporaire = f"{chemin}.tmp-{threading.get_ident()}"
+                    with open(temporaire, "wb") as f:
+                        f.write(tampon.getvalue())
+                    os.replace(temporaire, chemin)
+            with self._lock:
+                self.generes += 1
+        except Exception as e:
+            with self._lock:
+                self.erreurs += 1
+            if self.app:
+                self.app.logger.error(f"Erreur génération dérivés {sha[:12]}: {str(e)}")
+        finally:
+            with self._lock:
+                self._en_cours.discard(sha)
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "disponible": self.disponible,
+                "workers": self.max_workers if self.executor else 0,
+                "en_cours": len(self._en_cours),
+                "generes": self.generes,
+                "erreurs": self.erreurs,
+                "variantes": {v: {"taille": t, "qualite": q} for v, (t, q) in self.variantes.items()},
+            }
+
+
+# Instance globale
+image_derivatives = ImageDerivatives()
@@ -0,0 +1,99 @@
+from app.utils.images import detecter_mime
+import os
+import io
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow optionnel : sans lui, les images sont stockées telles quelles
+    Image = None
+    ImageOps = None
+
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+
+
+class ImageTranscoder:
+    """Ré-encode les images reçues des modèles avant stockage.
+
+    Les modèles renvoient le plus souvent du PNG non compressé : on le convertit
+    au format configuré (IMAGE_INGEST_FORMAT, 'original' pour désactiver) sans
+    recopier EXIF/ICC/texte. Si le résultat n'est pas plus léger, l'original est
+    conservé. Les GIF animés et les vidéos ne sont jamais ré-encodés.
+    """
+
+    def __init__(self):
+        self.format = os.getenv("IMAGE_INGEST_FORMAT", "webp").lower()
+        self.qualite = int(os.getenv("IMAGE_INGEST_QUALITY", 82))
+
+    @property
+    def disponible(self):
+        return Image is not None and self.format in FORMATS
+
+    def transcoder(self, octets: bytes, mime_declare: str = None):
+        """octets -> (octets, mime, rapport). Lève ValueError si ce n'est pas une image"""
+        mime = detecter_mime(octets)
+        if not mime or not mime.startswith("image/"):
+            raise ValueError(f"Signature d'image non reconnue (déclaré: {mime_declare})")
+
+        rapport = {
+            "mime_origine": mime,
+            "octets_origine": len(octets),
+            "mime": mime,
+            "octets": len(octets),
+            "transcode": False,
+        }
+        if not self.disponible:
+            return octets, mime, rapport
+
+        try:
+            with Image.open(io.BytesIO(octets)) as image:
+                if getattr(image, "n_frames", 1) > 1:
+                    return octets, mime, rapport
+                try:
+                    image = ImageOps.exif_transpose(image)
+                except Exception:
+                    pass  # EXIF illisible : orientation ignorée, il ne sera pas recopié de toute façon
+                resultat = self._encoder(image)
+        except (OSError, Image.DecompressionBombError) as e:
+            raise ValueError(f"Image illisible: {str(e)}")
+
+        if len(resultat) >= len(octets):
+            return octets, mime, rapport
+
+        nouveau_mime = FORMATS[self.format][1]
+        rapport.update({"mime": nouveau_mime, "octets": len(resultat), "transcode": True})
+        return resultat, nouveau_mime, rapport
+
+    def _encoder(self, image) -> bytes:
+        format_pil, _ = FORMATS[self.format]
+        if format_pil == "JPEG":
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                fond = Image.new("RGB", image.size, (255, 255, 255))
+                fond.paste(image, mask=image.getchannel("A"))
+                image = fond
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            options = {"quality": self.qualite, "optimize": True, "progressive": True}
+        elif format_pil == "WEBP":
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+            options = {"quality": self.qualite, "method": 4}
+        else:
+            options = {"optimize": True}
+
+        tampon = io.BytesIO()
+        # Aucun exif/icc_profile/pnginfo transmis : les métadonnées ne sont pas recopiées
+        image.save(tampon, format=format_pil, **options)
+        return tampon.getvalue()
+
+    def stats(self):
+        return {"disponible": self.disponible, "format": self.format, "qualite": self.qualite}
+
+
+# Instance globale
+image_transcoder = ImageTranscoder()
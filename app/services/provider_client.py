@@ -0,0 +1,161 @@
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib.parse import urlsplit
+import requests
+import threading
+import os
+
+
+class PoolMetrics:
+    """Compteurs de réutilisation des connexions, par hôte"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hotes = {}
+
+    def _hote(self, hote):
+        return self._hotes.setdefault(hote, {"requetes": 0, "connexions_creees": 0})
+
+    def checkout(self, hote):
+        with self._lock:
+            self._hote(hote)["requetes"] += 1
+
+    def nouvelle_connexion(self, hote):
+        with self._lock:
+            self._hote(hote)["connexions_creees"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = {}
+            for hote, c in self._hotes.items():
+                reutilisations = max(c["requetes"] - c["connexions_creees"], 0)
+                stats[hote] = {
+                    "requetes": c["requetes"],
+                    "connexions_creees": c["connexions_creees"],
+                    "reutilisations": reutilisations,
+                    "taux_reutilisation": round(reutilisations / c["requetes"], 3) if c["requetes"] else None,
+                }
+            return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+class _InstrumentedMixin:
+    def _get_conn(self, timeout=None):
+        pool_metrics.checkout(self.host)
+        return super()._get_conn(timeout=timeout)
+
+    def _new_conn(self):
+        pool_metrics.nouvelle_connexion(self.host)
+        return super()._new_conn()
+
+
+class InstrumentedHTTPConnectionPool(_InstrumentedMixin, HTTPConnectionPool):
+    pass
+
+
+class InstrumentedHTTPSConnectionPool(_InstrumentedMixin, HTTPSConnectionPool):
+    pass
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": InstrumentedHTTPConnectionPool,
+            "https": InstrumentedHTTPSConnectionPool,
+        }
+
+
+class ProviderClient:
+    """Client HTTP partagé pour les appels aux fournisseurs IA.
+
+    Une Session par hôte garde les connexions HTTP/1.1 ouvertes (keep-alive)
+    entre les requêtes et les threads ; chaque fournisseur a un plafond de
+    requêtes simultanées et des timeouts de connexion et de lecture séparés.
+    """
+
+    def __init__(self):
+        self.pool_size = int(os.getenv("PROVIDER_POOL_SIZE", 10))
+        self.connect_timeout = float(os.getenv("PROVIDER_CONNECT_TIMEOUT", 5))
+        self.read_timeout = float(os.getenv("PROVIDER_READ_TIMEOUT", 60))
+        self.max_concurrent = int(os.getenv("PROVIDER_MAX_CONCURRENT", 10))
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._semaphores = {}
+        self._en_cours = {}
+
+    def _session(self, url):
+        hote = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(hote)
+            if session is None:
+                session = requests.Session()
+                adapter = InstrumentedAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_size,
+                    pool_block=True
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[hote] = session
+            return session
+
+    def _semaphore(self, fournisseur):
+        with self._lock:
+            semaphore = self._semaphores.get(fournisseur)
+            if semaphore is None:
+                limite = int(os.getenv(f"PROVIDER_MAX_CONCURRENT_{fournisseur.upper()}", self.max_concurrent))
+                semaphore = threading.BoundedSemaphore(limite)
+                self._semaphores[fournisseur] = semaphore
+                self._en_cours[fournisseur] = {"en_cours": 0, "max": limite}
+            return semaphore
+
+    def _compter(self, fournisseur, delta):
+        with self._lock:
+            self._en_cours[fournisseur]["en_cours"] += delta
+
+    def timeout(self, read_timeout=None):
+        """(connexion, lecture) ; la connexion n'attend jamais plus que la lecture autorisée"""
+        lecture = read_timeout or self.read_timeout
+        return (min(self.connect_timeout, lecture), lecture)
+
+    @contextmanager
+    def _slot(self, fournisseur):
+        semaphore = self._semaphore(fournisseur)
+        with semaphore:
+            self._compter(fournisseur, 1)
+            try:
+                yield
+            finally:
+                self._compter(fournisseur, -1)
+
+    def post(self, fournisseur, url, read_timeout=None, **kwargs):
+        """POST via le pool de l'hôte, dans la limite de concurrence du fournisseur"""
+        kwargs.setdefault("timeout", self.timeout(read_timeout))
+        with self._slot(fournisseur):
+            return self._session(url).post(url, **kwargs)
+
+    @contextmanager
+    def stream(self, fournisseur, url, read_timeout=None, **kwargs):
+        """POST en streaming : le créneau de concurrence est tenu jusqu'à la fin du flux"""
+        kwargs.setdefault("timeout", self.timeout(read_timeout))
+        with self._slot(fournisseur):
+            with self._session(url).post(url, stream=True, **kwargs) as response:
+                yield response
+
+    def stats(self):
+        with self._lock:
+            concurrence = {f: dict(c) for f, c in self._en_cours.items()}
+        return {
+            "pool_size": self.pool_size,
+            "timeouts": {"connexion": self.connect_timeout, "lecture": self.read_timeout},
+            "hotes": pool_metrics.snapshot(),
+            "fournisseurs": concurrence,
+        }
+
+
+# Instance globale
+provider_client = ProviderClient()
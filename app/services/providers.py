@@ -0,0 +1,443 @@
+from app.services.provider_client import provider_client
+from app.utils.images import mime_base64
+from app.services.resilience import RetryPolicy, Reessai, circuit_breakers, lire_retry_after, STATUTS_REESSAYABLES
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+from typing import Optional
+import requests
+import threading
+import json
+import time
+import os
+import re
+
+
+def is_valid_base64_image(content: str) -> bool:
+    """Vérifie, d'après la signature des premiers octets, que le contenu (data URI ou base64 brut) est une image"""
+    debut = content.find(",") + 1 if content.startswith("data:") else 0
+    mime = mime_base64(content, debut)
+    return bool(mime and mime.startswith("image/"))
+
+
+def extract_image_from_markdown(content: str) -> Optional[str]:
+    """Extrait une image base64 depuis un format markdown"""
+    patterns = [
+        r'!\[.*?\]\((data:image/[^)]+)\)',
+        r'\[.*?\]\((data:image/[^)]+)\)',
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, content)
+        if match:
+            return match.group(1)
+    return None
+
+
+def detecter_type_resultat(content: str) -> dict:
+    """Détecte si la réponse du modèle est une image (markdown, data URI, base64, URL) ou du texte"""
+    # Détection d'image markdown
+    markdown_image = extract_image_from_markdown(content)
+    if markdown_image and is_valid_base64_image(markdown_image):
+        print(f"Image markdown détectée")
+        return {"type": "image", "content": markdown_image}
+
+    # Détection data URI
+    if content.startswith("data:image/") and is_valid_base64_image(content):
+        print(f" Data URI détectée")
+        return {"type": "image", "content": content}
+
+    # Détection base64 brute
+    brut = content.strip()
+    mime = mime_base64(brut) if len(brut) > 1000 else None
+    if mime and mime.startswith("image/"):
+        print(f"Image base64 brute détectée ({mime})")
+        return {"type": "image", "content": f"data:{mime};base64,{brut}"}
+
+    # Détection URL d'image
+    if content.startswith("http") and any(ext in content.lower() for ext in ['.jpg', '.png', '.jpeg', '.webp', '.gif']):
+        print(f" URL d'image détectée")
+        return {"type": "image", "content": content}
+
+    return {"type": "text", "content": content}
+
+
+def prepare_multimodal_content(prompt_text: str, images: list = None):
+    """Prépare le payload multimodal pour l'API"""
+    content = [{"type": "text", "text": prompt_text}] if prompt_text else []
+
+    if images:
+        for img in images:
+            if "url" in img:
+                content.append({
+                    "type": "image_url",
+                    "image_url": {"url": img["url"]}
+                })
+            elif "base64" in img:
+                mime_type = img.get("mime_type", "image/jpeg")
+                content.append({
+                    "type": "image_url",
+                    "image_url": {"url": f"data:{mime_type};base64,{img['base64']}"}
+                })
+
+    return content
+
+
+class ChatCompletionsAdapter:
+    """Adaptateur pour une API compatible OpenAI /v1/chat/completions.
+
+    Chaque adaptateur déclare ses capacités, son coût par défaut et son
+    timeout de lecture ; les sous-classes ne redéfinissent que ce qui diffère.
+    """
+
+    nom = "chat"
+    url = None
+    url_env = None
+    api_key_env = None
+    hote = None
+    capacites = ("text",)
+    cout_par_token_defaut = 0.0
+    read_timeout = 60
+    max_tentatives = 3
+    stream_usage = True
+    libelle_erreur = "Erreur"
+
+    def api_key(self):
+        return os.getenv(self.api_key_env) if self.api_key_env else None
+
+    def endpoint(self):
+        """URL de l'API, surchargeable par variable d'environnement (ex. serveur factice local)"""
+        return (os.getenv(self.url_env) if self.url_env else None) or self.url
+
+    def supporte(self, capacite: str) -> bool:
+        return capacite in self.capacites
+
+    def payload(self, model_name, prompt_text, temperature, max_tokens, images=None, stream=False):
+        if images and len(images) > 0 and self.supporte("multimodal"):
+            messages = [{"role": "user", "content": prepare_multimodal_content(prompt_text, images)}]
+        else:
+            messages = [{"role": "user", "content": prompt_text}]
+        payload = {
+            "model": model_name,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if stream:
+            payload["stream"] = True
+            if self.stream_usage:
+                payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    def headers(self, api_key):
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def resultat_final(self, content: str) -> dict:
+        return {"type": "text", "content": content}
+
+    def politique(self):
+        return RetryPolicy(max_tentatives=self.max_tentatives)
+
+    def disjoncteur(self):
+        return circuit_breakers.pour(self.nom)
+
+    def tentative(self, headers, payload, restant=None):
+        """Une tentative HTTP, bornée par le temps `restant` avant l'échéance : renvoie (resultat, Reessai | None)"""
+        read_timeout = min(self.read_timeout, restant) if restant is not None else self.read_timeout
+        try:
+            debut = time.perf_counter()
+            response = provider_client.post(self.hote, self.endpoint(), read_timeout=read_timeout,
+                                            headers=headers, json=payload)
+            reseau_ms = int((time.perf_counter() - debut) * 1000)
+
+            if not response.text or response.text.strip() == "":
+                return {"type": "error", "content": f"Réponse vide de l'API ({self.nom})"}, Reessai()
+
+            if response.status_code in STATUTS_REESSAYABLES:
+                return {"type": "error", "content": f"{self.libelle_erreur} HTTP {response.status_code}: {response.text[:500]}"}, \
+                    Reessai(lire_retry_after(response))
+
+            response.raise_for_status()
+            debut = time.perf_counter()
+            data = response.json()
+            resultat = self.resultat_final(data["choices"][0]["message"]["content"])
+            resultat["usage"] = data.get("usage")
+            resultat["metrics"] = {"reseau_ms": reseau_ms, "parse_ms": int((time.perf_counter() - debut) * 1000)}
+            return resultat, None
+
+        except requests.exceptions.HTTPError as e:
+            return {"type": "error", "content": f"{self.libelle_erreur} HTTP {e.response.status_code}: {e.response.text[:500]}"}, None
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            return {"type": "error", "content": f"{self.libelle_erreur}: {str(e)}"}, Reessai()
+        except ValueError as e:
+            print(f"❌ Erreur JSON: {str(e)}")
+            return {"type": "error", "content": f"Réponse invalide: {response.text[:200]}"}, Reessai()
+        except Exception as e:
+            return {"type": "error", "content": f"{self.libelle_erreur}: {str(e)}"}, None
+
+    def appeler(self, model_name, prompt_text, temperature, max_tokens, images=None):
+        api_key = self.api_key()
+        if not api_key:
+            return {"type": "error", "content": f"Clé API manquante pour {self.nom}"}
+
+        headers = self.headers(api_key)
+        payload = self.payload(model_name, prompt_text, temperature, max_tokens, images)
+
+        def tentative(restant):
+            print(f" Appel {self.nom} - {model_name}")
+            return self.tentative(headers, payload, restant)
+
+        return self.politique().executer(tentative, self.disjoncteur(), libelle=self.libelle_erreur)
+
+    def stream(self, model_name, prompt_text, temperature, max_tokens, images=None):
+        """Renvoie les fragments de texte au fil de leur arrivée (SSE du fournisseur)"""
+        api_key = self.api_key()
+        if not api_key:
+            yield {"type": "error", "content": f"Clé API manquante pour {self.nom}"}
+            return
+
+        headers = self.headers(api_key)
+        headers["Accept"] = "text/event-stream"
+        payload = self.payload(model_name, prompt_text, temperature, max_tokens, images, stream=True)
+
+        disjoncteur = self.disjoncteur()
+        if not disjoncteur.autoriser():
+            yield {"type": "error", "content": f"{self.libelle_erreur} indisponible (circuit ouvert)"}
+            return
+
+        # autoriser() a pu réserver l'essai du circuit demi-ouvert : toute sortie
+        # sans verdict (exception avant le statut, flux abandonné) compte comme
+        # un échec, sinon le circuit reste bloqué en demi-ouvert
+        signale = False
+        try:
+            with provider_client.stream(self.hote, self.endpoint(), read_timeout=self.read_timeout,
+                                        headers=headers, json=payload) as response:
+                signale = True
+                if response.status_code in STATUTS_REESSAYABLES:
+                    disjoncteur.echec()
+                else:
+                    disjoncteur.succes()
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    chunk = line[len("data:"):].strip()
+                    if chunk == "[DONE]":
+                        break
+                    donnees = json.loads(chunk)
+                    if donnees.get("usage"):
+                        yield {"type": "usage", "usage": donnees["usage"]}
+                    delta = (donnees.get("choices") or [{}])[0].get("delta", {})
+                    if delta.get("content"):
+                        yield {"type": "text", "content": delta["content"]}
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            signale = True
+            disjoncteur.echec()
+            yield {"type": "error", "content": f"Erreur streaming {model_name}: {str(e)}"}
+        except Exception as e:
+            yield {"type": "error", "content": f"Erreur streaming {model_name}: {str(e)}"}
+        finally:
+            if not signale:
+                disjoncteur.echec()
+
+    def description(self):
+        return {
+            "nom": self.nom,
+            "capacites": list(self.capacites),
+            "cout_par_token_defaut": self.cout_par_token_defaut,
+            "read_timeout": self.read_timeout,
+            "max_tentatives": self.max_tentatives,
+        }
+
+
+class CometGptAdapter(ChatCompletionsAdapter):
+    nom = "comet_gpt"
+    url = "https://api.cometapi.com/v1/chat/completions"
+    url_env = "COMET_API_URL"
+    api_key_env = "COMET_API_KEY"
+    hote = "comet"
+    capacites = ("text",)
+    libelle_erreur = "Erreur OpenAI"
+
+
+class CometGeminiAdapter(ChatCompletionsAdapter):
+    """Gemini via Comet : multimodal, peut renvoyer des images"""
+
+    nom = "comet_gemini"
+    url = "https://api.cometapi.com/v1/chat/completions"
+    url_env = "COMET_API_URL"
+    api_key_env = "COMET_API_KEY"
+    hote = "comet"
+    capacites = ("text", "image", "multimodal")
+    libelle_erreur = "Erreur Gemini"
+
+    def resultat_final(self, content: str) -> dict:
+        return detecter_type_resultat(content)
+
+
+class OpenAIAdapter(ChatCompletionsAdapter):
+    nom = "openai"
+    url = "https://api.openai.com/v1/chat/completions"
+    url_env = "OPENAI_API_URL"
+    api_key_env = "API_KEY_OPENAI"
+    hote = "openai"
+    capacites = ("text",)
+    libelle_erreur = "Erreur OpenAI"
+
+
+class GrokAdapter(ChatCompletionsAdapter):
+    nom = "grok"
+    url = "https://api.x.ai/v1/chat/completions"
+    url_env = "GROK_API_URL"
+    api_key_env = "API_KEY_GROK"
+    hote = "xai"
+    capacites = ("text",)
+    libelle_erreur = "Erreur Grok"
+
+
+class ProviderRegistry:
+    """Registre des adaptateurs, indexé par ModelIA.fournisseur.
+
+    Suit la latence glissante (p50/p95) de chaque modèle et peut lancer une
+    requête « hedgée » vers un modèle de repli quand le principal dépasse son
+    budget de latence : la première réponse valide l'emporte.
+    """
+
+    def __init__(self):
+        self._adapters = {}
+        self._lock = threading.Lock()
+        self._latences = {}
+        self.fenetre = int(os.getenv("PROVIDER_LATENCY_WINDOW", 200))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("PROVIDER_HEDGE_WORKERS", 16)),
+            thread_name_prefix="hedge"
+        )
+
+    def register(self, fournisseurs, adapter):
+        for fournisseur in fournisseurs:
+            self._adapters[fournisseur.lower()] = adapter
+
+    def adapter_pour(self, fournisseur: str):
+        return self._adapters.get((fournisseur or "").lower())
+
+    def enregistrer_latence(self, model_id, duree_ms):
+        with self._lock:
+            self._latences.setdefault(model_id, deque(maxlen=self.fenetre)).append(duree_ms)
+
+    def percentiles(self, model_id):
+        with self._lock:
+            valeurs = sorted(self._latences.get(model_id, []))
+        if not valeurs:
+            return {"n": 0, "p50": None, "p95": None}
+        return {
+            "n": len(valeurs),
+            "p50": valeurs[int(0.50 * (len(valeurs) - 1))],
+            "p95": valeurs[int(0.95 * (len(valeurs) - 1))],
+        }
+
+    def _cible(self, model):
+        """Extrait les attributs utiles du modèle (les workers n'accèdent pas à la session)"""
+        return {
+            "id": model.id,
+            "nom_model": model.nom_model,
+            "fournisseur": model.fournisseur,
+            "parametres": model.parametres_default or {},
+            "adapter": self.adapter_pour(model.fournisseur),
+        }
+
+    def _appel_mesure(self, cible, prompt_text, temperature, max_tokens, images):
+        adapter = cible["adapter"]
+        if not adapter:
+            return {"type": "error", "content": f"Fournisseur inconnu: {cible['fournisseur']}"}
+
+        debut = time.perf_counter()
+        resultat = adapter.appeler(cible["nom_model"], prompt_text, temperature, max_tokens, images)
+        if resultat["type"] != "error":
+            self.enregistrer_latence(cible["id"], int((time.perf_counter() - debut) * 1000))
+            resultat["model_id"] = cible["id"]
+        return resultat
+
+    def budget_ms(self, cible):
+        """Budget de latence : configuré sur le modèle, sinon son p95 observé"""
+        budget = cible["parametres"].get("latence_budget_ms")
+        if budget:
+            return int(budget)
+        stats = self.percentiles(cible["id"])
+        return stats["p95"] if stats["n"] >= 20 else None
+
+    def appeler(self, model, prompt_text, temperature, max_tokens, images=None, fallback=None):
+        cible = self._cible(model)
+        secours = self._cible(fallback) if fallback is not None else None
+
+        if secours and images and not (secours["adapter"] and secours["adapter"].supporte("multimodal")):
+            secours = None
+
+        # Circuit du fournisseur principal ouvert : repli direct sans attendre le budget
+        if secours and cible["adapter"] and cible["adapter"].disjoncteur().est_ouvert() \
+                and secours["adapter"] and not secours["adapter"].disjoncteur().est_ouvert():
+            print(f" Circuit {cible['adapter'].nom} ouvert, repli sur {secours['nom_model']}")
+            resultat = self._appel_mesure(secours, prompt_text, temperature, max_tokens, images)
+            resultat["hedged"] = True
+            return resultat
+
+        budget = self.budget_ms(cible) if secours else None
+        if not secours or not budget:
+            resultat = self._appel_mesure(cible, prompt_text, temperature, max_tokens, images)
+            # Retry-After hors budget : repli immédiat plutôt qu'une attente raccourcie
+            if secours and resultat.get("repli") and secours["adapter"] \
+                    and not secours["adapter"].disjoncteur().est_ouvert():
+                print(f" {cible['nom_model']} limité (Retry-After), repli sur {secours['nom_model']}")
+                resultat = self._appel_mesure(secours, prompt_text, temperature, max_tokens, images)
+                resultat["hedged"] = True
+            return resultat
+
+        principal = self._executor.submit(self._appel_mesure, cible, prompt_text, temperature, max_tokens, images)
+        termines, _ = wait([principal], timeout=budget / 1000)
+        if termines and principal.result()["type"] != "error":
+            return principal.result()
+
+        print(f" Hedging: {cible['nom_model']} > {budget}ms, repli sur {secours['nom_model']}")
+        en_cours = {principal}
+        en_cours.add(self._executor.submit(self._appel_mesure, secours, prompt_text, temperature, max_tokens, images))
+
+        premiere_erreur = None
+        while en_cours:
+            termines, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in termines:
+                resultat = future.result()
+                if resultat["type"] != "error":
+                    resultat["hedged"] = True
+                    return resultat
+                if future is principal or premiere_erreur is None:
+                    premiere_erreur = resultat
+        return premiere_erreur
+
+    def stream(self, model, prompt_text, temperature, max_tokens, images=None):
+        adapter = self.adapter_pour(model.fournisseur)
+        if not adapter:
+            yield {"type": "error", "content": f"Fournisseur inconnu: {model.fournisseur}"}
+            return
+        yield from adapter.stream(model.nom_model, prompt_text, temperature, max_tokens, images)
+
+    def resultat_final(self, model, content: str) -> dict:
+        adapter = self.adapter_pour(model.fournisseur)
+        return adapter.resultat_final(content) if adapter else {"type": "text", "content": content}
+
+    def stats(self):
+        with self._lock:
+            model_ids = list(self._latences.keys())
+        return {
+            "adapters": {f: a.description() for f, a in self._adapters.items()},
+            "latences": {str(model_id): self.percentiles(model_id) for model_id in model_ids},
+            "circuits": circuit_breakers.stats(),
+        }
+
+
+# Instance globale
+provider_registry = ProviderRegistry()
+provider_registry.register(["gpt"], CometGptAdapter())
+provider_registry.register(["gemini", "gemini_flash"], CometGeminiAdapter())
+provider_registry.register(["openai", "gpt3"], OpenAIAdapter())
+provider_registry.register(["grok"], GrokAdapter())
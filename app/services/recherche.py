@@ -0,0 +1,219 @@
+from app.extensions import db
+from app.utils.pagination import DATE_MIN
+from sqlalchemy import text, inspect, bindparam
+from datetime import datetime
+import html
+import re
+import os
+
+
+FTS_CONFIG = os.getenv("FTS_CONFIG", "french")
+
+# Délimiteurs internes des extraits : le texte est échappé avant de les
+# remplacer par <mark>, le HTML éventuel du contenu n'est donc jamais interprété
+DEBUT_MARQUE = "\x02"
+FIN_MARQUE = "\x03"
+
+# Champs indexés par type (poids A > B > C pour le classement PostgreSQL / bm25)
+INDEX = {
+    "contenu": {
+        "table": "contenu",
+        "colonnes": [("titre", "A", 10.0), ("texte", "B", 5.0), ("custom_prompt", "C", 2.0)],
+        "extrait": "coalesce(t.texte, t.custom_prompt, t.titre, '')",
+        "champs": "t.id, t.titre, t.type_contenu, t.date_creation",
+        # Contenus : les siens (un admin voit tout, comme dans les listes)
+        "visibilite": "t.id_utilisateur = :id_utilisateur",
+    },
+    "prompt": {
+        "table": "prompt",
+        "colonnes": [("nom_prompt", "A", 10.0), ("texte_prompt", "B", 5.0)],
+        "extrait": "coalesce(t.texte_prompt, '')",
+        "champs": "t.id, t.nom_prompt, t.public, t.date_creation",
+        # Prompts : publics ou les siens, comme la liste
+        "visibilite": "(t.public = true OR t.id_utilisateur = :id_utilisateur)",
+    },
+}
+
+
+def requete_fts5(terme: str) -> str:
+    """Saisie libre -> requête FTS5 : chaque mot entre guillemets (pas d'opérateurs
+    injectés), tous requis, le dernier en préfixe pour la recherche à la frappe"""
+    mots = [m.replace('"', '""') for m in re.findall(r"\w+", terme)]
+    if not mots:
+        return ""
+    return " ".join(f'"{m}"' for m in mots[:-1]) + (" " if len(mots) > 1 else "") + f'"{mots[-1]}"*'
+
+
+def marquer(extrait: str) -> str:
+    return html.escape(extrait or "").replace(DEBUT_MARQUE, "<mark>").replace(FIN_MARQUE, "</mark>")
+
+
+class RechercheService:
+    """Recherche plein texte sur les contenus et les prompts.
+
+    - PostgreSQL : colonne search_vector (tsvector) tenue à jour par trigger,
+      index GIN (migration a7c4e2f9d813), websearch_to_tsquery + ts_rank_cd.
+    - SQLite (local, tests) : tables FTS5 externes synchronisées par triggers,
+      créées au démarrage, classement bm25.
+    - Sinon (colonne absente, FTS5 indisponible) : LIKE, trié par date.
+    """
+
+    def __init__(self):
+        self.moteur = None
+
+    def init_app(self, app):
+        with app.app_context():
+            try:
+                dialecte = db.engine.dialect.name
+                if dialecte == "postgresql":
+                    colonnes = {c["name"] for c in inspect(db.engine).get_columns("contenu")}
+                    self.moteur = "postgres" if "search_vector" in colonnes else "like"
+                    if self.moteur == "like":
+                        app.logger.warning("search_vector absent (flask db upgrade) : recherche en LIKE")
+                elif dialecte == "sqlite":
+                    self.moteur = "fts5" if self._installer_fts5() else "like"
+                else:
+                    self.moteur = "like"
+            except Exception as e:
+                app.logger.error(f"Initialisation recherche: {str(e)}")
+                db.session.rollback()
+                self.moteur = "like"
+
+    def _installer_fts5(self) -> bool:
+        """Crée (si besoin) les tables FTS5 et leurs triggers ; reconstruit l'index à la création"""
+        try:
+            for spec in INDEX.values():
+                table = spec["table"]
+                noms = [c for c, _, _ in spec["colonnes"]]
+                liste = ", ".join(noms)
+                nouveaux = ", ".join(f"new.{c}" for c in noms)
+                anciens = ", ".join(f"old.{c}" for c in noms)
+                existe = db.session.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE name = :nom"), {"nom": f"{table}_fts"}
+                ).first()
+
+                db.session.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5({liste}, "
+                    f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+                ))
+                db.session.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {table}_fts(rowid, {liste}) VALUES (new.id, {nouveaux}); END"
+                ))
+                db.session.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {table}_fts({table}_fts, rowid, {liste}) VALUES ('delete', old.id, {anciens}); END"
+                ))
+                db.session.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF {liste} ON {table} BEGIN "
+                    f"INSERT INTO {table}_fts({table}_fts, rowid, {liste}) VALUES ('delete', old.id, {anciens}); "
+                    f"INSERT INTO {table}_fts(rowid, {liste}) VALUES (new.id, {nouveaux}); END"
+                ))
+                if not existe:
+                    db.session.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+            db.session.commit()
+            return True
+        except Exception as e:
+            db.session.rollback()
+            print(f" FTS5 indisponible, recherche en LIKE: {str(e)}")
+            return False
+
+    def reindexer(self):
+        """Reconstruit l'index FTS5 (SQLite) ou les tsvector (PostgreSQL) à partir des tables"""
+        if self.moteur == "fts5":
+            for spec in INDEX.values():
+                db.session.execute(text(f"INSERT INTO {spec['table']}_fts({spec['table']}_fts) VALUES ('rebuild')"))
+        elif self.moteur == "postgres":
+            for spec in INDEX.values():
+                # Le trigger BEFORE UPDATE recalcule search_vector
+                premiere = spec["colonnes"][0][0]
+                db.session.execute(text(f"UPDATE {spec['table']} SET {premiere} = {premiere}"))
+        db.session.commit()
+
+    def cle(self, ligne):
+        """Clé de tri d'un résultat pour le curseur : pertinence, ou date de création en LIKE"""
+        if self.moteur in ("postgres", "fts5"):
+            return float(ligne["rang"] or 0)
+        return (ligne["date_creation"] or DATE_MIN).isoformat()
+
+    def borne(self, cle):
+        """Clé lue dans un curseur -> valeur comparable à la colonne de tri. Lève ValueError"""
+        if self.moteur in ("postgres", "fts5"):
+            if isinstance(cle, bool) or not isinstance(cle, (int, float)):
+                raise ValueError("Curseur invalide")
+            return float(cle)
+        if not isinstance(cle, str):
+            raise ValueError("Curseur invalide")
+        return datetime.fromisoformat(cle)
+
+    def rechercher(self, type_index: str, terme: str, id_utilisateur: int, admin: bool, limite: int, apres=None):
+        """Résultats classés [(ligne dict)], limite + 1 lignes au plus (détection de page suivante).
+
+        Pagination keyset : `apres` = (clé, id) du dernier résultat de la page
+        précédente (voir cle()/borne()), ordre (clé DESC, id DESC)."""
+        spec = INDEX[type_index]
+        visibilite = "1 = 1" if admin else spec["visibilite"]
+        params = {"id_utilisateur": id_utilisateur, "limite": limite + 1}
+        types = []
+        if apres:
+            params.update({"cle": apres[0], "id_apres": apres[1]})
+
+        def suivants(cle):
+            return f"({cle} < :cle OR ({cle} = :cle AND t.id < :id_apres))" if apres else "1 = 1"
+
+        if self.moteur == "postgres":
+            params.update({"terme": terme, "config": FTS_CONFIG})
+            # float8 : la clé relue du curseur se compare exactement à la valeur calculée
+            rang = "CAST(ts_rank_cd(t.search_vector, q) AS double precision)"
+            sql = f"""
+                SELECT {spec['champs']}, p.rang,
+                       ts_headline(CAST(:config AS regconfig), {spec['extrait']}, websearch_to_tsquery(CAST(:config AS regconfig), :terme),
+                                   'StartSel={DEBUT_MARQUE}, StopSel={FIN_MARQUE}, MaxFragments=2, MaxWords=20, MinWords=8') AS extrait
+                FROM (
+                    SELECT t.id, {rang} AS rang
+                    FROM {spec['table']} t, websearch_to_tsquery(CAST(:config AS regconfig), :terme) q
+                    WHERE t.search_vector @@ q AND {visibilite} AND {suivants(rang)}
+                    ORDER BY rang DESC, t.id DESC
+                    LIMIT :limite
+                ) p JOIN {spec['table']} t ON t.id = p.id
+                ORDER BY p.rang DESC, p.id DESC
+            """
+        elif self.moteur == "fts5":
+            requete = requete_fts5(terme)
+            if not requete:
+                return []
+            params["terme"] = requete
+            poids = ", ".join(str(p) for _, _, p in spec["colonnes"])
+            rang = f"-bm25({spec['table']}_fts, {poids})"
+            sql = f"""
+                SELECT {spec['champs']}, {rang} AS rang,
+                       snippet({spec['table']}_fts, -1, '{DEBUT_MARQUE}', '{FIN_MARQUE}', '…', 16) AS extrait
+                FROM {spec['table']}_fts JOIN {spec['table']} t ON t.id = {spec['table']}_fts.rowid
+                WHERE {spec['table']}_fts MATCH :terme AND {visibilite} AND {suivants(rang)}
+                ORDER BY {rang} DESC, t.id DESC
+                LIMIT :limite
+            """
+        else:
+            echappe = terme.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.update({"terme": f"%{echappe}%", "date_min": DATE_MIN})
+            types.append(bindparam("date_min", type_=db.DateTime))
+            if apres:
+                types.append(bindparam("cle", type_=db.DateTime))
+            condition = " OR ".join(f"lower(t.{c}) LIKE lower(:terme) ESCAPE '\\'" for c, _, _ in spec["colonnes"])
+            date = "coalesce(t.date_creation, :date_min)"
+            sql = f"""
+                SELECT {spec['champs']}, 0 AS rang, substr({spec['extrait']}, 1, 200) AS extrait
+                FROM {spec['table']} t
+                WHERE ({condition}) AND {visibilite} AND {suivants(date)}
+                ORDER BY {date} DESC, t.id DESC
+                LIMIT :limite
+            """
+
+        # date_creation typée : datetime quel que soit le moteur (SQLite la renvoie en texte)
+        requete = text(sql).bindparams(*types).columns(date_creation=db.DateTime)
+        lignes = db.session.execute(requete, params).mappings().all()
+        return [dict(ligne, extrait=marquer(ligne["extrait"])) for ligne in lignes]
+
+
+# Instance globale
+recherche_service = RechercheService()
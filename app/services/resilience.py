@@ -0,0 +1,201 @@
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import random
+import threading
+import time
+import os
+
+
+STATUTS_REESSAYABLES = [429, 500, 502, 503, 504]
+
+
+def lire_retry_after(response):
+    """Délai Retry-After en secondes (entier ou date HTTP), None si absent ou illisible"""
+    valeur = response.headers.get("Retry-After") if response is not None else None
+    if not valeur:
+        return None
+    try:
+        return max(float(valeur), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(valeur)
+        return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class Reessai:
+    """Signale qu'une tentative en échec peut être rejouée"""
+
+    def __init__(self, retry_after=None):
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    """Backoff exponentiel avec jitter complet, borné par une échéance globale.
+
+    Respecte Retry-After quand le fournisseur l'indique, sans jamais le
+    raccourcir : s'il dépasse le plafond ou l'échéance, on abandonne et le
+    résultat est marqué `repli` (le registre bascule sur le modèle de secours).
+    Mieux vaut échouer vite que bloquer un worker.
+    """
+
+    def __init__(self, max_tentatives=None, base=None, plafond=None, echeance=None):
+        self.max_tentatives = max_tentatives or int(os.getenv("PROVIDER_RETRY_MAX", 3))
+        self.base = base or float(os.getenv("PROVIDER_RETRY_BASE", 0.5))
+        self.plafond = plafond or float(os.getenv("PROVIDER_RETRY_CAP", 8))
+        self.echeance = echeance or float(os.getenv("PROVIDER_RETRY_DEADLINE", 30))
+
+    def delai(self, tentative, retry_after=None):
+        """Attente avant la tentative suivante, None si Retry-After dépasse le plafond"""
+        if retry_after is not None:
+            return retry_after if retry_after <= self.plafond else None
+        return random.uniform(0, min(self.plafond, self.base * (2 ** tentative)))
+
+    def executer(self, tentative_fn, disjoncteur=None, libelle="Fournisseur"):
+        """Exécute tentative_fn(restant) -> (resultat, Reessai | None) jusqu'au succès ou à l'échéance.
+
+        `restant` (secondes avant l'échéance) borne le timeout de chaque
+        tentative : une requête lente ne peut pas dépasser l'échéance.
+        """
+        limite = time.monotonic() + self.echeance
+        resultat = None
+
+        for tentative in range(self.max_tentatives):
+            restant = limite - time.monotonic()
+            if restant <= 0:
+                print(f" Échéance atteinte, abandon après {tentative} tentative(s)")
+                break
+
+            if disjoncteur and not disjoncteur.autoriser():
+                return {"type": "error", "content": f"{libelle} indisponible (circuit ouvert)",
+                        "circuit_ouvert": True, "tentatives": tentative}
+
+            resultat, reessai = tentative_fn(restant)
+            resultat["tentatives"] = tentative + 1
+
+            if resultat["type"] != "error":
+                if disjoncteur:
+                    disjoncteur.succes()
+                return resultat
+
+            if reessai is None:
+                # Erreur non transitoire (ex. 400) : le fournisseur répond, le circuit reste sain
+                if disjoncteur:
+                    disjoncteur.succes()
+                return resultat
+
+            if disjoncteur:
+                disjoncteur.echec()
+
+            if tentative == self.max_tentatives - 1:
+                break
+
+            attente = self.delai(tentative, reessai.retry_after)
+            if attente is None or time.monotonic() + attente >= limite:
+                if reessai.retry_after is not None:
+                    # Le fournisseur demande d'attendre plus que notre budget
+                    resultat["repli"] = True
+                    print(f" Retry-After {reessai.retry_after:.0f}s hors budget, abandon après {tentative + 1} tentative(s)")
+                else:
+                    print(f" Échéance atteinte, abandon après {tentative + 1} tentative(s)")
+                break
+
+            print(f"⏳ Retry dans {attente:.2f}s ({tentative + 1}/{self.max_tentatives})")
+            time.sleep(attente)
+
+        return resultat
+
+
+class CircuitBreaker:
+    """Disjoncteur partagé entre threads : fermé -> ouvert après N échecs
+    consécutifs, puis demi-ouvert après le délai de refroidissement (une seule
+    requête d'essai à la fois)."""
+
+    FERME = "ferme"
+    OUVERT = "ouvert"
+    DEMI_OUVERT = "demi_ouvert"
+
+    def __init__(self, nom, seuil=None, refroidissement=None):
+        self.nom = nom
+        self.seuil = seuil or int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+        self.refroidissement = refroidissement or float(os.getenv("CIRCUIT_COOLDOWN", 30))
+        self._lock = threading.Lock()
+        self.etat = self.FERME
+        self.echecs = 0
+        self.ouvert_depuis = None
+        self._essai_en_cours = False
+        self.total_rejets = 0
+
+    def autoriser(self):
+        with self._lock:
+            if self.etat == self.FERME:
+                return True
+            if self.etat == self.OUVERT and time.monotonic() - self.ouvert_depuis >= self.refroidissement:
+                self.etat = self.DEMI_OUVERT
+                self._essai_en_cours = False
+            if self.etat == self.DEMI_OUVERT and not self._essai_en_cours:
+                self._essai_en_cours = True
+                return True
+            self.total_rejets += 1
+            return False
+
+    def est_ouvert(self):
+        with self._lock:
+            return self.etat == self.OUVERT and time.monotonic() - self.ouvert_depuis < self.refroidissement
+
+    def succes(self):
+        with self._lock:
+            self.etat = self.FERME
+            self.echecs = 0
+            self.ouvert_depuis = None
+            self._essai_en_cours = False
+
+    def echec(self):
+        with self._lock:
+            self.echecs += 1
+            if self.etat == self.DEMI_OUVERT or self.echecs >= self.seuil:
+                self.etat = self.OUVERT
+                self.ouvert_depuis = time.monotonic()
+                self._essai_en_cours = False
+
+    def reinitialiser(self):
+        self.succes()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "nom": self.nom,
+                "etat": self.etat,
+                "echecs_consecutifs": self.echecs,
+                "seuil": self.seuil,
+                "refroidissement": self.refroidissement,
+                "ouvert_depuis_s": round(time.monotonic() - self.ouvert_depuis, 1) if self.ouvert_depuis else None,
+                "requetes_rejetees": self.total_rejets,
+            }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._disjoncteurs = {}
+
+    def pour(self, nom):
+        with self._lock:
+            if nom not in self._disjoncteurs:
+                self._disjoncteurs[nom] = CircuitBreaker(nom)
+            return self._disjoncteurs[nom]
+
+    def get(self, nom):
+        with self._lock:
+            return self._disjoncteurs.get(nom)
+
+    def stats(self):
+        with self._lock:
+            disjoncteurs = list(self._disjoncteurs.values())
+        return [d.to_dict() for d in disjoncteurs]
+
+
+# Instance globale
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,74 @@
+import threading
+import os
+
+
+class _AppelEnVol:
+    def __init__(self):
+        self.termine = threading.Event()
+        self.resultat = None
+        self.erreur = None
+        self.abonnes = 0
+
+
+class SingleFlight:
+    """Fusionne les appels identiques simultanés : le premier appelant exécute,
+    les suivants attendent son résultat au lieu de relancer le fournisseur."""
+
+    def __init__(self):
+        self.active = str(os.getenv("GENERATION_SINGLE_FLIGHT", "true")).lower() in ["1", "true", "yes", "oui"]
+        self._lock = threading.Lock()
+        self._en_vol = {}
+        self.appels = 0
+        self.fusionnes = 0
+
+    def executer(self, cle, fn):
+        if not self.active:
+            return fn()
+
+        with self._lock:
+            appel = self._en_vol.get(cle)
+            meneur = appel is None
+            if meneur:
+                appel = _AppelEnVol()
+                self._en_vol[cle] = appel
+                self.appels += 1
+            else:
+                appel.abonnes += 1
+                self.fusionnes += 1
+
+        if not meneur:
+            appel.termine.wait()
+            if appel.erreur:
+                raise appel.erreur
+            resultat = dict(appel.resultat)
+            resultat["coalesce"] = True
+            return resultat
+
+        try:
+            appel.resultat = fn()
+        except Exception as e:
+            appel.erreur = e
+            raise
+        finally:
+            with self._lock:
+                self._en_vol.pop(cle, None)
+            appel.termine.set()
+
+        if appel.abonnes:
+            print(f" Single-flight: {appel.abonnes} appel(s) fusionné(s) sur {cle[:12]}")
+        return dict(appel.resultat)
+
+    def stats(self):
+        with self._lock:
+            total = self.appels + self.fusionnes
+            return {
+                "active": self.active,
+                "en_vol": len(self._en_vol),
+                "appels_fournisseur": self.appels,
+                "appels_fusionnes": self.fusionnes,
+                "taux_fusion": round(self.fusionnes / total, 3) if total else None,
+            }
+
+
+# Instance globale
+single_flight = SingleFlight()
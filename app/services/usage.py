@@ -0,0 +1,63 @@
+from app.models.generation_usage import GenerationUsage
+from app.services.providers import provider_registry
+
+
+def tokens_usage(usage: dict):
+    """(tokens_entree, tokens_sortie) depuis le bloc `usage` OpenAI, None si absent"""
+    if not usage:
+        return None, None
+    return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+
+def cout_generation(model, tokens_entree, tokens_sortie) -> float:
+    """Coût d'un appel : ModelIA.cout_par_token, sinon le coût par défaut de l'adaptateur"""
+    if model is None or (tokens_entree is None and tokens_sortie is None):
+        return 0.0
+    cout_par_token = model.cout_par_token
+    if not cout_par_token:
+        adapter = provider_registry.adapter_pour(model.fournisseur)
+        cout_par_token = adapter.cout_par_token_defaut if adapter else 0.0
+    return round(((tokens_entree or 0) + (tokens_sortie or 0)) * cout_par_token, 6)
+
+
+def construire_usage(id_utilisateur, contexte: dict, resultat: dict, mode: str = "direct", id_contenu=None):
+    """Ligne GenerationUsage (non ajoutée à la session) décrivant un appel de génération"""
+    model = contexte["model"]
+    fallback = contexte.get("fallback")
+    if fallback is not None and resultat.get("model_id") == fallback.id:
+        model = fallback
+
+    erreur = resultat["type"] == "error"
+    cache_hit = bool(resultat.get("cache_hit"))
+    coalesce = bool(resultat.get("coalesce"))
+    tokens_entree, tokens_sortie = tokens_usage(resultat.get("usage"))
+    metrics = resultat.get("metrics") or {}
+
+    if erreur:
+        statut = "echec"
+    elif cache_hit:
+        statut = "cache"
+    elif coalesce:
+        statut = "fusionne"
+    else:
+        statut = "succes"
+
+    return GenerationUsage(
+        id_utilisateur=id_utilisateur,
+        id_model=model.id,
+        id_contenu=id_contenu,
+        mode=mode,
+        statut=statut,
+        tokens_entree=tokens_entree,
+        tokens_sortie=tokens_sortie,
+        # Un hit de cache ou un appel fusionné ne repasse pas par le fournisseur : rien n'est facturé
+        cout=0.0 if cache_hit or coalesce else cout_generation(model, tokens_entree, tokens_sortie),
+        latence_ms=resultat.get("latence_ms"),
+        attente_ms=resultat.get("attente_ms", 0),
+        reseau_ms=None if cache_hit else metrics.get("reseau_ms"),
+        parse_ms=None if cache_hit else metrics.get("parse_ms"),
+        tentatives=0 if cache_hit or coalesce else resultat.get("tentatives", 1),
+        cache_hit=cache_hit,
+        hedged=bool(resultat.get("hedged")),
+        message_erreur=resultat["content"][:1000] if erreur else None,
+    )
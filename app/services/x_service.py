@@ -1,6 +1,8 @@
 import requests
 from flask import current_app
-import base64
+from app.services.blob_store import blob_store
+import time
+import os
 
 
 def publish_to_x_api(texte_contenu, access_token, image_url=None):
@@ -47,46 +49,36 @@ def publish_to_x_api(texte_contenu, access_token, image_url=None):
         return None, None, f"Erreur réseau: {str(e)}"
 
 
-def upload_image_to_x(access_token, image_url):
-    try:
-        [prefix, image_data] = image_url.split(',', maxsplit=1)
-        print(f"[]sample_0: {image_data[0:100]}...")
-        [_, ty] = prefix.split(":")
-        [media_type, _] = ty.split(";")
-        
-        image_bytes = base64.b64decode(image_data)
+MEDIA_UPLOAD_URL = "https://api.x.com/2/media/upload"
+TAILLE_MORCEAU = int(os.getenv("X_UPLOAD_CHUNK_SIZE", 1024 * 1024))
+UPLOAD_SIMPLE_MAX = int(os.getenv("X_SIMPLE_UPLOAD_MAX", 1024 * 1024))
+ATTENTE_TRAITEMENT_MAX = int(os.getenv("X_MEDIA_PROCESSING_TIMEOUT", 300))
 
-        url = "https://api.x.com/2/media/upload"
-        headers = {
-            # "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}"
-        }
 
-        files = {'media': image_bytes, 
-            
-        }
-        data = {
-             'media_type':  media_type,
-            'media_category': "tweet_image"
-        }
-       
-        # print("OOOOOOOOOOOOOOOOOOOOOOOOOOOOO")
-        upload_response = requests.post(url, headers=headers, files=files, data=data, timeout=30)
-        # print("IIIIIIIIIIIIIIIIIIIIIIIi")
+def categorie_media(media_type):
+    if media_type.startswith("video/"):
+        return "tweet_video"
+    if media_type == "image/gif":
+        return "tweet_gif"
+    return "tweet_image"
 
-        print(f"status, {upload_response.status_code}")
-        print(f"status texte, {upload_response.json()}")
-        
-        
-        if upload_response.status_code in [200, 201]:
-            media_id = upload_response.json().get("data", {}).get("id", None)
-            current_app.logger.info(f"Upload reussi, media_id:{media_id}")
-            return media_id
 
-        else :
-            current_app.logger.error(f"Erreur  upload image: {upload_response.status_code}-{upload_response.text}")
-            print("hahahhahha")
-            return None
+def upload_image_to_x(access_token, image_url):
+    """Envoie une image ou une vidéo ('blob:<sha>' ou data URI) et renvoie le media_id.
+
+    Les petites images partent en un envoi simple ; au-delà de X_SIMPLE_UPLOAD_MAX,
+    ainsi que pour les GIF et vidéos, le flux INIT/APPEND/FINALIZE est utilisé et
+    le média est lu/décodé morceau par morceau.
+    """
+    try:
+        media_type, total, morceaux = blob_store.flux(image_url, TAILLE_MORCEAU)
+        categorie = categorie_media(media_type)
+        current_app.logger.info(f"Upload média X: {media_type}, {total} octets ({categorie})")
+
+        if categorie == "tweet_image" and total <= UPLOAD_SIMPLE_MAX:
+            return _upload_simple(access_token, media_type, b"".join(morceaux), categorie)
+        return upload_media_chunked(access_token, media_type, total, morceaux, categorie)
+
     except requests.HTTPError as e:
         print("HTTP Error", e)
         raise e
@@ -94,12 +86,98 @@ def upload_image_to_x(access_token, image_url):
     except Exception as e:
         print("exception", type(e).__name__)
         current_app.logger.error(f"Erreur upload image: {repr(e)}")
-        print("hahahaha")
         return None
-    
 
 
-        
+def _upload_simple(access_token, media_type, media_bytes, categorie):
+    headers = {"Authorization": f"Bearer {access_token}"}
+    debut = time.perf_counter()
+    upload_response = requests.post(
+        MEDIA_UPLOAD_URL, headers=headers, files={'media': media_bytes},
+        data={'media_type': media_type, 'media_category': categorie}, timeout=30
+    )
+
+    if upload_response.status_code in [200, 201]:
+        media_id = upload_response.json().get("data", {}).get("id", None)
+        current_app.logger.info(f"Upload reussi, media_id:{media_id} ({int((time.perf_counter() - debut) * 1000)} ms)")
+        return media_id
+
+    current_app.logger.error(f"Erreur  upload image: {upload_response.status_code}-{upload_response.text}")
+    return None
+
+
+def upload_media_chunked(access_token, media_type, total, morceaux, categorie, progression=None):
+    """Upload par morceaux (INIT, APPEND x N, FINALIZE puis STATUS si traitement asynchrone).
+
+    `progression(envoyes, total)` est appelée après chaque morceau.
+    """
+    headers = {"Authorization": f"Bearer {access_token}"}
+    mesures = {"octets": total, "morceaux": 0}
+    debut = time.perf_counter()
+
+    # Une session pour réutiliser la connexion entre les APPEND
+    with requests.Session() as session:
+        session.headers.update(headers)
+
+        reponse = session.post(f"{MEDIA_UPLOAD_URL}/initialize", json={
+            "media_type": media_type,
+            "total_bytes": total,
+            "media_category": categorie,
+        }, timeout=30)
+        if reponse.status_code not in [200, 201, 202]:
+            current_app.logger.error(f"Erreur INIT média X: {reponse.status_code}-{reponse.text}")
+            return None
+        media_id = reponse.json().get("data", {}).get("id")
+        mesures["init_ms"] = int((time.perf_counter() - debut) * 1000)
+
+        envoyes = 0
+        debut_append = time.perf_counter()
+        for index, morceau in enumerate(morceaux):
+            reponse = session.post(
+                f"{MEDIA_UPLOAD_URL}/{media_id}/append",
+                files={"media": morceau}, data={"segment_index": index}, timeout=60
+            )
+            if reponse.status_code not in [200, 201, 202, 204]:
+                current_app.logger.error(f"Erreur APPEND {index} média X: {reponse.status_code}-{reponse.text}")
+                return None
+            envoyes += len(morceau)
+            mesures["morceaux"] += 1
+            if progression:
+                progression(envoyes, total)
+            current_app.logger.debug(f"Upload X {media_id}: {envoyes}/{total} octets ({envoyes * 100 // max(total, 1)}%)")
+        mesures["append_ms"] = int((time.perf_counter() - debut_append) * 1000)
+
+        debut_finalize = time.perf_counter()
+        reponse = session.post(f"{MEDIA_UPLOAD_URL}/{media_id}/finalize", timeout=60)
+        if reponse.status_code not in [200, 201, 202]:
+            current_app.logger.error(f"Erreur FINALIZE média X: {reponse.status_code}-{reponse.text}")
+            return None
+        mesures["finalize_ms"] = int((time.perf_counter() - debut_finalize) * 1000)
+
+        traitement = reponse.json().get("data", {}).get("processing_info")
+        debut_traitement = time.perf_counter()
+        while traitement and traitement.get("state") in ["pending", "in_progress"]:
+            if time.perf_counter() - debut_traitement > ATTENTE_TRAITEMENT_MAX:
+                current_app.logger.error(f"Traitement média X {media_id} trop long, abandon")
+                return None
+            time.sleep(traitement.get("check_after_secs", 2))
+            reponse = session.get(MEDIA_UPLOAD_URL, params={"command": "STATUS", "media_id": media_id}, timeout=30)
+            traitement = reponse.json().get("data", {}).get("processing_info")
+
+        if traitement and traitement.get("state") == "failed":
+            current_app.logger.error(f"Traitement média X {media_id} échoué: {traitement.get('error')}")
+            return None
+        mesures["traitement_ms"] = int((time.perf_counter() - debut_traitement) * 1000)
+
+    mesures["total_ms"] = int((time.perf_counter() - debut) * 1000)
+    duree = max(mesures["total_ms"], 1) / 1000
+    current_app.logger.info(
+        f"Upload X par morceaux réussi, media_id:{media_id} - {total} octets en {mesures['morceaux']} morceaux, "
+        f"{mesures['total_ms']} ms ({int(total / 1024 / duree)} Ko/s) {mesures}"
+    )
+    return media_id
+
+
 def delete_publication_from_x(tweet_id, access_token):
 
     try:
@@ -0,0 +1,61 @@
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+from app.extensions import db
+import os
+
+
+class CompteurRequetes:
+    """Compte les requêtes SQL exécutées sur un moteur pendant un bloc `with`"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.requetes = []
+
+    def _compter(self, conn, cursor, statement, *args):
+        self.requetes.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._compter)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._compter)
+
+    @property
+    def total(self):
+        return len(self.requetes)
+
+
+class GardeRequetes:
+    """Nombre de requêtes SQL par requête HTTP, réponse en flux comprise.
+
+    Au-delà de SQL_REQUETES_MAX (0 : désactivé), un avertissement est journalisé :
+    signe d'un chargement paresseux ligne à ligne (N+1) sur un endpoint de liste.
+    """
+
+    def __init__(self):
+        self.maximum = 0
+
+    def init_app(self, app):
+        self.maximum = int(app.config.get("SQL_REQUETES_MAX", os.getenv("SQL_REQUETES_MAX", 0)))
+        if not self.maximum:
+            return
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._compter)
+        # teardown_request : après la fin d'un éventuel stream_with_context
+        app.teardown_request(self._verifier)
+
+    def _compter(self, *args):
+        if has_request_context():
+            g.nb_requetes_sql = g.get("nb_requetes_sql", 0) + 1
+
+    def _verifier(self, exception=None):
+        nb = g.get("nb_requetes_sql", 0)
+        if nb > self.maximum:
+            current_app.logger.warning(
+                f"{request.method} {request.full_path.rstrip('?')} : {nb} requêtes SQL (max {self.maximum}), chargement N+1 ?"
+            )
+
+
+# Instance globale
+garde_requetes = GardeRequetes()
@@ -0,0 +1,46 @@
+from flask import request, Response
+from sqlalchemy import func, select
+from app.extensions import db
+import hashlib
+import os
+
+
+# À incrémenter quand le format des réponses change : invalide les ETag déjà servis
+VERSION = os.getenv("ETAG_VERSION", "1")
+
+
+def requete_validateur(model, colonne_maj, *filtres, extra=()):
+    """SELECT count(*), max(colonne_maj) [, extra] sur le périmètre `filtres`.
+
+    Toute écriture déplace le validateur : insertion et modification font
+    avancer max(colonne_maj), une suppression fait baisser le nombre. Servie
+    par un index (périmètre, colonne_maj) sans lire la table (voir
+    `flask requetes verifier`)."""
+    return select(func.count(), func.max(colonne_maj), *extra).select_from(model).where(*filtres)
+
+
+def calculer_etag(id_utilisateur, *valeurs) -> str:
+    """Empreinte des validateurs, de l'utilisateur et de l'URL complète
+    (?fields=, filtres, pagination changent la représentation)"""
+    brut = repr((VERSION, id_utilisateur, request.full_path, valeurs)).encode()
+    return hashlib.sha1(brut).hexdigest()
+
+
+def etag_requetes(id_utilisateur, *requetes) -> str:
+    return calculer_etag(id_utilisateur, *[tuple(db.session.execute(r).one()) for r in requetes])
+
+
+def non_modifie(etag) -> bool:
+    return request.if_none_match.contains_weak(etag)
+
+
+def avec_etag(reponse, etag):
+    """ETag faible + revalidation systématique (le navigateur renvoie If-None-Match)"""
+    reponse.set_etag(etag, weak=True)
+    reponse.cache_control.private = True
+    reponse.cache_control.no_cache = True
+    return reponse
+
+
+def reponse_non_modifiee(etag) -> Response:
+    return avec_etag(Response(status=304), etag)
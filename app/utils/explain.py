@@ -0,0 +1,71 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+import json
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN d'une requête SQLAlchemy, paramètres liés par le dialecte courant"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compiler_explain(element, compiler, **kw):
+    if compiler.dialect.name == "postgresql":
+        prefixe = "EXPLAIN (FORMAT JSON) "
+    elif compiler.dialect.name == "sqlite":
+        prefixe = "EXPLAIN QUERY PLAN "
+    else:
+        prefixe = "EXPLAIN "
+    return prefixe + compiler.process(element.statement, **kw)
+
+
+def plan(session, statement):
+    """Plan d'exécution sous forme de lignes lisibles"""
+    lignes = session.execute(Explain(statement)).fetchall()
+    dialecte = session.get_bind().dialect.name
+    if dialecte == "postgresql":
+        brut = lignes[0][0]
+        racine = (json.loads(brut) if isinstance(brut, str) else brut)[0]["Plan"]
+        return list(_noeuds_postgres(racine))
+    if dialecte == "sqlite":
+        return [ligne[-1] for ligne in lignes]
+    return [" ".join(str(v) for v in ligne) for ligne in lignes]
+
+
+def _noeuds_postgres(noeud, profondeur=0):
+    relation = f" on {noeud['Relation Name']}" if noeud.get("Relation Name") else ""
+    index = f" using {noeud['Index Name']}" if noeud.get("Index Name") else ""
+    yield f"{'  ' * profondeur}{noeud['Node Type']}{relation}{index}"
+    for enfant in noeud.get("Plans", []):
+        yield from _noeuds_postgres(enfant, profondeur + 1)
+
+
+def scans_sequentiels(lignes_plan, table):
+    """Lignes du plan qui parcourent toute la table sans index"""
+    trouves = []
+    for ligne in lignes_plan:
+        texte = ligne.strip()
+        # PostgreSQL : "Seq Scan on <table>" ; SQLite : "SCAN <table>" sans "USING ... INDEX"
+        if texte.startswith("Seq Scan") and texte.endswith(f" on {table}"):
+            trouves.append(ligne)
+        elif texte.startswith(f"SCAN {table}") and "INDEX" not in texte:
+            trouves.append(ligne)
+    return trouves
+
+
+def lectures_table(lignes_plan, table):
+    """Lignes du plan qui lisent les lignes de la table (tout sauf un parcours d'index couvrant)"""
+    trouves = []
+    for ligne in lignes_plan:
+        texte = ligne.strip()
+        # PostgreSQL : seul "Index Only Scan" évite la table ; SQLite : "USING COVERING INDEX"
+        if texte.endswith(f" on {table}") or f" on {table} using " in texte:
+            if not texte.startswith("Index Only Scan"):
+                trouves.append(ligne)
+        elif (texte.startswith(f"SCAN {table}") or texte.startswith(f"SEARCH {table}")) and "COVERING INDEX" not in texte:
+            trouves.append(ligne)
+    return trouves
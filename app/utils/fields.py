@@ -0,0 +1,22 @@
+from flask import request
+from sqlalchemy.orm import load_only
+
+
+def champs_demandes(disponibles):
+    """Champs demandés via ?fields=a,b (None si absent). Lève ValueError sur un champ inconnu"""
+    brut = request.args.get("fields")
+    if not brut:
+        return None
+    champs = {c.strip() for c in brut.split(",") if c.strip()}
+    inconnus = champs - set(disponibles)
+    if inconnus:
+        raise ValueError(f"Champs inconnus: {', '.join(sorted(inconnus))}")
+    return champs
+
+
+def charger_seulement(model, champs, colonnes_par_champ):
+    """Option load_only couvrant les champs demandés : les autres colonnes ne sont pas SELECTées"""
+    colonnes = {"id"}
+    for champ in champs:
+        colonnes.update(colonnes_par_champ[champ])
+    return load_only(*[getattr(model, nom) for nom in sorted(colonnes)])
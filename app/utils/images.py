@@ -0,0 +1,109 @@
+import base64
+import binascii
+import struct
+
+
+SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+def detecter_mime(octets: bytes):
+    """Type MIME d'après les premiers octets (magic bytes), None si non reconnu"""
+    for signature, mime in SIGNATURES:
+        if octets.startswith(signature):
+            return mime
+    if octets[:4] == b"RIFF" and octets[8:12] == b"WEBP":
+        return "image/webp"
+    if octets[4:8] == b"ftyp":
+        return "video/quicktime" if octets[8:10] == b"qt" else "video/mp4"
+    if octets.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video/webm"
+    return None
+
+
+def dimensions_image(octets: bytes):
+    """(largeur, hauteur) lues dans l'en-tête PNG/JPEG/GIF/WebP, sans décoder l'image"""
+    try:
+        mime = detecter_mime(octets)
+        if mime == "image/png":
+            return struct.unpack(">II", octets[16:24])
+        if mime == "image/gif":
+            return struct.unpack("<HH", octets[6:10])
+        if mime == "image/webp":
+            return _dimensions_webp(octets)
+        if mime == "image/jpeg":
+            return _dimensions_jpeg(octets)
+    except struct.error:
+        pass
+    return None, None
+
+
+def _dimensions_webp(octets):
+    bloc = octets[12:16]
+    if bloc == b"VP8 ":
+        largeur, hauteur = struct.unpack("<HH", octets[26:30])
+        return largeur & 0x3FFF, hauteur & 0x3FFF
+    if bloc == b"VP8L":
+        b0, b1, b2, b3 = octets[21:25]
+        return 1 + (((b1 & 0x3F) << 8) | b0), 1 + (((b3 & 0xF) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+    if bloc == b"VP8X":
+        return 1 + int.from_bytes(octets[24:27], "little"), 1 + int.from_bytes(octets[27:30], "little")
+    return None, None
+
+
+def _dimensions_jpeg(octets):
+    position = 2
+    while position + 9 < len(octets):
+        if octets[position] != 0xFF:
+            position += 1
+            continue
+        marqueur = octets[position + 1]
+        # SOF0..SOF15 sauf DHT (C4), JPG (C8) et DAC (CC)
+        if 0xC0 <= marqueur <= 0xCF and marqueur not in (0xC4, 0xC8, 0xCC):
+            hauteur, largeur = struct.unpack(">HH", octets[position + 5:position + 9])
+            return largeur, hauteur
+        if marqueur in (0xD8, 0x01) or 0xD0 <= marqueur <= 0xD7:
+            position += 2
+            continue
+        longueur = struct.unpack(">H", octets[position + 2:position + 4])[0]
+        position += 2 + longueur
+    return None, None
+
+
+def decoder_data_uri(data_uri: str):
+    """'data:image/png;base64,...' -> (mime déclaré, octets). Lève ValueError si invalide"""
+    if not data_uri or not data_uri.startswith("data:") or "," not in data_uri:
+        raise ValueError("Data URI invalide")
+    entete, donnees = data_uri.split(",", 1)
+    mime = entete[len("data:"):].split(";")[0] or None
+    try:
+        return mime, base64.b64decode(donnees)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Base64 invalide: {str(e)}")
+
+
+def taille_base64(donnees: str, debut: int = 0) -> int:
+    """Nombre d'octets décodés de donnees[debut:] (base64), sans la décoder"""
+    return (len(donnees) - debut) * 3 // 4 - donnees[-2:].count("=")
+
+
+def morceaux_base64(donnees: str, taille_morceau: int, debut: int = 0):
+    """Décode donnees[debut:] (base64) morceau par morceau, sans copier la chaîne entière"""
+    pas = max(taille_morceau // 3, 1) * 4
+    for position in range(debut, len(donnees), pas):
+        try:
+            yield base64.b64decode(donnees[position:position + pas])
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"Base64 invalide: {str(e)}")
+
+
+def mime_base64(donnees: str, debut: int = 0):
+    """Type MIME d'une chaîne base64 d'après ses premiers octets décodés, None si invalide"""
+    try:
+        return detecter_mime(base64.b64decode(donnees[debut:debut + 64], validate=True))
+    except (binascii.Error, ValueError):
+        return None
@@ -0,0 +1,116 @@
+from flask import request
+from sqlalchemy import func, tuple_
+from datetime import datetime, timezone
+import base64
+import binascii
+import json
+import os
+
+from app.utils.serialisation import reponse_json, reponse_liste, TAILLE_LOT
+
+
+LIMITE_DEFAUT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 50))
+LIMITE_MAX = int(os.getenv("PAGINATION_MAX_LIMIT", 200))
+
+# Les lignes sans date (anciennes données, brouillons non programmés...) sont rangées en fin de liste
+DATE_MIN = datetime(1970, 1, 1)
+DATE_MAX = datetime(9999, 12, 31)
+
+
+def encoder_curseur(date, id_ligne) -> str:
+    brut = json.dumps([date.isoformat() if date else None, id_ligne], separators=(",", ":"))
+    return base64.urlsafe_b64encode(brut.encode()).decode().rstrip("=")
+
+
+def decoder_curseur(curseur: str):
+    """Curseur opaque -> (date | None, id). Lève ValueError si invalide"""
+    try:
+        brut = base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4))
+        date, id_ligne = json.loads(brut)
+        return (datetime.fromisoformat(date) if date else None), int(id_ligne)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Curseur invalide: {str(e)}")
+
+
+def parametres_pagination():
+    """(limit, curseur décodé) lus dans ?limit=&cursor=, None si la requête n'est pas paginée.
+    Lève ValueError sur une valeur invalide"""
+    limite = request.args.get("limit")
+    curseur = request.args.get("cursor")
+    if limite is None and not curseur:
+        return None
+    try:
+        limite = int(limite) if limite is not None else LIMITE_DEFAUT
+    except ValueError:
+        raise ValueError("Paramètre 'limit' invalide")
+    if limite < 1:
+        raise ValueError("Paramètre 'limit' invalide")
+    return min(limite, LIMITE_MAX), decoder_curseur(curseur) if curseur else None
+
+
+def date_parametre(nom):
+    """Date ISO 8601 lue dans ?nom=, ramenée en UTC naïf comme les colonnes. Lève ValueError"""
+    valeur = request.args.get(nom)
+    if not valeur:
+        return None
+    try:
+        date = datetime.fromisoformat(valeur.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Date invalide pour '{nom}'")
+    return date.astimezone(timezone.utc).replace(tzinfo=None) if date.tzinfo else date
+
+
+def cle_tri(colonne_date, descendant=True):
+    """Expression de tri : les dates NULL sont remplacées par une borne qui les place en fin de liste"""
+    if colonne_date is None or not colonne_date.expression.nullable:
+        return colonne_date
+    return func.coalesce(colonne_date, DATE_MIN if descendant else DATE_MAX)
+
+
+def ordre_tri(colonne_date, colonne_id, descendant=True):
+    """Clauses ORDER BY cohérentes avec paginer() (utile hors pagination)"""
+    colonnes = [c for c in (cle_tri(colonne_date, descendant), colonne_id) if c is not None]
+    return [c.desc() if descendant else c.asc() for c in colonnes]
+
+
+def paginer(query, colonne_date, colonne_id, limite, curseur=None, descendant=True):
+    """Page keyset triée par (date, id), décroissant par défaut : coût constant quelle
+    que soit la profondeur, contrairement à OFFSET. colonne_date peut être None (tri par id seul).
+
+    Retourne (lignes, next_cursor)."""
+    cle = cle_tri(colonne_date, descendant)
+    borne = DATE_MIN if descendant else DATE_MAX
+
+    if curseur:
+        date, id_ligne = curseur
+        if cle is None:
+            gauche, droite = colonne_id, id_ligne
+        else:
+            gauche, droite = tuple_(cle, colonne_id), tuple_(date or borne, id_ligne)
+        query = query.filter(gauche < droite if descendant else gauche > droite)
+
+    lignes = query.order_by(None).order_by(*ordre_tri(colonne_date, colonne_id, descendant)).limit(limite + 1).all()
+
+    suivant = None
+    if len(lignes) > limite:
+        lignes = lignes[:limite]
+        derniere = lignes[-1]
+        date = getattr(derniere, colonne_date.key) if colonne_date is not None else None
+        suivant = encoder_curseur(date or (borne if cle is not None else None), getattr(derniere, colonne_id.key))
+    return lignes, suivant
+
+
+def lister(query, colonne_date, colonne_id, serialiser, descendant=True):
+    """Réponse de liste commune aux endpoints GET.
+
+    Sans ?limit ni ?cursor : tableau complet (compatibilité avec les clients
+    existants), écrit en flux et lu par lots (yield_per) pour ne jamais tenir
+    toute la liste en mémoire. Sinon : {"items": [...], "next_cursor": "..." | null}.
+    Lève ValueError si les paramètres de pagination sont invalides."""
+    pagination = parametres_pagination()
+    if pagination is None:
+        return reponse_liste(query.yield_per(TAILLE_LOT), serialiser)
+
+    limite, curseur = pagination
+    lignes, suivant = paginer(query, colonne_date, colonne_id, limite, curseur, descendant)
+    return reponse_json({"items": [serialiser(ligne) for ligne in lignes], "next_cursor": suivant})
@@ -0,0 +1,159 @@
+from flask import Response, stream_with_context
+from sqlalchemy import DateTime, Enum as SAEnum
+import json
+import os
+import zlib
+
+try:
+    import orjson
+except ImportError:  # orjson optionnel : repli sur json de la bibliothèque standard
+    orjson = None
+
+
+BACKEND = os.getenv("JSON_BACKEND", "orjson" if orjson else "json")
+if BACKEND == "orjson" and orjson is None:
+    BACKEND = "json"
+
+# Taille des blocs écrits dans les réponses en flux
+TAILLE_LOT = int(os.getenv("JSON_STREAM_BATCH", 500))
+
+
+def dumps(donnees) -> bytes:
+    if BACKEND == "orjson":
+        return orjson.dumps(donnees, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(donnees, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def date_iso(valeur):
+    return valeur.isoformat() if valeur is not None else None
+
+
+def date_iso_utc(valeur):
+    """Date naïve stockée en UTC -> ISO 8601 avec décalage, sans passer par replace(tzinfo=...)"""
+    if valeur is None:
+        return None
+    return valeur.isoformat() + "+00:00" if valeur.tzinfo is None else valeur.isoformat()
+
+
+def _convertisseur(type_colonne, dates_utc):
+    if isinstance(type_colonne, SAEnum) and type_colonne.enum_class is not None:
+        # Table membre -> valeur calculée une fois (Enum.value passe par un descripteur)
+        return {membre: membre.value for membre in type_colonne.enum_class}.get
+    if isinstance(type_colonne, DateTime):
+        return date_iso_utc if dates_utc else date_iso
+    return None
+
+
+class Serialiseur:
+    """Sérialisation API d'un modèle, accesseurs précalculés à l'enregistrement.
+
+    `champs` : nom -> None (colonne du même nom, conversion déduite de son
+    type : Enum -> valeur, DateTime -> ISO 8601) ou fonction(objet) pour les
+    champs calculés.
+
+    Les colonnes déjà chargées sont lues directement dans l'état de l'instance
+    (sans passer par le descripteur instrumenté) ; une colonne expirée ou
+    différée (load_only) repasse par getattr et est chargée comme avant.
+    """
+
+    def __init__(self, model, champs: dict, dates_utc=False):
+        self.model = model
+        colonnes = model.__table__.columns
+        accesseurs = []
+        for nom, spec in champs.items():
+            if callable(spec):
+                accesseurs.append((nom, None, spec))
+            else:
+                accesseurs.append((nom, _convertisseur(colonnes[nom].type, dates_utc), None))
+        self.accesseurs = tuple(accesseurs)
+        self.noms = frozenset(nom for nom, _, _ in accesseurs)
+
+    def __call__(self, objet, champs=None) -> dict:
+        etat = objet.__dict__
+        resultat = {}
+        for nom, convertir, calcul in self.accesseurs:
+            if champs is not None and nom not in champs:
+                continue
+            if calcul is not None:
+                resultat[nom] = calcul(objet)
+                continue
+            valeur = etat[nom] if nom in etat else getattr(objet, nom)
+            resultat[nom] = valeur if convertir is None else convertir(valeur)
+        return resultat
+
+
+_registre = {}
+
+
+def enregistrer(model, champs: dict, dates_utc=False) -> Serialiseur:
+    serialiseur = Serialiseur(model, champs, dates_utc)
+    _registre[model] = serialiseur
+    return serialiseur
+
+
+def serialiseur(model) -> Serialiseur:
+    return _registre[model]
+
+
+def serialiser(objet, champs=None) -> dict:
+    return _registre[type(objet)](objet, champs)
+
+
+def reponse_json(donnees, status=200) -> Response:
+    return Response(dumps(donnees), status=status, mimetype="application/json")
+
+
+def flux_json(objets, serialiser_objet):
+    """Tableau JSON découpé en blocs de TAILLE_LOT éléments (bytes)"""
+    yield b"["
+    premier = True
+    lot = []
+    for objet in objets:
+        lot.append(dumps(serialiser_objet(objet)))
+        if len(lot) >= TAILLE_LOT:
+            yield (b"" if premier else b",") + b",".join(lot)
+            premier = False
+            lot = []
+    if lot:
+        yield (b"" if premier else b",") + b",".join(lot)
+    yield b"]"
+
+
+def reponse_liste(objets, serialiser_objet) -> Response:
+    """Tableau JSON écrit en flux : la réponse complète n'est jamais construite
+    en mémoire (à combiner avec query.yield_per)"""
+    return Response(stream_with_context(flux_json(objets, serialiser_objet)), mimetype="application/json")
+
+
+def flux_ndjson(objets, serialiser_objet):
+    """Un objet JSON par ligne (NDJSON), par blocs de TAILLE_LOT lignes (bytes)"""
+    lot = []
+    for objet in objets:
+        lot.append(dumps(serialiser_objet(objet)))
+        if len(lot) >= TAILLE_LOT:
+            yield b"\n".join(lot) + b"\n"
+            lot = []
+    if lot:
+        yield b"\n".join(lot) + b"\n"
+
+
+def compresser_gzip(blocs, niveau=6):
+    """Compression gzip au fil de l'eau d'un flux de blocs (bytes)"""
+    compresseur = zlib.compressobj(niveau, zlib.DEFLATED, 31)
+    for bloc in blocs:
+        sortie = compresseur.compress(bloc)
+        if sortie:
+            yield sortie
+    yield compresseur.flush()
+
+
+def reponse_ndjson(objets, serialiser_objet, gzip=False, nom_fichier=None) -> Response:
+    """Export NDJSON écrit en flux, compressé en gzip (Content-Encoding) si demandé"""
+    blocs = flux_ndjson(objets, serialiser_objet)
+    headers = {"Vary": "Accept-Encoding", "X-Accel-Buffering": "no"}
+    if gzip:
+        blocs = compresser_gzip(blocs)
+        headers["Content-Encoding"] = "gzip"
+    if nom_fichier:
+        headers["Content-Disposition"] = f'attachment; filename="{nom_fichier}"'
+    return Response(stream_with_context(blocs), mimetype="application/x-ndjson", headers=headers)
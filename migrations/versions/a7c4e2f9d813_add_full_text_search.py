@@ -0,0 +1,91 @@
+"""add full text search vectors on contenu and prompt
+
+Revision ID: a7c4e2f9d813
+Revises: f3a9c1d7b250
+Create Date: 2026-10-18 18:21:09.664302
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c4e2f9d813'
+down_revision = 'f3a9c1d7b250'
+branch_labels = None
+depends_on = None
+
+
+CONFIG = 'french'
+LOT = 5000
+
+# table -> [(colonne, poids)] ; doit rester aligné sur app/services/recherche.py
+TABLES = {
+    'contenu': [('titre', 'A'), ('texte', 'B'), ('custom_prompt', 'C')],
+    'prompt': [('nom_prompt', 'A'), ('texte_prompt', 'B')],
+}
+
+
+def _vecteur(colonnes, prefixe):
+    return " || ".join(
+        f"setweight(to_tsvector('{CONFIG}', coalesce({prefixe}{colonne}, '')), '{poids}')"
+        for colonne, poids in colonnes
+    )
+
+
+def upgrade():
+    # SQLite (local, tests) : les tables FTS5 sont créées au démarrage par le service de recherche
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table, colonnes in TABLES.items():
+        liste = ", ".join(c for c, _ in colonnes)
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        op.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {_vecteur(colonnes, 'NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector_trg ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {table}_search_vector_trg
+            BEFORE INSERT OR UPDATE OF {liste} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """)
+
+    # Remplissage par lots courts (verrous brefs) puis index GIN sans bloquer les écritures
+    with op.get_context().autocommit_block():
+        connexion = op.get_bind()
+        for table, colonnes in TABLES.items():
+            dernier = 0
+            while True:
+                resultat = connexion.exec_driver_sql(f"""
+                    UPDATE {table} SET search_vector = {_vecteur(colonnes, '')}
+                    WHERE id IN (
+                        SELECT id FROM {table} WHERE id > {dernier} AND search_vector IS NULL ORDER BY id LIMIT {LOT}
+                    )
+                    RETURNING id
+                """).fetchall()
+                if not resultat:
+                    break
+                dernier = max(ligne[0] for ligne in resultat)
+
+            op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], unique=False,
+                            postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(f'ix_{table}_search_vector', table_name=table,
+                          postgresql_concurrently=True, if_exists=True)
+
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector_trg ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector_update()")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,105 @@
+"""add modification dates and covering indexes for ETag validators
+
+Revision ID: b3d8e5f1c924
+Revises: a7c4e2f9d813
+Create Date: 2026-10-18 20:12:44.108375
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d8e5f1c924'
+down_revision = 'a7c4e2f9d813'
+branch_labels = None
+depends_on = None
+
+
+LOT = 5000
+
+# (table, colonne, valeur des lignes existantes) : NOT NULL pour que max()
+# et count() du validateur soient lus dans l'index seul
+DATES_MAJ = [
+    ('contenu', 'date_modification', 'date_creation'),
+    ('publications', 'date_modification', 'date_creation'),
+    ('utilisateur_plateforme', 'updated_at', 'COALESCE(created_at, CURRENT_TIMESTAMP)'),
+]
+
+INDEXES = [
+    ('ix_contenu_utilisateur_maj', 'contenu', ['id_utilisateur', 'date_modification']),
+    ('ix_contenu_date_modification', 'contenu', ['date_modification']),
+    ('ix_publications_utilisateur_maj', 'publications', ['id_utilisateur', 'date_modification']),
+    ('ix_publications_date_modification', 'publications', ['date_modification']),
+    ('ix_utilisateur_plateforme_utilisateur_maj', 'utilisateur_plateforme', ['utilisateur_id', 'updated_at', 'token_expires_at']),
+]
+
+
+def _postgres():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _remplir(connexion, table, colonne, valeur):
+    """Remplit les NULL par lots d'ids croissants (une transaction courte par lot en autocommit)"""
+    dernier = 0
+    while True:
+        resultat = connexion.exec_driver_sql(f"""
+            UPDATE {table} SET {colonne} = {valeur}
+            WHERE id IN (
+                SELECT id FROM {table} WHERE id > {dernier} AND {colonne} IS NULL ORDER BY id LIMIT {LOT}
+            )
+            RETURNING id
+        """).fetchall()
+        if not resultat:
+            break
+        dernier = max(ligne[0] for ligne in resultat)
+
+
+def upgrade():
+    with op.batch_alter_table('contenu', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('date_modification', sa.DateTime(), nullable=True))
+
+    # Même procédure que a7c4e2f9d813 : lots courts, verrous brefs
+    with op.get_context().autocommit_block():
+        for table, colonne, valeur in DATES_MAJ:
+            _remplir(op.get_bind(), table, colonne, valeur)
+
+    for table, colonne, valeur in DATES_MAJ:
+        # Lignes insérées pendant le remplissage par l'ancienne version de l'application
+        _remplir(op.get_bind(), table, colonne, valeur)
+        if _postgres():
+            # Même procédure que f3a9c1d7b250 : validation sans bloquer les écritures
+            contrainte = f"ck_{table}_{colonne}_not_null"
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {contrainte} CHECK ({colonne} IS NOT NULL) NOT VALID")
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {contrainte}")
+            op.alter_column(table, colonne, existing_type=sa.DateTime(), nullable=False)
+            op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {contrainte}")
+        else:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.alter_column(colonne, existing_type=sa.DateTime(), nullable=False)
+
+    if _postgres():
+        with op.get_context().autocommit_block():
+            for nom, table, colonnes in INDEXES:
+                op.create_index(nom, table, colonnes, unique=False,
+                                postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for nom, table, colonnes in INDEXES:
+            op.create_index(nom, table, colonnes, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    if _postgres():
+        with op.get_context().autocommit_block():
+            for nom, table, _ in reversed(INDEXES):
+                op.drop_index(nom, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for nom, table, _ in reversed(INDEXES):
+            op.drop_index(nom, table_name=table, if_exists=True)
+
+    for table, colonne, _ in reversed(DATES_MAJ):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            if table == 'contenu':
+                batch_op.drop_column(colonne)
+            else:
+                batch_op.alter_column(colonne, existing_type=sa.DateTime(), nullable=True)
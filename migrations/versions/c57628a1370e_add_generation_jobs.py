@@ -0,0 +1,44 @@
+"""add generation jobs
+
+Revision ID: c57628a1370e
+Revises: b29cab8e06d3
+Create Date: 2026-10-18 09:12:04.512233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c57628a1370e'
+down_revision = 'b29cab8e06d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('generation_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('id_utilisateur', sa.Integer(), nullable=False),
+    sa.Column('id_contenu', sa.Integer(), nullable=True),
+    sa.Column('statut', sa.Enum('en_attente', 'en_cours', 'termine', 'echec', name='statutjobenum'), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('resultat', sa.JSON(), nullable=True),
+    sa.Column('message_erreur', sa.Text(), nullable=True),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.Column('date_debut', sa.DateTime(), nullable=True),
+    sa.Column('date_fin', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_contenu'], ['contenu.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['id_utilisateur'], ['utilisateurs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_generation_jobs_statut'), ['statut'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_generation_jobs_statut'))
+
+    op.drop_table('generation_jobs')
+    sa.Enum(name='statutjobenum').drop(op.get_bind(), checkfirst=True)
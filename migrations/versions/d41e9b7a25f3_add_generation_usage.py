@@ -0,0 +1,56 @@
+"""add generation usage
+
+Revision ID: d41e9b7a25f3
+Revises: c57628a1370e
+Create Date: 2026-10-18 11:02:37.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41e9b7a25f3'
+down_revision = 'c57628a1370e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('generation_usage',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_utilisateur', sa.Integer(), nullable=False),
+    sa.Column('id_model', sa.Integer(), nullable=True),
+    sa.Column('id_contenu', sa.Integer(), nullable=True),
+    sa.Column('mode', sa.String(length=20), nullable=False),
+    sa.Column('statut', sa.String(length=20), nullable=False),
+    sa.Column('tokens_entree', sa.Integer(), nullable=True),
+    sa.Column('tokens_sortie', sa.Integer(), nullable=True),
+    sa.Column('cout', sa.Float(), nullable=False),
+    sa.Column('latence_ms', sa.Integer(), nullable=True),
+    sa.Column('attente_ms', sa.Integer(), nullable=True),
+    sa.Column('reseau_ms', sa.Integer(), nullable=True),
+    sa.Column('parse_ms', sa.Integer(), nullable=True),
+    sa.Column('tentatives', sa.Integer(), nullable=False),
+    sa.Column('cache_hit', sa.Boolean(), nullable=False),
+    sa.Column('hedged', sa.Boolean(), nullable=False),
+    sa.Column('message_erreur', sa.Text(), nullable=True),
+    sa.Column('date_creation', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_contenu'], ['contenu.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['id_model'], ['model_ia.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['id_utilisateur'], ['utilisateurs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('generation_usage', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_generation_usage_date_creation'), ['date_creation'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_usage_id_model'), ['id_model'], unique=False)
+        batch_op.create_index(batch_op.f('ix_generation_usage_id_utilisateur'), ['id_utilisateur'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('generation_usage', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_generation_usage_id_utilisateur'))
+        batch_op.drop_index(batch_op.f('ix_generation_usage_id_model'))
+        batch_op.drop_index(batch_op.f('ix_generation_usage_date_creation'))
+
+    op.drop_table('generation_usage')
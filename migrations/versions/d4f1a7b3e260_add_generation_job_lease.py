@@ -0,0 +1,30 @@
+"""add lease expiry on generation jobs
+
+Revision ID: d4f1a7b3e260
+Revises: b3d8e5f1c924
+Create Date: 2026-10-18 23:05:17.402918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f1a7b3e260'
+down_revision = 'b3d8e5f1c924'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Colonne nullable sans valeur par défaut : les jobs existants sans bail
+    # sont repris selon leur âge (GENERATION_JOB_TIMEOUT)
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('bail_expire', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_generation_jobs_statut_bail', ['statut', 'bail_expire'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('generation_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_generation_jobs_statut_bail')
+        batch_op.drop_column('bail_expire')
@@ -0,0 +1,36 @@
+"""add contenu image blob columns
+
+Revision ID: e6b2c08d1f47
+Revises: d41e9b7a25f3
+Create Date: 2026-10-18 13:40:11.902115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b2c08d1f47'
+down_revision = 'd41e9b7a25f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('contenu', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('image_mime', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('image_largeur', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('image_hauteur', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('image_taille', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_contenu_image_hash'), ['image_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('contenu', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_contenu_image_hash'))
+        batch_op.drop_column('image_taille')
+        batch_op.drop_column('image_hauteur')
+        batch_op.drop_column('image_largeur')
+        batch_op.drop_column('image_mime')
+        batch_op.drop_column('image_hash')
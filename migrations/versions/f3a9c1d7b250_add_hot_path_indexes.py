@@ -0,0 +1,91 @@
+"""add indexes for hot query paths
+
+Revision ID: f3a9c1d7b250
+Revises: e6b2c08d1f47
+Create Date: 2026-10-18 16:02:37.418260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c1d7b250'
+down_revision = 'e6b2c08d1f47'
+branch_labels = None
+depends_on = None
+
+
+# Colonnes de tri de la pagination keyset : NOT NULL pour que ORDER BY (date, id)
+# soit servi directement par l'index (un COALESCE l'en empêcherait)
+DATES_TRI = [
+    ('contenu', 'date_creation'),
+    ('publications', 'date_creation'),
+    ('historiques', 'date_action'),
+]
+
+INDEXES = [
+    ('ix_contenu_utilisateur_date', 'contenu', ['id_utilisateur', 'date_creation', 'id'], None),
+    ('ix_contenu_date_creation', 'contenu', ['date_creation', 'id'], None),
+    ('ix_publications_utilisateur_date', 'publications', ['id_utilisateur', 'date_creation', 'id'], None),
+    ('ix_publications_date_creation', 'publications', ['date_creation', 'id'], None),
+    ('ix_publications_statut_date_programmee', 'publications', ['statut', 'date_programmee'], None),
+    ('ix_publications_id_contenu', 'publications', ['id_contenu'], None),
+    ('ix_historiques_utilisateur_date', 'historiques', ['id_utilisateur', 'date_action', 'id'], None),
+    ('ix_historiques_date_action', 'historiques', ['date_action', 'id'], None),
+    ('ix_historiques_id_contenu', 'historiques', ['id_contenu'], None),
+    ('ix_tokens_utilisateur_provider', 'tokens', ['utilisateur_id', 'provider'], None),
+    ('ix_utilisateur_plateforme_utilisateur_plateforme', 'utilisateur_plateforme', ['utilisateur_id', 'plateforme_id'], None),
+    ('ix_oauth_state_created_at', 'oauth_state', ['created_at'], None),
+    ('ix_oauth_state_used', 'oauth_state', ['used'], sa.column('used') == sa.true()),
+    ('ix_prompt_id_utilisateur', 'prompt', ['id_utilisateur'], None),
+    ('ix_templates_id_utilisateur', 'templates', ['id_utilisateur'], None),
+    ('ix_projets_id_utilisateur', 'projets', ['id_utilisateur'], None),
+]
+
+
+def _postgres():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    for table, colonne in DATES_TRI:
+        op.execute(f"UPDATE {table} SET {colonne} = CURRENT_TIMESTAMP WHERE {colonne} IS NULL")
+        if _postgres():
+            # CHECK NOT VALID puis VALIDATE : le parcours de validation ne bloque
+            # pas les écritures, et SET NOT NULL réutilise la contrainte validée
+            contrainte = f"ck_{table}_{colonne}_not_null"
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {contrainte} CHECK ({colonne} IS NOT NULL) NOT VALID")
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {contrainte}")
+            op.alter_column(table, colonne, existing_type=sa.DateTime(), nullable=False)
+            op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {contrainte}")
+        else:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.alter_column(colonne, existing_type=sa.DateTime(), nullable=False)
+
+    if _postgres():
+        # CREATE INDEX CONCURRENTLY ne bloque pas les écritures mais refuse de
+        # tourner dans une transaction : chaque index est créé en autocommit.
+        # IF NOT EXISTS permet de relancer après un échec partiel (un index
+        # concurrent interrompu reste INVALID : le supprimer avant de relancer).
+        with op.get_context().autocommit_block():
+            for nom, table, colonnes, condition in INDEXES:
+                op.create_index(nom, table, colonnes, unique=False, postgresql_where=condition,
+                                postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for nom, table, colonnes, condition in INDEXES:
+            op.create_index(nom, table, colonnes, unique=False, sqlite_where=condition, if_not_exists=True)
+
+
+def downgrade():
+    if _postgres():
+        with op.get_context().autocommit_block():
+            for nom, table, _, _ in reversed(INDEXES):
+                op.drop_index(nom, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for nom, table, _, _ in reversed(INDEXES):
+            op.drop_index(nom, table_name=table, if_exists=True)
+
+    for table, colonne in reversed(DATES_TRI):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column(colonne, existing_type=sa.DateTime(), nullable=True)
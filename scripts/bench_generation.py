@@ -0,0 +1,152 @@
+"""Benchmark de débit de POST /api/contenu contre le fournisseur factice.
+
+L'application tourne en processus (client de test Flask, base SQLite jetable
+par défaut), le fournisseur factice dans un thread. Pour chaque palier de
+concurrence : débit, percentiles de latence, erreurs et requêtes SQL par appel.
+
+    python scripts/bench_generation.py --paliers 1,4,16 --requetes 100 --latence lognormal:200,0.4
+    python scripts/bench_generation.py --json > resultats.json
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_provider import creer_serveur  # noqa: E402
+
+
+def percentile(valeurs, p):
+    if not valeurs:
+        return None
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(round(p * (len(valeurs) - 1))))]
+
+
+class CompteurRequetes:
+    """Compte les requêtes SQL exécutées par le moteur (tous threads confondus)"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self._lock = threading.Lock()
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._compter)
+
+    def _compter(self, *args, **kwargs):
+        with self._lock:
+            self.total += 1
+
+
+def preparer_app(args):
+    from app import create_app
+    from app.extensions import db
+    from app.models.utilisateur import Utilisateur, TypeCompteEnum
+    from app.models.modelIA import ModelIA
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    with app.app_context():
+        utilisateur = Utilisateur(nom="bench", email=f"bench-{int(time.time())}@local", type_compte=TypeCompteEnum.admin)
+        model = ModelIA(
+            nom_model="bench-model", fournisseur=args.fournisseur, api_endpoint="local",
+            parametres_default={"temperature": 0.7, "max_tokens": 256}, cout_par_token=0.00001
+        )
+        db.session.add_all([utilisateur, model])
+        db.session.commit()
+        token = create_access_token(identity=str(utilisateur.id))
+        return app, token, model.id, CompteurRequetes(db.engine)
+
+
+def executer_palier(app, token, model_id, concurrence, nb_requetes, args, compteur):
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+            local.client.set_cookie("access_token_cookie", token)
+        return local.client
+
+    def requete(i):
+        prompt = "prompt de benchmark" if args.prompts_identiques else f"prompt de benchmark {concurrence}-{i}"
+        debut = time.perf_counter()
+        reponse = client().post(args.endpoint, json={"id_model": model_id, "custom_prompt": prompt})
+        return reponse.status_code, (time.perf_counter() - debut) * 1000
+
+    requetes_sql_avant = compteur.total
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrence) as executor:
+        resultats = list(executor.map(requete, range(nb_requetes)))
+    duree = time.perf_counter() - debut
+
+    latences = [ms for code, ms in resultats if code < 400]
+    return {
+        "concurrence": concurrence,
+        "requetes": nb_requetes,
+        "erreurs": sum(1 for code, _ in resultats if code >= 400),
+        "debit_rps": round(nb_requetes / duree, 2),
+        "p50_ms": round(percentile(latences, 0.50), 1) if latences else None,
+        "p95_ms": round(percentile(latences, 0.95), 1) if latences else None,
+        "p99_ms": round(percentile(latences, 0.99), 1) if latences else None,
+        "requetes_sql_par_appel": round((compteur.total - requetes_sql_avant) / nb_requetes, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la génération de contenu")
+    parser.add_argument("--paliers", default="1,2,4,8,16", help="Niveaux de concurrence")
+    parser.add_argument("--requetes", type=int, default=50, help="Requêtes par palier")
+    parser.add_argument("--endpoint", default="/api/contenu/")
+    parser.add_argument("--fournisseur", default="gpt", help="Fournisseur du modèle de test")
+    parser.add_argument("--db-url", default=None, help="Base cible (défaut : SQLite temporaire)")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latence", default="fixe:100")
+    parser.add_argument("--taux-429", type=float, default=0.0)
+    parser.add_argument("--taux-503", type=float, default=0.0)
+    parser.add_argument("--taux-vide", type=float, default=0.0)
+    parser.add_argument("--taux-image-markdown", type=float, default=0.0)
+    parser.add_argument("--prompts-identiques", action="store_true", help="Même prompt partout (mesure cache/fusion)")
+    parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    args = parser.parse_args()
+
+    url_fake = f"http://127.0.0.1:{args.port}/v1/chat/completions"
+    for variable in ["COMET_API_URL", "OPENAI_API_URL", "GROK_API_URL"]:
+        os.environ[variable] = url_fake
+    for variable in ["COMET_API_KEY", "API_KEY_OPENAI", "API_KEY_GROK"]:
+        os.environ.setdefault(variable, "bench")
+    if args.db_url:
+        os.environ["DB_URL"] = args.db_url
+    else:
+        os.environ["DB_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+    serveur = creer_serveur(
+        port=args.port, latence=args.latence, taux_429=args.taux_429, taux_503=args.taux_503,
+        taux_vide=args.taux_vide, taux_image_markdown=args.taux_image_markdown
+    )
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+
+    app, token, model_id, compteur = preparer_app(args)
+
+    resultats = []
+    for concurrence in [int(p) for p in args.paliers.split(",")]:
+        resultat = executer_palier(app, token, model_id, concurrence, args.requetes, args, compteur)
+        resultats.append(resultat)
+        if not args.json:
+            print(
+                f"c={resultat['concurrence']:>3}  {resultat['debit_rps']:>7} req/s  "
+                f"p50={resultat['p50_ms']}ms  p95={resultat['p95_ms']}ms  p99={resultat['p99_ms']}ms  "
+                f"erreurs={resultat['erreurs']}  sql/appel={resultat['requetes_sql_par_appel']}",
+                file=sys.stderr
+            )
+
+    serveur.shutdown()
+    if args.json:
+        print(json.dumps({"fournisseur_factice": serveur.RequestHandlerClass.stats.to_dict(), "paliers": resultats}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
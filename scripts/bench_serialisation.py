@@ -0,0 +1,155 @@
+"""Micro-benchmark de la sérialisation des listes (sans base ni serveur).
+
+Compare, sur N contenus et publications transitoires :
+  - l'ancien to_dict (dictionnaire de lambdas) + json.dumps façon jsonify ;
+  - le registre de sérialiseurs passé par jsonify (publications) ;
+  - le registre de sérialiseurs (app/utils/serialisation.py) avec json puis orjson ;
+  - le tableau écrit en flux (flux_json), pic mémoire compris.
+
+    python scripts/bench_serialisation.py --lignes 10000 --repetitions 5
+"""
+from datetime import datetime, timedelta
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.contenu import Contenu, TypeContenuEnum  # noqa: E402
+from app.models.publication import Publication, StatutPublicationEnum  # noqa: E402
+from app.utils import serialisation  # noqa: E402
+
+
+def ancien_contenu(c):
+    """Implémentation précédente de Contenu.to_dict, conservée pour comparaison"""
+    valeurs = {
+        "id": lambda: c.id,
+        "id_utilisateur": lambda: c.id_utilisateur,
+        "id_projet": lambda: c.id_projet,
+        "id_model": lambda: c.id_model,
+        "id_template": lambda: c.id_template,
+        "custom_prompt": lambda: c.custom_prompt,
+        "id_prompt": lambda: c.id_prompt,
+        "titre": lambda: c.titre,
+        "type_contenu": lambda: c.type_contenu.value if c.type_contenu else None,
+        "texte": lambda: c.texte,
+        "image_url": lambda: c.url_image(),
+        "thumbnail_url": lambda: c.url_image("miniature"),
+        "image": lambda: {
+            "mime": c.image_mime,
+            "largeur": c.image_largeur,
+            "hauteur": c.image_hauteur,
+            "taille": c.image_taille,
+        } if c.image_hash else None,
+        "contenu_structure": lambda: c.contenu_structure,
+        "meta": lambda: c.meta,
+        "date_creation": lambda: c.date_creation.isoformat() if c.date_creation else None,
+    }
+    return {champ: valeur() for champ, valeur in valeurs.items()}
+
+
+def generer(nb):
+    debut = datetime(2025, 1, 1)
+    contenus, publications = [], []
+    for i in range(1, nb + 1):
+        contenu = Contenu(
+            id=i, id_utilisateur=i % 50, id_model=1, titre=f"Contenu {i}", type_contenu=TypeContenuEnum.text,
+            texte="Lorem ipsum dolor sit amet, é à ç " * 8, custom_prompt=f"prompt {i}",
+            meta={"tokens": i, "modele": "gpt"}, date_creation=debut + timedelta(minutes=i),
+            image_hash=f"{i:064x}" if i % 3 == 0 else None, image_mime="image/webp",
+            image_largeur=1024, image_hauteur=768, image_taille=48213,
+        )
+        contenus.append(contenu)
+        publications.append(Publication(
+            id=i, id_utilisateur=i % 50, id_contenu=i, plateforme="x", titre_publication=f"Publication {i}",
+            statut=StatutPublicationEnum.programme, date_programmee=debut + timedelta(days=i % 30),
+            parametres_publication={}, nombre_vues=i, nombre_likes=0, nombre_partages=0,
+            date_creation=debut + timedelta(minutes=i), contenu=contenu,
+        ))
+    return contenus, publications
+
+
+def mesurer(fonction, repetitions):
+    """Meilleur temps sur `repetitions` passes, ramasse-miettes suspendu pendant la mesure"""
+    durees = []
+    fonction()
+    for _ in range(repetitions):
+        gc.collect()
+        gc.disable()
+        try:
+            debut = time.perf_counter()
+            taille = fonction()
+            durees.append((time.perf_counter() - debut) * 1000)
+        finally:
+            gc.enable()
+    return min(durees), taille
+
+
+def pic_memoire(fonction):
+    tracemalloc.start()
+    fonction()
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pic / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la sérialisation JSON des listes")
+    parser.add_argument("--lignes", type=int, default=10000)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    args = parser.parse_args()
+
+    contenus, publications = generer(args.lignes)
+
+    def jsonify_like(donnees):
+        # Fournisseur JSON par défaut de Flask : ensure_ascii, clés triées
+        return len(json.dumps(donnees, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode())
+
+    def avec_backend(backend, fonction):
+        def executer():
+            precedent, serialisation.BACKEND = serialisation.BACKEND, backend
+            try:
+                return fonction()
+            finally:
+                serialisation.BACKEND = precedent
+        return executer
+
+    registre = lambda objets: len(serialisation.dumps([serialisation.serialiser(o) for o in objets]))  # noqa: E731
+    flux = lambda objets: sum(len(bloc) for bloc in serialisation.flux_json(objets, serialisation.serialiser))  # noqa: E731
+
+    scenarios = {
+        "contenu ancien to_dict + jsonify": lambda: jsonify_like([ancien_contenu(c) for c in contenus]),
+        "contenu registre + json": avec_backend("json", lambda: registre(contenus)),
+        "contenu registre + json en flux": avec_backend("json", lambda: flux(contenus)),
+        "publication registre + jsonify": lambda: jsonify_like([p.to_dict() for p in publications]),
+        "publication registre + json en flux": avec_backend("json", lambda: flux(publications)),
+    }
+    if serialisation.orjson is not None:
+        scenarios["contenu registre + orjson"] = avec_backend("orjson", lambda: registre(contenus))
+        scenarios["contenu registre + orjson en flux"] = avec_backend("orjson", lambda: flux(contenus))
+        scenarios["publication registre + orjson en flux"] = avec_backend("orjson", lambda: flux(publications))
+    else:
+        print("orjson non installé : scénarios orjson ignorés", file=sys.stderr)
+
+    resultats = []
+    for nom, fonction in scenarios.items():
+        duree, taille = mesurer(fonction, args.repetitions)
+        resultats.append({
+            "scenario": nom, "ms": round(duree, 1), "octets": taille,
+            "pic_memoire_mo": round(pic_memoire(fonction), 1),
+        })
+        if not args.json:
+            print(f"{nom:<42} {duree:>8.1f} ms  {taille / 1024:>8.0f} Ko  pic={resultats[-1]['pic_memoire_mo']} Mo",
+                  file=sys.stderr)
+
+    if args.json:
+        print(json.dumps({"lignes": args.lignes, "backend_defaut": serialisation.BACKEND, "scenarios": resultats}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
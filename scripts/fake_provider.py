@@ -0,0 +1,206 @@
+"""Serveur factice compatible OpenAI /v1/chat/completions pour les tests de charge.
+
+Aucun appel payant : latence, taux d'erreurs et type de réponse sont configurables.
+
+    python scripts/fake_provider.py --port 8099 --latence lognormal:300,0.5 --taux-503 0.05
+    COMET_API_URL=http://127.0.0.1:8099/v1/chat/completions flask run
+
+Distributions de latence (en ms) : fixe:200, uniforme:100,500, lognormal:mediane,sigma
+Statistiques : GET /stats
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import argparse
+import base64
+import json
+import math
+import random
+import threading
+import time
+import uuid
+
+
+# PNG 1x1 transparent
+PNG_1X1 = base64.b64encode(bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)).decode()
+
+
+def parser_latence(spec: str):
+    """'fixe:200' | 'uniforme:100,500' | 'lognormal:300,0.5' -> fonction renvoyant des secondes"""
+    loi, _, args = spec.partition(":")
+    valeurs = [float(v) for v in args.split(",") if v]
+    if loi == "fixe":
+        return lambda: valeurs[0] / 1000
+    if loi == "uniforme":
+        return lambda: random.uniform(valeurs[0], valeurs[1]) / 1000
+    if loi == "lognormal":
+        mediane, sigma = valeurs
+        return lambda: random.lognormvariate(math.log(mediane), sigma) / 1000
+    raise ValueError(f"Distribution de latence inconnue: {spec}")
+
+
+class Statistiques:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.compteurs = {}
+
+    def incrementer(self, cle):
+        with self._lock:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + 1
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self.compteurs)
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+    stats = None
+
+    def log_message(self, format, *args):
+        if self.config.verbose:
+            super().log_message(format, *args)
+
+    def _json(self, code, donnees, headers=None):
+        corps = json.dumps(donnees).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        for nom, valeur in (headers or {}).items():
+            self.send_header(nom, valeur)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            return self._json(200, self.stats.to_dict())
+        self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        longueur = int(self.headers.get("Content-Length", 0))
+        requete = json.loads(self.rfile.read(longueur) or b"{}")
+        self.stats.incrementer("requetes")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": "not found"})
+
+        time.sleep(self.config.latence())
+
+        tirage = random.random()
+        seuil = 0.0
+        for code, taux in [(429, self.config.taux_429), (503, self.config.taux_503)]:
+            seuil += taux
+            if tirage < seuil:
+                self.stats.incrementer(str(code))
+                headers = {"Retry-After": str(self.config.retry_after)} if self.config.retry_after is not None else {}
+                return self._json(code, {"error": {"message": "fake provider overloaded"}}, headers)
+        seuil += self.config.taux_vide
+        if tirage < seuil:
+            self.stats.incrementer("vide")
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        contenu = self._contenu(requete)
+        usage = {
+            "prompt_tokens": sum(len(str(m.get("content", "")).split()) for m in requete.get("messages", [])),
+            "completion_tokens": len(contenu.split()),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if requete.get("stream"):
+            self.stats.incrementer("stream")
+            return self._stream(requete, contenu, usage)
+
+        self.stats.incrementer("200")
+        self._json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": requete.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": contenu}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _contenu(self, requete):
+        tirage = random.random()
+        if tirage < self.config.taux_image_markdown:
+            self.stats.incrementer("image_markdown")
+            return f"Voici l'image ![image](data:image/png;base64,{PNG_1X1})"
+        if tirage < self.config.taux_image_markdown + self.config.taux_data_uri:
+            self.stats.incrementer("data_uri")
+            return f"data:image/png;base64,{PNG_1X1}"
+        mots = self.config.mots
+        return " ".join(random.choice(["lorem", "ipsum", "dolor", "sit", "amet", "contenu", "genere"]) for _ in range(mots))
+
+    def _stream(self, requete, contenu, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def envoyer(donnees):
+            ligne = f"data: {donnees}\n\n".encode()
+            self.wfile.write(f"{len(ligne):x}\r\n".encode() + ligne + b"\r\n")
+            self.wfile.flush()
+
+        for mot in contenu.split(" "):
+            envoyer(json.dumps({"choices": [{"index": 0, "delta": {"content": mot + " "}}]}))
+            if self.config.delai_token:
+                time.sleep(self.config.delai_token / 1000)
+        if (requete.get("stream_options") or {}).get("include_usage"):
+            envoyer(json.dumps({"choices": [], "usage": usage}))
+        envoyer("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def creer_serveur(host="127.0.0.1", port=8099, **options):
+    """Crée le serveur (non démarré) ; utilisable depuis le script de benchmark"""
+    config = argparse.Namespace(
+        latence=parser_latence(options.get("latence", "fixe:50")),
+        taux_429=options.get("taux_429", 0.0),
+        taux_503=options.get("taux_503", 0.0),
+        taux_vide=options.get("taux_vide", 0.0),
+        taux_image_markdown=options.get("taux_image_markdown", 0.0),
+        taux_data_uri=options.get("taux_data_uri", 0.0),
+        retry_after=options.get("retry_after"),
+        mots=options.get("mots", 50),
+        delai_token=options.get("delai_token", 0),
+        verbose=options.get("verbose", False),
+    )
+    handler = type("Handler", (FakeProviderHandler,), {"config": config, "stats": Statistiques()})
+    serveur = ThreadingHTTPServer((host, port), handler)
+    serveur.daemon_threads = True
+    return serveur
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fournisseur IA factice (OpenAI-compatible)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latence", default="fixe:50", help="fixe:MS | uniforme:MIN,MAX | lognormal:MEDIANE,SIGMA")
+    parser.add_argument("--taux-429", type=float, default=0.0)
+    parser.add_argument("--taux-503", type=float, default=0.0)
+    parser.add_argument("--taux-vide", type=float, default=0.0, help="Réponses 200 au corps vide")
+    parser.add_argument("--taux-image-markdown", type=float, default=0.0)
+    parser.add_argument("--taux-data-uri", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=None)
+    parser.add_argument("--mots", type=int, default=50, help="Longueur des réponses texte")
+    parser.add_argument("--delai-token", type=float, default=0, help="Délai entre fragments en streaming (ms)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    options = {k: v for k, v in vars(args).items() if k not in ["host", "port"]}
+    serveur = creer_serveur(args.host, args.port, **options)
+    print(f"Fournisseur factice sur http://{args.host}:{args.port}/v1/chat/completions")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        serveur.shutdown()
+
+
+if __name__ == "__main__":
+    main()
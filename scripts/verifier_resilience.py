@@ -0,0 +1,103 @@
+"""Vérifications du disjoncteur et de la politique de reessai, sans réseau.
+
+Le dépôt n'a pas de suite de tests : ce script rejoue les cas limites de
+app/services/resilience.py et du streaming des adaptateurs, et sort en
+erreur (code 1) si l'un d'eux régresse.
+
+    python scripts/verifier_resilience.py
+"""
+from contextlib import contextmanager
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.resilience import CircuitBreaker, RetryPolicy, Reessai  # noqa: E402
+from app.services import providers  # noqa: E402
+
+
+def disjoncteur_demi_ouvert(nom):
+    disjoncteur = CircuitBreaker(nom, seuil=1, refroidissement=0.01)
+    disjoncteur.echec()
+    time.sleep(0.02)
+    return disjoncteur
+
+
+def verifier_stream_exception_demi_ouvert():
+    """Une exception non réseau pendant l'essai demi-ouvert rouvre le circuit au lieu de le bloquer"""
+    disjoncteur = disjoncteur_demi_ouvert("verif_stream")
+
+    @contextmanager
+    def stream_en_erreur(*args, **kwargs):
+        raise RuntimeError("panne hors réseau")
+        yield
+
+    adapter = providers.CometGptAdapter()
+    adapter.api_key = lambda: "verif"
+    adapter.disjoncteur = lambda: disjoncteur
+    stream_origine = providers.provider_client.stream
+    providers.provider_client.stream = stream_en_erreur
+    try:
+        fragments = list(adapter.stream("verif", "prompt", 0.5, 10))
+    finally:
+        providers.provider_client.stream = stream_origine
+
+    assert fragments and fragments[0]["type"] == "error", fragments
+    assert disjoncteur.etat == CircuitBreaker.OUVERT, disjoncteur.to_dict()
+    time.sleep(0.02)
+    assert disjoncteur.autoriser(), "nouvel essai refusé après refroidissement : circuit bloqué en demi-ouvert"
+
+
+def verifier_retry_after_hors_plafond():
+    """Retry-After au-delà du plafond : pas d'attente raccourcie, abandon marqué `repli`"""
+    politique = RetryPolicy(max_tentatives=3, plafond=2, echeance=30)
+    appels = []
+
+    def tentative(restant):
+        appels.append(restant)
+        return {"type": "error", "content": "429"}, Reessai(retry_after=60)
+
+    debut = time.monotonic()
+    resultat = politique.executer(tentative)
+    assert len(appels) == 1 and resultat.get("repli"), resultat
+    assert time.monotonic() - debut < 1, "Retry-After raccourci au plafond"
+    assert politique.delai(0, 1.5) == 1.5
+
+
+def verifier_timeout_borne_par_echeance():
+    """Chaque tentative reçoit au plus le temps restant avant l'échéance"""
+    politique = RetryPolicy(max_tentatives=5, base=0.01, plafond=0.01, echeance=0.3)
+    restants = []
+
+    def tentative(restant):
+        restants.append(restant)
+        time.sleep(0.1)
+        return {"type": "error", "content": "timeout"}, Reessai()
+
+    politique.executer(tentative)
+    assert all(r <= 0.3 for r in restants), restants
+    assert restants == sorted(restants, reverse=True), restants
+
+
+VERIFICATIONS = [
+    verifier_stream_exception_demi_ouvert,
+    verifier_retry_after_hors_plafond,
+    verifier_timeout_borne_par_echeance,
+]
+
+
+def main():
+    echecs = 0
+    for verification in VERIFICATIONS:
+        try:
+            verification()
+            print(f"OK     {verification.__name__}", file=sys.stderr)
+        except AssertionError as e:
+            echecs += 1
+            print(f"ÉCHEC  {verification.__name__}: {e}", file=sys.stderr)
+    sys.exit(1 if echecs else 0)
+
+
+if __name__ == "__main__":
+    main()